@@ -0,0 +1,77 @@
+"""Web-tier handlers through TestClient, plus the helpers they lean on."""
+
+import os
+import time
+
+import main
+import utils
+from db import transcriptionsDB
+
+
+def test_status_completed_job(benchmark, client, completed_job):
+    job_id, _ = completed_job
+    r = benchmark(client.get, f"/status?pid={job_id}")
+    assert r.status_code == 200
+
+
+def test_preview(benchmark, client, completed_job):
+    """Full preview, after the first request has rendered the exports."""
+    job_id, _ = completed_job
+    assert client.get(f"/preview?pid={job_id}").status_code == 200
+    r = benchmark(client.get, f"/preview?pid={job_id}", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+
+
+def test_preview_revalidation(benchmark, client, completed_job):
+    job_id, _ = completed_job
+    etag = client.get(f"/preview?pid={job_id}").headers["etag"]
+    r = benchmark(client.get, f"/preview?pid={job_id}", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+
+
+def test_segments_page(benchmark, client, completed_job, segments):
+    job_id, _ = completed_job
+    url = f"/segments?pid={job_id}&cursor={len(segments) // 2}&limit=200"
+    assert benchmark(client.get, url).status_code == 200
+
+
+def test_count_active_jobs(benchmark, monkeypatch, tmp_path):
+    """
+    20 in-flight rows: 10 still downloading (pid 0) in this web process, 10
+    whose pid is a live process but not a worker, so each costs the full
+    liveness check.
+    """
+    db = transcriptionsDB(str(tmp_path / "bench.db"))
+    monkeypatch.setattr(main, "DB", db)
+    for i in range(20):
+        job_id = db.insert_transcription(
+            "", "bench.mp3", "en", "whisper_tiny", "none", "en", "all",
+            "Transcribing...", str(time.time()), owner=utils.process_identity(),
+        )
+        if i % 2:
+            db.set_process_pid(os.getpid(), job_id)
+    assert benchmark(main._count_active_jobs) == 10
+
+
+def test_purge_expired_jobs(benchmark, monkeypatch, tmp_path):
+    """Retention sweep over 100 expired jobs with files and search entries."""
+    from conftest import synthetic_segments
+
+    db = transcriptionsDB(str(tmp_path / "bench.db"))
+    monkeypatch.setattr(utils, "DB", db)
+    monkeypatch.setattr(utils, "OUTPUT_DIR", tmp_path)
+    segments = synthetic_segments(200)
+
+    def expired_jobs():
+        for _ in range(100):
+            job_id = db.insert_transcription(
+                "", "bench.mp3", "en", "whisper_tiny", "none", "en", "all",
+                "Completed successfully!", "1.0",
+            )
+            db.update_transcription_status("Completed successfully!", "2.0", 100, job_id)
+            utils.job_dir(job_id).mkdir(parents=True)
+            segments.write_srt(utils.job_dir(job_id) / "final_transcription.srt")
+            db.index_transcript(job_id, segments)
+
+    removed = benchmark.pedantic(utils.purge_expired_jobs, args=(1,), setup=expired_jobs, rounds=5)
+    assert removed == 100
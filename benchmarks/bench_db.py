@@ -0,0 +1,90 @@
+"""transcriptionsDB operations on a database with realistic row counts."""
+
+import time
+
+import pytest
+
+from conftest import SIZES, synthetic_segments
+from db import transcriptionsDB
+
+JOBS = 1000  # history rows behind the list/duration queries
+
+
+def _insert(db) -> int:
+    return db.insert_transcription(
+        "", "bench.mp3", "en", "whisper_tiny", "none", "en", "all", "Processing request...",
+        str(time.time()),
+    )
+
+
+@pytest.fixture
+def db(tmp_path):
+    return transcriptionsDB(str(tmp_path / "bench.db"))
+
+
+@pytest.fixture
+def history_db(db):
+    """JOBS finished jobs, each with a full stage event log."""
+    for _ in range(JOBS):
+        job_id = _insert(db)
+        for phase, progress in (("Loading model...", 20), ("Transcribing...", 40), ("Saving...", 70)):
+            db.update_transcription_status(phase, "", progress, job_id)
+        db.update_transcription_status("Completed successfully!", str(time.time()), 100, job_id)
+    return db
+
+
+def test_insert_transcription(benchmark, db):
+    benchmark(_insert, db)
+
+
+def test_update_transcription_status(benchmark, db):
+    job_id = _insert(db)
+    phases = iter(["Transcribing...", "Saving..."] * 1_000_000)
+    benchmark(lambda: db.update_transcription_status(next(phases), "", 40, job_id))
+
+
+def test_get_transcription(benchmark, history_db):
+    benchmark(history_db.get_transcription, JOBS // 2)
+
+
+def test_list_jobs(benchmark, history_db):
+    assert len(benchmark(history_db.list_jobs, 1000)) == JOBS
+
+
+def test_get_stage_durations(benchmark, history_db):
+    """What /history computes for every listed job."""
+    benchmark(history_db.get_stage_durations, range(1, JOBS + 1))
+
+
+def test_get_active_jobs(benchmark, history_db):
+    for _ in range(20):
+        _insert(history_db)
+    assert len(benchmark(history_db.get_active_jobs)) == 20
+
+
+def test_translation_memory_lookup(benchmark, db, segments):
+    texts = segments.texts
+    db.put_translations({text: text.upper() for text in texts[::2]}, "EN", "DE")
+    benchmark(db.get_translations, texts, "EN", "DE")
+
+
+def test_index_transcript(benchmark, db, segments):
+    job_id = _insert(db)
+    benchmark.pedantic(db.index_transcript, args=(job_id, segments), rounds=5)
+
+
+@pytest.fixture
+def search_db(db):
+    """One indexed, completed transcript per benchmark size (plus a rare word in one)."""
+    for n in SIZES:
+        segments = synthetic_segments(n)
+        segments.texts[n // 2] += " zeppelin"
+        job_id = _insert(db)
+        db.update_transcription_status("Completed successfully!", "2.0", 100, job_id)
+        db.index_transcript(job_id, segments)
+    return db
+
+
+@pytest.mark.parametrize("query", ["fox", "quick brown", "zeppelin"])
+def test_search_transcripts(benchmark, search_db, query):
+    assert benchmark(search_db.search_transcripts, query, 50)
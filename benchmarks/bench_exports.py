@@ -0,0 +1,68 @@
+"""Saving the canonical SRT and everything derived from it, per transcript size."""
+
+import pytest
+
+from models import save_final_transcription
+from segments import SegmentIndex, Segments, write_index
+from utils import EXPORT_FORMATS, render_export, stream_zip
+
+
+def _rounds(segments) -> int:
+    # Enough rounds for stable numbers without minutes per 50k-segment PDF.
+    return 3 if len(segments) >= 10_000 else 20
+
+
+def test_save_final_transcription(benchmark, segments, tmp_path):
+    out = str(tmp_path / "final_transcription.srt")
+    benchmark(save_final_transcription, segments, segments.texts, out)
+
+
+def test_parse_canonical_srt(benchmark, segments, tmp_path):
+    srt = tmp_path / "final_transcription.srt"
+    segments.write_srt(srt)
+    assert len(benchmark(Segments.from_srt, srt)) == len(segments)
+
+
+@pytest.mark.parametrize("export_format", EXPORT_FORMATS)
+def test_render_export(benchmark, completed_job, segments, export_format):
+    """First request for a format: parse the canonical SRT, render, precompress."""
+    _, job_dir = completed_job
+    target = job_dir / f"final_transcription.{export_format}"
+
+    # The canonical SRT itself is never re-rendered, only precompressed.
+    pattern = f"{target.name}.*" if export_format == "srt" else f"{target.name}*"
+
+    def remove_rendered():
+        for path in job_dir.glob(pattern):
+            path.unlink()
+
+    benchmark.pedantic(
+        render_export, args=(job_dir, export_format), setup=remove_rendered,
+        rounds=_rounds(segments),
+    )
+
+
+def test_segment_index_page(benchmark, segments, tmp_path):
+    """One /segments page from the middle of the transcript."""
+    srt, idx = tmp_path / "t.srt", tmp_path / "t.idx"
+    segments.write_srt(srt)
+    write_index(srt, idx)
+    middle = len(segments) // 2
+
+    def read_page():
+        with SegmentIndex(idx, srt) as index:
+            return index.read(middle, middle + 200)
+
+    benchmark(read_page)
+
+
+def test_stream_zip(benchmark, completed_job, segments):
+    _, job_dir = completed_job
+    for export_format in EXPORT_FORMATS:
+        render_export(job_dir, export_format)
+
+    def build():
+        length, chunks = stream_zip(job_dir)
+        return sum(len(chunk) for chunk in chunks)
+
+    benchmark.pedantic(build, rounds=_rounds(segments))
@@ -0,0 +1,58 @@
+"""
+Shared fixtures for the hot-path benchmarks: the test suite's import path, ML
+stubs and ``client`` fixture, plus synthetic transcripts and a job directory
+populated the way the worker leaves it.
+
+BENCH_SIZES (comma-separated segment counts, default 10,1000,10000,50000)
+picks the transcript sizes; trim it for a quick run.
+"""
+
+import os
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tests.conftest import client  # noqa: E402,F401  (also puts src/ on the path)
+
+from fake_whisper import WORDS  # noqa: E402
+from segments import Segments  # noqa: E402
+
+SIZES = [int(n) for n in os.getenv("BENCH_SIZES", "10,1000,10000,50000").split(",")]
+
+
+def synthetic_segments(n: int) -> Segments:
+    """n segments of 6-14 words, 2-5 s each, the same for every run."""
+    rng = random.Random(n)
+    items, t = [], 0.0
+    for _ in range(n):
+        length = rng.uniform(2, 5)
+        words = rng.choices(WORDS, k=rng.randint(6, 14))
+        items.append((t, t + length, " ".join(words).capitalize() + "."))
+        t += length
+    return Segments.from_seconds(items)
+
+
+@pytest.fixture(params=SIZES, ids=lambda n: f"{n}seg")
+def segments(request) -> Segments:
+    return synthetic_segments(request.param)
+
+
+@pytest.fixture
+def completed_job(client, tmp_path, monkeypatch, segments):  # noqa: F811
+    """A finished job with only its canonical SRT, served by the test client."""
+    import main
+    import utils
+
+    monkeypatch.setattr(utils, "OUTPUT_DIR", tmp_path)
+    job_id = main.DB.insert_transcription(
+        "", "bench.mp3", "en", "whisper_tiny", "none", "en", "all", "Processing request...", "1.0"
+    )
+    main.DB.update_transcription_status("Completed successfully!", "2.0", 100, job_id)
+    job_dir = utils.job_dir(job_id)
+    job_dir.mkdir(parents=True)
+    segments.write_srt(job_dir / "final_transcription.srt")
+    return job_id, job_dir
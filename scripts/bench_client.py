@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+Measuring side of scripts/benchmark.sh (stdlib only, runs on the host).
+
+``job`` submits one transcription to a running server, polls it to the end
+and appends one JSON record to a results file: wall time, audio duration,
+real-time factor, per-stage seconds (/status ``stages``), the worker's peak
+RSS (sampled from /metrics while polling), whether the model came from a cold
+or warm cache, and the text checks (expected pattern, WER, first line).
+Runs given a ``--series`` (a model on the long fixtures from
+scripts/make_fixtures.py) are kept apart as throughput curves.
+
+``report`` turns the records into the markdown tables BENCHMARK.md keeps,
+writes the whole run as JSON, and diffs it against the newest table in
+BENCHMARK.md: a metric that got worse by more than --threshold (and by more
+than a small absolute floor, so a 5s → 6s blip on the 6s fixture is noise) is
+flagged, and the exit status is 1.
+
+    python scripts/bench_client.py job --url http://127.0.0.1:8091 \\
+        --results runs.jsonl --label whisper_tiny --media tests/fixtures/speech.mp3 \\
+        --audio-seconds 6.1 --field model=whisper_tiny --expect "quick brown fox" \\
+        --reference-file tests/fixtures/speech.txt
+    python scripts/bench_client.py report --results runs.jsonl \\
+        --baseline BENCHMARK.md --json output/benchmark.json
+"""
+
+import argparse
+import json
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+import uuid
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Order of the stage-breakdown table (status.STAGES names).
+STAGE_ORDER = ("prepare", "download", "convert", "startup", "load", "transcribe", "save", "translate", "export")
+
+# metric -> (BENCHMARK.md column, absolute floor below which a change is noise)
+COMPARED = {
+    "warm_s": ("warm", 1.0),
+    "rtf": ("rtf", 0.05),
+    "peak_rss_mb": ("peak rss", 64.0),
+    "wer": ("wer", 5.0),
+}
+
+NUMERIC_COLUMNS = {"cold", "warm", "audio", "rtf", "peak rss", "load cold", "load warm", "wer"}
+
+_RSS_LINE = re.compile(r'^txtify_worker_rss_bytes\{job_id="(\d+)"\} (\S+)$', re.M)
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def _get(url: str, timeout: float = 30) -> bytes:
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return response.read()
+
+
+def _post_form(url: str, fields: dict, media: Path = None) -> bytes:
+    boundary = uuid.uuid4().hex
+    body = b"".join(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        for name, value in fields.items()
+    )
+    if media:
+        body += (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="media"; filename="{media.name}"\r\n'
+            f"Content-Type: application/octet-stream\r\n\r\n"
+        ).encode() + media.read_bytes() + b"\r\n"
+    body += f"--{boundary}--\r\n".encode()
+    request = urllib.request.Request(
+        url, data=body, headers={"Content-Type": f"multipart/form-data; boundary={boundary}"}
+    )
+    with urllib.request.urlopen(request, timeout=300) as response:
+        return response.read()
+
+
+def worker_rss(url: str, job_id: int):
+    """The job's worker RSS in bytes from /metrics, or None if it has no live worker."""
+    try:
+        text = _get(f"{url}/metrics", timeout=10).decode()
+    except (OSError, urllib.error.URLError):
+        return None
+    for found, value in _RSS_LINE.findall(text):
+        if int(found) == job_id:
+            return float(value)
+    return None
+
+
+def wer(reference: str, srt: str) -> float:
+    """Word error rate (%) of an SRT's text lines against ``reference``."""
+    # keep only subtitle text lines (drop indices and timestamp lines)
+    text = " ".join(
+        line for line in srt.splitlines()
+        if line.strip() and "-->" not in line and not line.strip().isdigit()
+    )
+
+    def norm(s):
+        return re.sub(r"[^a-z0-9' ]", " ", s.lower()).split()
+
+    ref, hyp = norm(reference), norm(text)
+    d = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        prev, d[0] = d[0], i
+        for j, h in enumerate(hyp, 1):
+            prev, d[j] = d[j], min(d[j] + 1, d[j - 1] + 1, prev + (r != h))
+    return round(100 * d[len(hyp)] / max(1, len(ref)), 1)
+
+
+def _cache_state(command: str):
+    if not command:
+        return None
+    return subprocess.run(command, shell=True, capture_output=True, text=True).stdout
+
+
+def run_job(args) -> dict:
+    """Submit, poll to the end, fetch the preview; returns the run's record."""
+    fields = {"language": "en", "translation": "none", "language_translation": "en"}
+    fields.update(field.split("=", 1) for field in args.field)
+    record = {
+        "label": args.label,
+        "series": args.series,
+        "model": fields.get("model"),
+        "audio_s": args.audio_seconds,
+        "ok": False,
+    }
+    cache_before = _cache_state(args.cache_cmd)
+    started = time.perf_counter()
+    try:
+        job_id = json.loads(_post_form(f"{args.url}/transcribe", fields, args.media))["pid"]
+    except (OSError, urllib.error.URLError, KeyError, ValueError) as e:
+        record["error"] = f"submit failed: {e}"
+        return record
+
+    peak = 0.0
+    job = {}
+    deadline = started + args.timeout
+    while time.perf_counter() < deadline:
+        peak = max(peak, worker_rss(args.url, job_id) or 0.0)
+        try:
+            job = json.loads(_get(f"{args.url}/status?pid={job_id}"))
+        except (OSError, urllib.error.URLError, ValueError):
+            time.sleep(args.poll_interval)
+            continue
+        if job["progress"] in ("100", "0"):  # 0 = error/canceled (status.py)
+            break
+        time.sleep(args.poll_interval)
+    wall = time.perf_counter() - started
+
+    record["job_id"] = job_id
+    record["stages"] = {k: round(v, 2) for k, v in job.get("stages", {}).items()}
+    record["peak_rss_mb"] = round(peak / 1024 / 1024, 1) if peak else None
+    if cache_before is not None:
+        record["cache"] = "warm" if _cache_state(args.cache_cmd) == cache_before else "cold"
+    if job.get("progress") != "100":
+        record["error"] = job.get("phase") or "timed out"
+        return record
+
+    srt = json.loads(_get(f"{args.url}/preview?pid={job_id}"))["srt"]
+    lines = srt.splitlines()
+    audio = args.audio_seconds
+    record.update(
+        ok=True,
+        wall_s=round(wall, 2),
+        rtf=round(wall / audio, 3) if audio else None,
+        transcribe_rtf=round(record["stages"]["transcribe"] / audio, 3)
+        if audio and "transcribe" in record["stages"] else None,
+        text_ok=bool(re.search(args.expect, srt, re.I | re.M)) if args.expect else None,
+        wer=wer(args.reference_file.read_text(), srt) if args.reference_file else None,
+        first_line=lines[2] if len(lines) > 2 else "",
+    )
+    try:
+        urllib.request.urlopen(urllib.request.Request(f"{args.url}/cleanup?pid={job_id}", method="POST"))
+    except (OSError, urllib.error.URLError):
+        pass
+    return record
+
+
+def summarize(records: list) -> dict:
+    """One row per label: cold = a run that filled the model cache, warm = median of the rest."""
+    rows = {}
+    for record in records:
+        rows.setdefault(record["label"], []).append(record)
+    summary = {}
+    for label, runs in rows.items():
+        done = [r for r in runs if r["ok"]]
+        cold = [r for r in done if r.get("cache") == "cold"]
+        warm = [r for r in done if r.get("cache") != "cold"]
+        last = (warm or done or runs)[-1]
+
+        def median(key, of):
+            values = [r[key] for r in of if r.get(key) is not None]
+            return round(statistics.median(values), 3) if values else None
+
+        def median_stage(stage, of):
+            values = [r["stages"][stage] for r in of if stage in r.get("stages", {})]
+            return round(statistics.median(values), 2) if values else None
+
+        summary[label] = {
+            "runs": len(runs),
+            "failed": len(runs) - len(done),
+            "error": None if done else last.get("error"),
+            "cold_s": cold[0]["wall_s"] if cold else None,
+            "warm_s": median("wall_s", warm),
+            "audio_s": last.get("audio_s"),
+            "rtf": median("rtf", warm),
+            "transcribe_rtf": median("transcribe_rtf", warm),
+            "peak_rss_mb": max((r["peak_rss_mb"] for r in done if r.get("peak_rss_mb")), default=None),
+            "load_cold_s": median_stage("load", cold),
+            "load_warm_s": median_stage("load", warm),
+            "stages": {s: median_stage(s, warm or done) for s in STAGE_ORDER if median_stage(s, warm or done) is not None},
+            "text_ok": all(r.get("text_ok") is not False for r in done) if done else None,
+            "wer": median("wer", done),
+            "first_line": last.get("first_line", ""),
+        }
+    return summary
+
+
+def _fmt(value, unit="") -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return f"{value}{unit}"
+
+
+def markdown(summary: dict) -> str:
+    """The BENCHMARK.md tables: one row per run, then the stage breakdown."""
+    out = [
+        "| run | cold | warm | audio | RTF | peak RSS | load cold | load warm | text ok | WER | first transcribed line |",
+        "|-----|------|------|-------|-----|----------|-----------|-----------|---------|-----|------------------------|",
+    ]
+    for label, row in summary.items():
+        if row["error"]:
+            out.append(f"| {label} | FAILED | - | - | - | - | - | - | - | - | {row['error']} |")
+            continue
+        ok = {True: "yes", False: "NO", None: "-"}[row["text_ok"]]
+        out.append(
+            f"| {label} | {_fmt(row['cold_s'], 's')} | {_fmt(row['warm_s'], 's')} | "
+            f"{_fmt(row['audio_s'], 's')} | {_fmt(row['rtf'])} | {_fmt(row['peak_rss_mb'], ' MiB')} | "
+            f"{_fmt(row['load_cold_s'], 's')} | {_fmt(row['load_warm_s'], 's')} | {ok} | "
+            f"{_fmt(row['wer'], '%')} | {row['first_line']} |"
+        )
+    stages = [s for s in STAGE_ORDER if any(s in row["stages"] for row in summary.values())]
+    out += [
+        "",
+        "Stage breakdown (seconds, warm runs):",
+        "",
+        "| run | " + " | ".join(stages) + " |",
+        "|-----|" + "|".join("-" * (len(s) + 2) for s in stages) + "|",
+    ]
+    for label, row in summary.items():
+        if not row["error"]:
+            out.append(f"| {label} | " + " | ".join(_fmt(row["stages"].get(s)) for s in stages) + " |")
+    return "\n".join(out)
+
+
+def curves(records: list) -> dict:
+    """Throughput per series (model) over fixture length: {series: [points by length]}."""
+    found = {}
+    for record in records:
+        found.setdefault(record["series"], []).append({
+            "audio_s": record.get("audio_s"),
+            "wall_s": record.get("wall_s"),
+            "rtf": record.get("rtf"),
+            "transcribe_rtf": record.get("transcribe_rtf"),
+            "peak_rss_mb": record.get("peak_rss_mb"),
+            "wer": record.get("wer"),
+            "error": None if record["ok"] else record.get("error"),
+        })
+    return {name: sorted(points, key=lambda p: p["audio_s"] or 0) for name, points in found.items()}
+
+
+def curves_markdown(series: dict) -> str:
+    """RTF per model and fixture length, with audio seconds per wall second."""
+    lengths = sorted({p["audio_s"] for points in series.values() for p in points if p["audio_s"]})
+    out = [
+        "Throughput by length (RTF; audio seconds per wall second):",
+        "",
+        "| model | " + " | ".join(f"{_fmt(round(s / 60, 1))} min" for s in lengths) + " |",
+        "|-------|" + "|".join("-----" for _ in lengths) + "|",
+    ]
+    for name, points in series.items():
+        cells = []
+        for length in lengths:
+            point = next((p for p in points if p["audio_s"] == length), None)
+            if point is None:
+                cells.append("-")
+            elif point["error"] or not point["rtf"]:
+                cells.append("FAILED")
+            else:
+                cells.append(f"{point['rtf']} ({round(1 / point['rtf'], 1)}x)")
+        out.append(f"| {name} | " + " | ".join(cells) + " |")
+    return "\n".join(out)
+
+
+def parse_baseline(text: str) -> dict:
+    """
+    The newest table in BENCHMARK.md (the first one under a ``## `` heading),
+    as {run: {column: number}} for the numeric columns. Columns are matched
+    by header name, so older baselines with fewer columns still compare on
+    the ones they have.
+    """
+    section = text.split("\n## ", 1)[1] if "\n## " in text else text
+    rows = {}
+    header = None
+    for line in section.splitlines():
+        if line.startswith("## "):
+            break
+        if not line.startswith("|"):
+            if header and rows:
+                break
+            continue
+        cells = [c.strip() for c in line.strip().strip("|").split("|")]
+        if header is None:
+            header = [c.lower() for c in cells]
+        elif not set(cells[0]) <= set("-: "):
+            values = {}
+            for name, cell in zip(header[1:], cells[1:]):
+                if name not in NUMERIC_COLUMNS:
+                    continue
+                number = _NUMBER.search(cell)
+                if number and not cell.upper().startswith(("OOM", "FAILED")):
+                    values[name] = float(number.group())
+            rows[cells[0]] = values
+    return rows
+
+
+def compare(summary: dict, baseline: dict, threshold: float) -> list:
+    """Regressions as (run, metric, baseline, now) where now is worse by both bounds."""
+    found = []
+    for label, row in summary.items():
+        old = baseline.get(label, {})
+        for metric, (column, floor) in COMPARED.items():
+            now, before = row.get(metric), old.get(column)
+            if now is None or before is None:
+                continue
+            if now - before > floor and now > before * (1 + threshold):
+                found.append((label, metric, before, now))
+    return found
+
+
+def report(args) -> int:
+    lines = Path(args.results).read_text().splitlines() if Path(args.results).exists() else []
+    records = [json.loads(line) for line in lines if line.strip()]
+    summary = summarize([r for r in records if not r.get("series")])
+    series = curves([r for r in records if r.get("series")])
+    print(markdown(summary))
+    if series:
+        print("\n" + curves_markdown(series))
+
+    regressions = []
+    if args.baseline and Path(args.baseline).exists():
+        regressions = compare(summary, parse_baseline(Path(args.baseline).read_text()), args.threshold)
+        print(f"\nAgainst {args.baseline} (threshold {args.threshold:.0%}):")
+        for label, metric, before, now in regressions:
+            print(f"  REGRESSION {label}: {metric} {_fmt(before)} -> {_fmt(now)}")
+        if not regressions:
+            print("  no regressions")
+
+    if args.json:
+        version = subprocess.run(
+            ["git", "describe", "--always", "--dirty"], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip()
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.json).write_text(json.dumps({
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "version": version,
+                "host": platform.platform(),
+                "baseline": args.baseline,
+                "threshold": args.threshold,
+            },
+            "summary": summary,
+            "curves": series,
+            "runs": records,
+            "regressions": [
+                {"run": label, "metric": metric, "baseline": before, "now": now}
+                for label, metric, before, now in regressions
+            ],
+        }, indent=2, ensure_ascii=False))
+        print(f"\nresults written to {args.json}")
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    job = commands.add_parser("job", help="run one job and append its record")
+    job.add_argument("--url", required=True)
+    job.add_argument("--results", required=True, help="JSON-lines file to append to")
+    job.add_argument("--label", required=True)
+    job.add_argument("--media", type=Path, help="file to upload (else pass youtube_url=...)")
+    job.add_argument("--field", action="append", default=[], help="form field name=value")
+    job.add_argument("--audio-seconds", type=float, help="media duration, for the RTF")
+    job.add_argument("--expect", help="regex the SRT must match (case-insensitive)")
+    job.add_argument("--reference-file", type=Path, help="reference text for the WER")
+    job.add_argument("--series", help="curve this run belongs to (long fixtures)")
+    job.add_argument("--cache-cmd", help="shell command listing the model cache (cold/warm)")
+    job.add_argument("--poll-interval", type=float, default=1.0)
+    job.add_argument("--timeout", type=float, default=1800.0)
+
+    rep = commands.add_parser("report", help="print tables, write JSON, diff the baseline")
+    rep.add_argument("--results", required=True)
+    rep.add_argument("--baseline", help="BENCHMARK.md")
+    rep.add_argument("--threshold", type=float, default=0.25, help="relative regression bound")
+    rep.add_argument("--json", help="write the full run here")
+
+    args = parser.parse_args()
+    if args.command == "report":
+        return report(args)
+
+    record = run_job(args)
+    with open(args.results, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    if record["ok"]:
+        print(
+            f"    {record['wall_s']}s wall, RTF {_fmt(record['rtf'])}, "
+            f"peak RSS {_fmt(record['peak_rss_mb'], ' MiB')}, cache {record.get('cache', '?')}"
+        )
+        return 0
+    print(f"    job {record.get('job_id', '?')} failed: {record.get('error')}", file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
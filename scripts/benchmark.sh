@@ -1,18 +1,36 @@
 #!/usr/bin/env bash
 # Benchmark every Whisper model (and the DeepL translation path) against the
-# real Docker image, using the committed speech fixture. Prints a markdown
-# table; run before releases and compare with BENCHMARK.md.
+# real Docker image, using the committed speech fixture. Prints the markdown
+# tables BENCHMARK.md keeps, writes every run to a JSON file and flags
+# regressions against the newest BENCHMARK.md table; run before releases.
 #
 # Usage:
 #   ./scripts/benchmark.sh                 # all five models
 #   ./scripts/benchmark.sh whisper_tiny whisper_base
 #   BENCH_YOUTUBE=1 ./scripts/benchmark.sh # also benchmark the YouTube path
+#   BENCH_COLD=1 ./scripts/benchmark.sh    # empty the model cache first
+#   BENCH_LENGTHS="1 10 60" ./scripts/benchmark.sh  # throughput curves (minutes)
 #
 # Notes:
 # - Whisper models are cached in the named docker volume `txtify-bench-cache`,
 #   so the first run per model includes the download; later runs measure
-#   inference only.
-# - The translation row needs DEEPL_API_KEY in .env (skipped otherwise).
+#   inference only. Each model runs BENCH_RUNS times (default 2); a run that
+#   filled the cache is reported as cold, the others as warm.
+# - Measuring is scripts/bench_client.py: per run it records wall time, audio
+#   duration, real-time factor (wall / audio), per-stage seconds from /status,
+#   and the worker's peak RSS sampled from /metrics once a second.
+# - Results go to BENCH_JSON (default output/benchmark.json). A warm time,
+#   RTF, peak RSS or WER worse than the baseline by more than BENCH_THRESHOLD
+#   (default 0.25) is flagged as a regression and the script exits 1.
+# - Throughput curves: after the fixture runs, each model transcribes the
+#   long fixtures from scripts/make_fixtures.py (the speech looped with
+#   silences, generated inside the image) once per BENCH_LENGTHS minutes
+#   (default "1 10"; 60 min on CPU takes hours for the larger models). Set
+#   BENCH_LENGTHS="" to skip.
+# - The translation row calls the real DeepL API when .env has DEEPL_API_KEY,
+#   otherwise the bundled stand-in (scripts/deepl_mock.py) inside the
+#   container — offline, deterministic, with BENCH_DEEPL_LATENCY seconds per
+#   request (default 0.2). Force either with BENCH_DEEPL=real|mock.
 set -uo pipefail
 
 PORT="${BENCH_PORT:-8091}"
@@ -20,105 +38,86 @@ BASE="http://127.0.0.1:${PORT}"
 IMAGE=txtify:bench
 NAME=txtify_bench
 FIXTURE=tests/fixtures/speech.mp3
+RUNS="${BENCH_RUNS:-2}"
+RESULTS_JSON="${BENCH_JSON:-output/benchmark.json}"
+RESULTS=$(mktemp)
 EXPECT="quick brown fox"
-REFERENCE="the quick brown fox jumps over the lazy dog welcome to txtify your transcription assistant"
+REFERENCE=tests/fixtures/speech.txt
+GENERATED=tests/fixtures/generated
+LENGTHS="${BENCH_LENGTHS-1 10}"
 if [ "$#" -gt 0 ]; then MODELS=("$@"); else
   MODELS=(whisper_tiny whisper_base whisper_small whisper_medium whisper_large)
 fi
-trap 'docker rm -f $NAME >/dev/null 2>&1 || true' EXIT
+if [ -z "${BENCH_DEEPL:-}" ]; then
+  if /usr/bin/grep -qE '^DEEPL_API_KEY=..' .env 2>/dev/null; then BENCH_DEEPL=real; else BENCH_DEEPL=mock; fi
+fi
+MOCK_ENV=()
+[ "$BENCH_DEEPL" = "mock" ] && MOCK_ENV=(-e DEEPL_API_KEY=mock -e DEEPL_SERVER_URL=http://127.0.0.1:8099)
+trap 'docker rm -f $NAME >/dev/null 2>&1 || true; rm -f "$RESULTS"' EXIT
 
 echo "==> Building image"
 docker build -q -t $IMAGE . >/dev/null
 
+if [ -n "$LENGTHS" ]; then
+  echo "==> Generating ${LENGTHS// /, } min fixtures"
+  docker run --rm --user "$(id -u):$(id -g)" -v "$PWD:/work" -w /work --entrypoint python \
+    $IMAGE scripts/make_fixtures.py --minutes $LENGTHS
+fi
+
+[ "${BENCH_COLD:-0}" = "1" ] && docker volume rm txtify-bench-cache >/dev/null 2>&1
 echo "==> Starting container (model cache volume: txtify-bench-cache)"
 docker rm -f $NAME >/dev/null 2>&1 || true
 docker run -d --rm --name $NAME -p "${PORT}:8011" \
-  --env-file .env -v txtify-bench-cache:/root/.cache $IMAGE >/dev/null
+  --env-file .env ${MOCK_ENV[@]+"${MOCK_ENV[@]}"} -v txtify-bench-cache:/root/.cache $IMAGE >/dev/null
 for _ in $(seq 1 30); do curl -sf "$BASE/health" >/dev/null && break; sleep 2; done
+if [ "$BENCH_DEEPL" = "mock" ]; then
+  docker exec -d $NAME python scripts/deepl_mock.py --port 8099 \
+    --latency "${BENCH_DEEPL_LATENCY:-0.2}"
+fi
 
-submit_and_wait() {  # args: extra curl -F options...; sets DUR and SRT
-  local start end job progress
-  start=$(date +%s)
-  job=$(curl -sf -X POST "$BASE/transcribe" "$@" \
-    | python3 -c 'import json,sys; print(json.load(sys.stdin)["pid"])') || return 1
-  for _ in $(seq 1 360); do   # up to 30 min (large on CPU is slow)
-    progress=$(curl -sf "$BASE/status?pid=$job" | python3 -c 'import json,sys; print(json.load(sys.stdin)["progress"])' || echo "")
-    [ "$progress" = "100" ] && break
-    [ "$progress" = "0" ] && { echo "    job $job errored:" >&2; docker exec $NAME tail -5 "output/${job}_logs.txt" >&2 || true; return 1; }
-    sleep 5
-  done
-  [ "$progress" = "100" ] || return 1
-  end=$(date +%s)
-  DUR=$((end - start))
-  SRT=$(curl -sf "$BASE/preview?pid=$job" | python3 -c 'import json,sys; print(json.load(sys.stdin)["srt"])')
-  curl -sf -X POST "$BASE/cleanup?pid=$job" >/dev/null || true
-}
+# Listing of the model cache; it changes only when a run downloads a model.
+CACHE_CMD="docker exec $NAME sh -c 'ls -lR /root/.cache 2>/dev/null'"
+AUDIO=$(docker exec -i $NAME ffprobe -v error -show_entries format=duration \
+  -of csv=p=0 -i pipe:0 < "$FIXTURE")
 
-wer() {  # word error rate (%) of SRT $1's text lines vs $REFERENCE
-  python3 - "$REFERENCE" "$1" <<'PY'
-import re, sys
-# keep only subtitle text lines (drop indices and timestamp lines)
-text = " ".join(
-    l for l in sys.argv[2].splitlines()
-    if l.strip() and "-->" not in l and not l.strip().isdigit()
-)
-norm = lambda s: re.sub(r"[^a-z0-9' ]", " ", s.lower()).split()
-ref, hyp = norm(sys.argv[1]), norm(text)
-d = list(range(len(hyp) + 1))
-for i, r in enumerate(ref, 1):
-    prev, d[0] = d[0], i
-    for j, h in enumerate(hyp, 1):
-        prev, d[j] = d[j], min(d[j] + 1, d[j - 1] + 1, prev + (r != h))
-print(f"{100 * d[len(hyp)] / max(1, len(ref)):.0f}%")
-PY
+run() {  # args: label, then bench_client.py job options
+  local label="$1"; shift
+  python3 scripts/bench_client.py job --url "$BASE" --results "$RESULTS" \
+    --label "$label" --cache-cmd "$CACHE_CMD" "$@" \
+    || { echo "    last log lines:" >&2; docker exec $NAME sh -c 'tail -5 output/jobs/*/*/logs.txt' >&2 || true; }
 }
 
-ROWS=""
 for model in "${MODELS[@]}"; do
-  echo "==> $model"
-  if submit_and_wait -F media=@"$FIXTURE" -F language=en -F "model=$model" \
-       -F translation=none -F language_translation=en; then
-    line=$(printf '%s\n' "$SRT" | sed -n 3p)
-    if printf '%s' "$SRT" | tr '[:upper:]' '[:lower:]' | /usr/bin/grep -q "$EXPECT"; then ok="yes"; else ok="NO"; fi
-    W=$(wer "$SRT")
-    ROWS="$ROWS| $model | ${DUR}s | $ok | $W | $line |
-"
-  else
-    ROWS="$ROWS| $model | FAILED | - | - | - |
-"
-  fi
+  for i in $(seq 1 "$RUNS"); do
+    echo "==> $model ($i/$RUNS)"
+    run "$model" --media "$FIXTURE" --audio-seconds "$AUDIO" --field "model=$model" \
+      --expect "$EXPECT" --reference-file "$REFERENCE"
+  done
 done
 
-if /usr/bin/grep -qE '^DEEPL_API_KEY=..' .env 2>/dev/null; then
-  echo "==> translation (whisper_base, en -> el via DeepL)"
-  if submit_and_wait -F media=@"$FIXTURE" -F language=en -F model=whisper_base \
-       -F translation=deepl -F language_translation=EL; then
-    line=$(printf '%s\n' "$SRT" | sed -n 3p)
-    if printf '%s' "$SRT" | /usr/bin/grep -q '[α-ωΑ-Ω]'; then ok="yes"; else ok="NO"; fi
-    ROWS="$ROWS| deepl en→el (base) | ${DUR}s | $ok | - | $line |
-"
-  else
-    ROWS="$ROWS| deepl en→el (base) | FAILED | - | - | - |
-"
-  fi
-else
-  echo "==> translation skipped (no DEEPL_API_KEY in .env)"
-fi
+# Long fixtures last: every model is cached by now, so these are warm.
+for model in "${MODELS[@]}"; do
+  for minutes in $LENGTHS; do
+    echo "==> $model, ${minutes} min"
+    run "$model @ ${minutes} min" --series "$model" --media "$GENERATED/speech_${minutes}min.mp3" \
+      --audio-seconds $((minutes * 60)) --field "model=$model" --timeout $((minutes * 60 * 10 + 600)) \
+      --reference-file "$GENERATED/speech_${minutes}min.txt"
+  done
+done
+
+echo "==> translation (whisper_base, en -> el via DeepL, $BENCH_DEEPL)"
+# Real DeepL: Greek by character class. Mock: its deterministic "[EL] " tag.
+if [ "$BENCH_DEEPL" = "mock" ]; then pattern='^\[EL\] '; else pattern='[α-ωΑ-Ω]'; fi
+run "deepl en→el (base, $BENCH_DEEPL)" --media "$FIXTURE" --audio-seconds "$AUDIO" \
+  --field model=whisper_base --field translation=deepl --field language_translation=EL \
+  --expect "$pattern"
 
 if [ "${BENCH_YOUTUBE:-0}" = "1" ]; then
   echo "==> youtube path (whisper_tiny, 19s video)"
-  if submit_and_wait -F "youtube_url=https://www.youtube.com/watch?v=jNQXAC9IVRw" \
-       -F language=en -F model=whisper_tiny -F translation=none -F language_translation=en; then
-    line=$(printf '%s\n' "$SRT" | sed -n 3p)
-    ROWS="$ROWS| youtube (tiny) | ${DUR}s | yes | - | $line |
-"
-  else
-    ROWS="$ROWS| youtube (tiny) | FAILED | - | - | - |
-"
-  fi
+  run "youtube (tiny)" --audio-seconds 19 --field model=whisper_tiny \
+    --field "youtube_url=https://www.youtube.com/watch?v=jNQXAC9IVRw"
 fi
 
 echo
-echo "| run | wall time | text ok | WER | first transcribed line |"
-echo "|-----|-----------|---------|-----|------------------------|"
-printf '%s' "$ROWS"
+python3 scripts/bench_client.py report --results "$RESULTS" --baseline BENCHMARK.md \
+  --threshold "${BENCH_THRESHOLD:-0.25}" --json "$RESULTS_JSON"
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the DeepL API, for offline translation tests and
+benchmarks. Point the app at it with DEEPL_SERVER_URL (any DEEPL_API_KEY
+works):
+
+    python scripts/deepl_mock.py --port 8099 --latency 0.2 --rate-limit 5
+    DEEPL_SERVER_URL=http://127.0.0.1:8099 DEEPL_API_KEY=mock ...
+
+Serves what the app and deepl.Translator use — ``POST /v2/translate`` and
+``GET /v2/usage`` — plus ``GET /mock/stats`` (requests/texts/characters and
+responses by status). Translations are deterministic: ``[EL] original text``
+for target EL, so tests can assert exact output and 1:1 segment alignment.
+
+Failure modes, all optional:
+  * ``--latency`` / ``--latency-per-char``: delay before each response
+  * ``--rate-limit``: requests per second (token bucket, burst of one second);
+    over the limit gets 429, like the real API under load
+  * ``--error-rate``: fraction of requests answered 503 (seeded, so a run is
+    reproducible with the same ``--seed``)
+  * ``--quota``: character quota; once used up, 456 Quota Exceeded
+
+Only the standard library, so it runs anywhere the app does (including inside
+the Docker image: ``docker exec -d <container> python scripts/deepl_mock.py``).
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+def mock_translate(text: str, target_lang: str) -> str:
+    """The mock's deterministic 'translation'."""
+    return f"[{target_lang.upper()}] {text}"
+
+
+class DeepLMock(ThreadingHTTPServer):
+    """The mock server; configuration and counters are plain attributes."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address=("127.0.0.1", 0),
+        latency: float = 0.0,
+        latency_per_char: float = 0.0,
+        rate_limit: float = 0.0,
+        error_rate: float = 0.0,
+        quota: int = 0,
+        seed: int = 0,
+    ):
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.latency_per_char = latency_per_char
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.quota = quota
+        self.stats = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = rate_limit
+        self._refilled = time.monotonic()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def admit(self, chars: int) -> int:
+        """Decide a request's fate up front. Returns the HTTP status to send."""
+        with self._lock:
+            self.stats["requests"] += 1
+            if self.rate_limit:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.rate_limit,
+                    self._tokens + (now - self._refilled) * self.rate_limit,
+                )
+                self._refilled = now
+                if self._tokens < 1:
+                    return 429
+                self._tokens -= 1
+            if self.error_rate and self._random.random() < self.error_rate:
+                return 503
+            if self.quota and self.stats["characters"] + chars > self.quota:
+                return 456
+            self.stats["characters"] += chars
+            return 200
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+    def log_message(self, format, *args):  # quiet: tests and benchmarks
+        pass
+
+    def _send(self, code: int, body: dict) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        with self.server._lock:
+            self.server.stats[f"status_{code}"] += 1
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _params(self) -> dict:
+        raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.headers.get("Content-Type", "").startswith("application/json"):
+            return json.loads(raw or b"{}")
+        return {k: v if len(v) > 1 else v[0] for k, v in parse_qs(raw.decode()).items()}
+
+    def _authorized(self) -> bool:
+        if self.headers.get("Authorization", "").startswith("DeepL-Auth-Key "):
+            return True
+        self._send(403, {"message": "Invalid auth key"})
+        return False
+
+    def do_GET(self):
+        if self.path == "/mock/stats":
+            with self.server._lock:
+                stats = dict(self.server.stats)
+            return self._send(200, stats)
+        if not self._authorized():
+            return
+        if self.path.startswith("/v2/usage"):
+            return self._send(
+                200,
+                {
+                    "character_count": self.server.stats["characters"],
+                    "character_limit": self.server.quota or 10**12,
+                },
+            )
+        self._send(404, {"message": "Not found"})
+
+    def do_POST(self):
+        params = self._params()
+        if not self._authorized():
+            return
+        if self.path != "/v2/translate":
+            return self._send(404, {"message": "Not found"})
+
+        texts = params.get("text") or []
+        texts = [texts] if isinstance(texts, str) else texts
+        target = params.get("target_lang")
+        if not texts or not target:
+            return self._send(400, {"message": "Parameter 'text' and 'target_lang' required"})
+        chars = sum(len(text) for text in texts)
+
+        delay = self.server.latency + self.server.latency_per_char * chars
+        if delay:
+            time.sleep(delay)
+        code = self.server.admit(chars)
+        if code != 200:
+            messages = {429: "Too many requests", 456: "Quota exceeded", 503: "Service unavailable"}
+            return self._send(code, {"message": messages[code]})
+
+        with self.server._lock:
+            self.server.stats["texts"] += len(texts)
+        source = (params.get("source_lang") or "EN").upper()
+        self._send(
+            200,
+            {
+                "translations": [
+                    {
+                        "detected_source_language": source,
+                        "text": mock_translate(text, target),
+                        "billed_characters": len(text),
+                    }
+                    for text in texts
+                ]
+            },
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per request")
+    parser.add_argument("--latency-per-char", type=float, default=0.0, help="extra seconds per character")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="requests/second (0 = unlimited)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 503")
+    parser.add_argument("--quota", type=int, default=0, help="character quota (0 = unlimited)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = DeepLMock(
+        (args.host, args.port),
+        latency=args.latency,
+        latency_per_char=args.latency_per_char,
+        rate_limit=args.rate_limit,
+        error_rate=args.error_rate,
+        quota=args.quota,
+        seed=args.seed,
+    )
+    print(f"DeepL mock listening on {server.url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
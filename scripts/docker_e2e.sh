@@ -54,7 +54,7 @@ for _ in $(seq 1 120); do
   PROGRESS=$(curl -sf "$BASE/status?pid=$JOB" | python3 -c 'import json,sys; print(json.load(sys.stdin)["progress"])')
   echo "    progress: $PROGRESS"
   [ "$PROGRESS" = "100" ] && break
-  [ "$PROGRESS" = "0" ] && { echo "FAIL: job errored"; docker exec $NAME cat "output/${JOB}_logs.txt" 2>/dev/null | tail -20; exit 1; }
+  [ "$PROGRESS" = "0" ] && { echo "FAIL: job errored"; docker exec $NAME cat "output/jobs/$(printf %02x $((JOB % 256)))/${JOB}/logs.txt" 2>/dev/null | tail -20; exit 1; }
   sleep 5
 done
 [ "$PROGRESS" = "100" ] || { echo "FAIL: timed out"; exit 1; }
@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Load test for the web tier: N simulated users each run the real flow —
+upload → poll /status → /preview → /download — against a local server, and
+the run reports latency percentiles per route, error rates, job turnaround and
+the server's memory. Meant for the fake Whisper backend (WHISPER_BACKEND=fake,
+see src/fake_whisper.py), so the numbers are our own overhead, not the model's:
+
+    # start a fake-backend server on a free port, test it, stop it
+    python scripts/load_test.py --spawn --clients 20 --jobs 3
+
+    # or point it at a server you started (pass its pid for RSS)
+    python scripts/load_test.py --url http://127.0.0.1:8011 --server-pid 1234
+
+    # save the report, and compare a later run against it
+    python scripts/load_test.py --spawn --json baseline.json
+    python scripts/load_test.py --spawn --compare baseline.json
+
+Clients poll /status every --poll-interval seconds (the UI uses 3). A 429
+from /transcribe (MAX_CONCURRENT_JOBS reached) is the server's normal
+backpressure: the client waits and resubmits, and it is counted as "busy",
+not as an error; any other failed submit counts as a failed job. Jobs the run
+created are deleted afterwards through /history/delete unless --keep-jobs is
+given. A --spawn server keeps its jobs and database in a temp OUTPUT_DIR,
+never in output/; it is removed after the run unless --keep-jobs is given.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import socket
+import statistics
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import psutil
+
+ROOT = Path(__file__).resolve().parent.parent
+ROUTES = ("/transcribe", "/status", "/preview", "/download")
+
+
+class Stats:
+    """Everything the clients measure; shared by all client threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)  # route -> seconds
+        self.statuses = defaultdict(Counter)  # route -> {status: count}
+        self.busy = 0
+        self.jobs = []  # submit -> downloaded, seconds
+        self.failed_jobs = 0
+        self.job_ids = []
+
+    def request(self, route: str, status, seconds: float) -> None:
+        with self.lock:
+            self.latencies[route].append(seconds)
+            self.statuses[route][str(status)] += 1
+
+
+class Client:
+    """One simulated user on its own keep-alive connection."""
+
+    def __init__(self, url: str, stats: Stats, timeout: float):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.stats = stats
+        self.timeout = timeout
+        self.conn = None
+
+    def call(self, method: str, path: str, route: str, body=None, headers=None):
+        """Send one request; returns (status, body), status None on a network error."""
+        started = time.perf_counter()
+        try:
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self.conn.request(method, path, body=body, headers=headers or {})
+            response = self.conn.getresponse()
+            data = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            self.conn = None
+            status, data = None, b""
+        self.stats.request(route, status if status is not None else "error", time.perf_counter() - started)
+        return status, data
+
+    def submit(self, media: bytes, args):
+        """Upload until accepted; returns the job id, or None if it failed."""
+        boundary = uuid.uuid4().hex
+        fields = {
+            "language": "en",
+            "model": args.model,
+            "translation": "none",
+            "language_translation": "en",
+        }
+        body = b"".join(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+            for name, value in fields.items()
+        )
+        body += (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="media"; filename="load.mp3"\r\n'
+            f"Content-Type: audio/mpeg\r\n\r\n"
+        ).encode() + media + f"\r\n--{boundary}--\r\n".encode()
+        headers = {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+        while True:
+            status, data = self.call("POST", "/transcribe", "/transcribe", body, headers)
+            if status != 429:
+                try:
+                    return json.loads(data)["pid"] if status == 200 else None
+                except (ValueError, KeyError):  # a 200 without a job
+                    return None
+            with self.stats.lock:
+                self.stats.busy += 1
+            time.sleep(args.poll_interval)
+
+    def run(self, media: bytes, args) -> None:
+        for _ in range(args.jobs):
+            submitted = time.perf_counter()
+            job_id = self.submit(media, args)
+            if job_id is None:  # rejected (400/500) or no response
+                with self.stats.lock:
+                    self.stats.failed_jobs += 1
+                continue
+            with self.stats.lock:
+                self.stats.job_ids.append(job_id)
+            done = False
+            while time.perf_counter() - submitted < args.job_timeout:
+                time.sleep(args.poll_interval)
+                status, data = self.call("GET", f"/status?pid={job_id}", "/status")
+                if status != 200:
+                    continue
+                job = json.loads(data)
+                if "Error" in job["phase"] or job["phase"] == "Canceled":
+                    break
+                if int(job["progress"]) >= 100:
+                    done = True
+                    break
+            if not done:
+                with self.stats.lock:
+                    self.stats.failed_jobs += 1
+                continue
+            self.call("GET", f"/preview?pid={job_id}", "/preview")
+            self.call("GET", f"/download?pid={job_id}", "/download")
+            with self.stats.lock:
+                self.stats.jobs.append(time.perf_counter() - submitted)
+
+
+class RssSampler(threading.Thread):
+    """Samples the server's RSS, and its worker subprocesses' combined RSS."""
+
+    def __init__(self, pid: int, interval: float = 0.25):
+        super().__init__(daemon=True)
+        self.process = psutil.Process(pid)
+        self.interval = interval
+        self.web = []
+        self.workers = []
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            try:
+                self.web.append(self.process.memory_info().rss)
+                total = 0
+                for child in self.process.children(recursive=True):
+                    try:
+                        total += child.memory_info().rss
+                    except psutil.NoSuchProcess:
+                        pass
+                self.workers.append(total)
+            except psutil.NoSuchProcess:
+                return
+
+
+def percentiles(values: list) -> dict:
+    if not values:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    cuts = statistics.quantiles(values, n=100, method="inclusive") if len(values) > 1 else values * 99
+    return {
+        "p50_ms": round(cuts[49] * 1000, 2),
+        "p95_ms": round(cuts[94] * 1000, 2),
+        "p99_ms": round(cuts[98] * 1000, 2),
+        "max_ms": round(max(values) * 1000, 2),
+    }
+
+
+def spawn_server(args) -> tuple:
+    """
+    Start uvicorn on a free port with the fake backend, its OUTPUT_DIR in a
+    temp dir; returns (process, url, output dir).
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    output_dir = tempfile.mkdtemp(prefix="txtify-load-")
+    env = {
+        **os.environ,
+        "WHISPER_BACKEND": "fake",
+        "FAKE_WHISPER_RTF": str(args.rtf),
+        "FAKE_WHISPER_AUDIO_SECONDS": str(args.audio_seconds),
+        "MAX_CONCURRENT_JOBS": str(args.max_jobs or args.clients),
+        "OUTPUT_DIR": output_dir,
+        "PROMETHEUS_MULTIPROC_DIR": str(Path(output_dir) / "metrics"),
+    }
+    log_path = Path(output_dir) / "load_test_server.log"
+    log = open(log_path, "w")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT / "src",
+        env=env,
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+    log.close()
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            http.client.HTTPConnection("127.0.0.1", port, timeout=1).request("GET", "/health")
+            return server, url, output_dir
+        except OSError:
+            if server.poll() is not None:
+                break
+            time.sleep(0.2)
+    server.kill()
+    sys.exit(f"server did not start; see {log_path}")
+
+
+def git_version() -> str:
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        return ""
+
+
+def build_report(args, stats: Stats, sampler, elapsed: float) -> dict:
+    routes = {}
+    for route in ROUTES:
+        counts = stats.statuses[route]
+        requests = sum(counts.values())
+        errors = sum(n for status, n in counts.items() if not status.startswith(("2", "3")) and status != "429")
+        routes[route] = {
+            "requests": requests,
+            "errors": errors,
+            "error_rate": round(errors / requests, 4) if requests else 0.0,
+            "statuses": dict(counts),
+            **percentiles(stats.latencies[route]),
+        }
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "version": git_version(),
+            "python": platform.python_version(),
+            "clients": args.clients,
+            "jobs_per_client": args.jobs,
+            "poll_interval": args.poll_interval,
+            "media_bytes": args.media_bytes,
+            "spawned": args.spawn,
+            "fake_rtf": args.rtf if args.spawn else None,
+            "fake_audio_seconds": args.audio_seconds if args.spawn else None,
+            "elapsed_s": round(elapsed, 2),
+        },
+        "routes": routes,
+        "jobs": {
+            "completed": len(stats.jobs),
+            "failed": stats.failed_jobs,
+            "busy_retries": stats.busy,
+            "throughput_per_min": round(len(stats.jobs) / elapsed * 60, 2) if elapsed else 0.0,
+            "turnaround_p50_s": round(statistics.median(stats.jobs), 2) if stats.jobs else None,
+            "turnaround_max_s": round(max(stats.jobs), 2) if stats.jobs else None,
+        },
+    }
+    if sampler and sampler.web:
+        mib = 1024 * 1024
+        report["server_rss_mb"] = {
+            "web_peak": round(max(sampler.web) / mib, 1),
+            "web_mean": round(statistics.mean(sampler.web) / mib, 1),
+            "workers_peak": round(max(sampler.workers) / mib, 1),
+        }
+    return report
+
+
+def print_report(report: dict, baseline: dict = None) -> None:
+    def delta(new, old):
+        if new is None or old in (None, 0):
+            return ""
+        return f" ({(new - old) / old:+.0%})"
+
+    meta = report["meta"]
+    print(
+        f"\n{meta['clients']} clients x {meta['jobs_per_client']} jobs, "
+        f"{meta['elapsed_s']}s, version {meta['version'] or '?'}"
+    )
+    print(f"{'route':<12} {'requests':>8} {'errors':>7} {'p50 ms':>9} {'p95 ms':>16} {'p99 ms':>9}")
+    for route, row in report["routes"].items():
+        old = (baseline or {}).get("routes", {}).get(route, {})
+        print(
+            f"{route:<12} {row['requests']:>8} {row['error_rate']:>7.1%} "
+            f"{row['p50_ms'] or '-':>9} {str(row['p95_ms'] or '-') + delta(row['p95_ms'], old.get('p95_ms')):>16} "
+            f"{row['p99_ms'] or '-':>9}"
+        )
+    jobs = report["jobs"]
+    print(
+        f"jobs: {jobs['completed']} completed, {jobs['failed']} failed, "
+        f"{jobs['busy_retries']} busy retries, {jobs['throughput_per_min']}/min, "
+        f"turnaround p50 {jobs['turnaround_p50_s']}s"
+    )
+    if "server_rss_mb" in report:
+        rss = report["server_rss_mb"]
+        old = (baseline or {}).get("server_rss_mb", {})
+        print(
+            f"server RSS: web peak {rss['web_peak']} MiB{delta(rss['web_peak'], old.get('web_peak'))}, "
+            f"mean {rss['web_mean']} MiB; workers peak {rss['workers_peak']} MiB"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8011")
+    parser.add_argument("--spawn", action="store_true", help="start a fake-backend server for the run")
+    parser.add_argument("--server-pid", type=int, help="pid to sample RSS from (implied by --spawn)")
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--jobs", type=int, default=2, help="jobs per client")
+    parser.add_argument("--poll-interval", type=float, default=3.0)
+    parser.add_argument("--job-timeout", type=float, default=600.0)
+    parser.add_argument("--request-timeout", type=float, default=60.0)
+    parser.add_argument("--model", default="whisper_tiny")
+    parser.add_argument("--media", type=Path, help="file to upload (default: random bytes)")
+    parser.add_argument("--media-bytes", type=int, default=64 * 1024)
+    parser.add_argument("--rtf", type=float, default=0.05, help="--spawn: fake real-time factor")
+    parser.add_argument("--audio-seconds", type=float, default=120.0, help="--spawn: fake media length")
+    parser.add_argument("--max-jobs", type=int, help="--spawn: MAX_CONCURRENT_JOBS (default: --clients)")
+    parser.add_argument("--json", type=Path, help="write the report here")
+    parser.add_argument("--compare", type=Path, help="baseline report to show deltas against")
+    parser.add_argument("--keep-jobs", action="store_true", help="don't delete the jobs afterwards")
+    args = parser.parse_args()
+
+    media = args.media.read_bytes() if args.media else os.urandom(args.media_bytes)
+    args.media_bytes = len(media)
+    server = output_dir = None
+    if args.spawn:
+        server, args.url, output_dir = spawn_server(args)
+        args.server_pid = server.pid
+    sampler = RssSampler(args.server_pid) if args.server_pid else None
+    if sampler:
+        sampler.start()
+
+    stats = Stats()
+    started = time.perf_counter()
+    try:
+        threads = [
+            threading.Thread(target=Client(args.url, stats, args.request_timeout).run, args=(media, args))
+            for _ in range(args.clients)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        if sampler:
+            sampler.stopped.set()
+        report = build_report(args, stats, sampler, elapsed)
+
+        if not args.keep_jobs:
+            cleaner = Client(args.url, Stats(), args.request_timeout)
+            for job_id in stats.job_ids:
+                cleaner.call("POST", f"/history/delete?pid={job_id}", "cleanup")
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=10)
+            if args.keep_jobs:
+                print(f"jobs kept in {output_dir}")
+            else:
+                shutil.rmtree(output_dir, ignore_errors=True)
+
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print_report(report, baseline)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+        print(f"report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
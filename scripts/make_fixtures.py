@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Long benchmark fixtures, generated offline from the committed 6s
+tests/fixtures/speech.mp3: the speech is repeated with silence gaps of varying
+length (so VAD and long-form decoding have real work) up to exactly N minutes,
+and each file gets the matching reference text — the fixture's own reference
+(tests/fixtures/speech.txt) once per repetition — for the WER.
+
+    python scripts/make_fixtures.py                  # 1, 10 and 60 minutes
+    python scripts/make_fixtures.py --minutes 1 10
+
+Writes speech_<N>min.mp3 / .txt plus a manifest.json (file, seconds,
+repetitions) to tests/fixtures/generated/ (git-ignored; ~0.5 MB per minute).
+Existing files are kept, so reruns are free. Needs ffmpeg — run it
+inside the app image if the host has none (scripts/benchmark.sh does).
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import wave
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SPEECH = ROOT / "tests" / "fixtures" / "speech.mp3"
+REFERENCE = ROOT / "tests" / "fixtures" / "speech.txt"
+OUT_DIR = ROOT / "tests" / "fixtures" / "generated"
+
+SAMPLE_RATE = 16000  # what Whisper resamples to anyway
+# Silence after each repetition, cycled: mostly short pauses, now and then a
+# long one that VAD should skip.
+GAPS = (0.5, 1.0, 2.0, 5.0, 0.5, 1.0, 2.0, 15.0)
+
+
+def assemble(speech_wav: Path, out_wav: Path, seconds: float) -> int:
+    """
+    Repeat the mono 16-bit ``speech_wav`` with GAPS silences into ``out_wav``
+    of exactly ``seconds``, padding the end with silence.
+
+    Returns:
+        int: How many times the speech was repeated.
+    """
+    with wave.open(str(speech_wav), "rb") as src:
+        params = src.getparams()
+        speech = src.readframes(params.nframes)
+    frame_bytes = params.sampwidth * params.nchannels
+    total = int(seconds * params.framerate)
+    written = repetitions = 0
+    with wave.open(str(out_wav), "wb") as out:
+        out.setparams(params)
+        while written + params.nframes <= total:
+            out.writeframes(speech)
+            written += params.nframes
+            gap = min(total - written, int(GAPS[repetitions % len(GAPS)] * params.framerate))
+            out.writeframes(b"\0" * gap * frame_bytes)
+            written += gap
+            repetitions += 1
+        out.writeframes(b"\0" * (total - written) * frame_bytes)
+    return repetitions
+
+
+def make(minutes: int, out_dir: Path, reference: str) -> dict:
+    """Write speech_<minutes>min.mp3/.txt (unless present); returns its manifest entry."""
+    name = f"speech_{minutes}min"
+    mp3, txt = out_dir / f"{name}.mp3", out_dir / f"{name}.txt"
+    with tempfile.TemporaryDirectory() as tmp:
+        speech_wav, long_wav = Path(tmp) / "speech.wav", Path(tmp) / "long.wav"
+        subprocess.run(
+            ["ffmpeg", "-v", "error", "-i", str(SPEECH), "-ac", "1", "-ar", str(SAMPLE_RATE),
+             "-c:a", "pcm_s16le", str(speech_wav)],
+            check=True,
+        )
+        # Cheap to recompute, and it keeps the manifest right for kept files.
+        with wave.open(str(speech_wav), "rb") as src:
+            speech_frames = src.getnframes()
+        if mp3.exists() and txt.exists():
+            repetitions = len(txt.read_text().split()) // len(reference.split())
+        else:
+            repetitions = assemble(speech_wav, long_wav, minutes * 60)
+            subprocess.run(
+                ["ffmpeg", "-v", "error", "-y", "-i", str(long_wav), "-c:a", "libmp3lame",
+                 "-b:a", "64k", str(mp3)],
+                check=True,
+            )
+            txt.write_text(" ".join([reference] * repetitions) + "\n")
+    return {
+        "file": mp3.name,
+        "reference": txt.name,
+        "seconds": minutes * 60,
+        "repetitions": repetitions,
+        "speech_seconds": round(repetitions * speech_frames / SAMPLE_RATE, 1),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--minutes", type=int, nargs="+", default=[1, 10, 60])
+    parser.add_argument("--out", type=Path, default=OUT_DIR)
+    args = parser.parse_args()
+
+    args.out.mkdir(parents=True, exist_ok=True)
+    reference = REFERENCE.read_text().strip()
+    made = [make(minutes, args.out, reference) for minutes in args.minutes]
+    manifest_path = args.out / "manifest.json"
+    manifest = {
+        entry["file"]: entry
+        for entry in (json.loads(manifest_path.read_text()) if manifest_path.exists() else [])
+    }
+    manifest.update((entry["file"], entry) for entry in made)
+    manifest_path.write_text(
+        json.dumps(sorted(manifest.values(), key=lambda e: e["seconds"]), indent=2) + "\n"
+    )
+    for entry in made:
+        print(f"{entry['file']}: {entry['seconds']}s, speech x{entry['repetitions']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
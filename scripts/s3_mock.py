@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for an S3-compatible object store, for offline tests of
+STORAGE_BACKEND=s3 (src/storage.py). Point the app at it (any keys work):
+
+    python scripts/s3_mock.py --port 8098
+    STORAGE_BACKEND=s3 S3_ENDPOINT_URL=http://127.0.0.1:8098 S3_BUCKET=txtify \\
+        S3_ACCESS_KEY_ID=mock S3_SECRET_ACCESS_KEY=mock ...
+
+Serves the path-style subset the app uses — PUT/GET/HEAD/DELETE of an object
+(``/<bucket>/<key>``) and ListObjectsV2 (``GET /<bucket>?list-type=2``) —
+plus ``GET /mock/stats`` (requests by method, responses by status, bytes in
+and out). Buckets exist on first use. Objects are kept in memory. Requests
+need a SigV4 ``Authorization`` header or a presigned ``X-Amz-Signature``,
+but signatures aren't verified, so any credentials are accepted.
+
+Options: ``--latency`` (seconds before each response) and ``--page-size``
+(keys per list page, to exercise pagination).
+
+Only the standard library, like scripts/deepl_mock.py.
+"""
+
+import argparse
+import json
+import threading
+import time
+from collections import Counter
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+from xml.sax.saxutils import escape
+
+_XMLNS = "http://s3.amazonaws.com/doc/2006-03-01/"
+
+
+class S3Mock(ThreadingHTTPServer):
+    """The mock server; objects, configuration and counters are plain attributes."""
+
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), latency: float = 0.0, page_size: int = 1000):
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.page_size = page_size
+        self.objects = {}  # (bucket, key) -> (bytes, mtime)
+        self.stats = Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def list(self, bucket: str, prefix: str, after: str) -> tuple[list, bool]:
+        """One page of (key, size, mtime) after the key ``after``, and whether more follow."""
+        with self._lock:
+            keys = sorted(
+                (key, len(data), mtime)
+                for (b, key), (data, mtime) in self.objects.items()
+                if b == bucket and key.startswith(prefix) and key > after
+            )
+        return keys[: self.page_size], len(keys) > self.page_size
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # quiet: tests and benchmarks
+        pass
+
+    def _send(self, code: int, body: bytes = b"", content_type="application/xml", headers=None) -> None:
+        with self.server._lock:
+            self.server.stats[f"status_{code}"] += 1
+            if self.command == "GET":
+                self.server.stats["bytes_out"] += len(body)
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _error(self, code: int, error: str) -> None:
+        self._send(code, f"<Error><Code>{error}</Code></Error>".encode())
+
+    def _route(self):
+        """(bucket, key, query) of the request, or None once an error is sent."""
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        url = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query, keep_blank_values=True).items()}
+        with self.server._lock:
+            self.server.stats[f"requests_{self.command}"] += 1
+        authorization = self.headers.get("Authorization", "")
+        if not authorization.startswith("AWS4-HMAC-SHA256 ") and "X-Amz-Signature" not in query:
+            self._error(403, "AccessDenied")
+            return None
+        bucket, _, key = unquote(url.path).lstrip("/").partition("/")
+        return bucket, key, query
+
+    def do_PUT(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        data = self.rfile.read(length)
+        if (route := self._route()) is None:
+            return
+        bucket, key, _ = route
+        if not key:
+            return self._send(200)  # CreateBucket: buckets exist on first use
+        with self.server._lock:
+            self.server.objects[bucket, key] = (data, time.time())
+            self.server.stats["bytes_in"] += len(data)
+        self._send(200, headers={"ETag": f'"{len(data):x}"'})
+
+    def do_GET(self):
+        if self.path == "/mock/stats":
+            with self.server._lock:
+                stats = dict(self.server.stats)
+            return self._send(200, json.dumps(stats).encode(), "application/json")
+        if (route := self._route()) is None:
+            return
+        bucket, key, query = route
+        if not key:
+            return self._list(bucket, query)
+        with self.server._lock:
+            found = self.server.objects.get((bucket, key))
+        if found is None:
+            return self._error(404, "NoSuchKey")
+        data, mtime = found
+        headers = {"Last-Modified": formatdate(mtime, usegmt=True)}
+        if "response-content-disposition" in query:
+            headers["Content-Disposition"] = query["response-content-disposition"]
+        self._send(200, data, "application/octet-stream", headers)
+
+    do_HEAD = do_GET
+
+    def do_DELETE(self):
+        if (route := self._route()) is None:
+            return
+        bucket, key, _ = route
+        with self.server._lock:
+            self.server.objects.pop((bucket, key), None)
+        self._send(204)
+
+    def _list(self, bucket: str, query: dict) -> None:
+        if query.get("list-type") != "2":
+            return self._error(400, "InvalidArgument")
+        after = query.get("continuation-token") or query.get("start-after") or ""
+        page, truncated = self.server.list(bucket, query.get("prefix", ""), after)
+        contents = "".join(
+            f"<Contents><Key>{escape(key)}</Key><Size>{size}</Size>"
+            f"<LastModified>{time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime(mtime))}"
+            "</LastModified></Contents>"
+            for key, size, mtime in page
+        )
+        token = (
+            f"<NextContinuationToken>{escape(page[-1][0])}</NextContinuationToken>"
+            if truncated else ""
+        )
+        body = (
+            f'<?xml version="1.0" encoding="UTF-8"?><ListBucketResult xmlns="{_XMLNS}">'
+            f"<Name>{escape(bucket)}</Name><KeyCount>{len(page)}</KeyCount>"
+            f"<IsTruncated>{str(truncated).lower()}</IsTruncated>{token}{contents}"
+            "</ListBucketResult>"
+        )
+        self._send(200, body.encode("utf-8"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8098)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per request")
+    parser.add_argument("--page-size", type=int, default=1000, help="keys per list page")
+    args = parser.parse_args()
+
+    server = S3Mock((args.host, args.port), latency=args.latency, page_size=args.page_size)
+    print(f"S3 mock listening on {server.url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -52,8 +52,8 @@ if wait_inflight "$J"; then
   # separate, pre-existing reaping matter and is reported at the end.
   WP=$(worker_pid_for "$J")
   if running "$WP"; then fail "worker $WP still EXECUTING after cancel (state=$(run_state "$WP"))"; else pass "worker stopped (state=$(run_state "$WP" | sed 's/^$/gone/'))"; fi
-  # files cleaned — no output/<job> dir, no output/<job>_* files
-  LEFT=$(docker exec "$NAME" sh -c "ls -d output/$J output/${J}_* 2>/dev/null" | tr '\n' ' ')
+  # files cleaned — no output/jobs/<shard>/<job> dir
+  LEFT=$(docker exec "$NAME" sh -c "ls -d output/jobs/*/$J 2>/dev/null" | tr '\n' ' ')
   [ -z "$LEFT" ] && pass "no leftover files" || fail "leftover files: $LEFT"
   # terminal sticks: a late poll (and any late worker write) stays Canceled
   sleep 1; [ "$(phase "$J")" = "Canceled" ] && pass "terminal state sticks" || fail "flipped to '$(phase "$J")'"
@@ -4,12 +4,40 @@ creating a table, inserting records, updating statuses, and deleting entries.
 
 Each record is identified by its rowid (the job id), created at insert time.
 The OS pid of the worker subprocess is stored alongside it for cancellation.
+
+Every status write is also appended to ``job_events`` with a monotonic
+timestamp, so the time a job spent in each stage can be reconstructed.
 """
 
+import json
 import sqlite3
+import time
 from contextlib import closing
 
-from status import ERROR, NOT_LOCKED_SQL
+from status import ERROR, NOT_LOCKED_SQL, STAGES, worker_died
+
+# transcript_search rowids are (job_id << _SEARCH_SHIFT) | segment position,
+# so a job's rows are one rowid range: indexing, probing and deleting a job
+# never scan the index, and results order by job without a join.
+_SEARCH_SHIFT = 24
+
+
+def _match_expression(query: str) -> str:
+    """User text -> FTS5 query: every word must match, syntax characters are literal."""
+    return " ".join('"' + word.replace('"', '""') + '"' for word in query.split())
+
+
+# Append a phase to a job's event log unless it repeats the latest one (the
+# web process writes PROCESSING twice: at insert and right after).
+_RECORD_EVENT_SQL = """
+    INSERT INTO job_events (job_id, phase, at, mono)
+    SELECT ?, ?, ?, ?
+    WHERE NOT EXISTS (
+        SELECT 1 FROM job_events
+        WHERE id = (SELECT MAX(id) FROM job_events WHERE job_id = ?)
+          AND phase = ?
+    )
+"""
 
 
 class transcriptionsDB:
@@ -49,6 +77,133 @@ class transcriptionsDB:
                 )
                 """
             )
+            # ``mono`` is time.monotonic(): CLOCK_MONOTONIC is system-wide, so
+            # web-process and worker timestamps are comparable on one host and
+            # immune to wall-clock jumps. ``at`` is wall time, for display.
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS job_events (
+                    id INTEGER PRIMARY KEY,
+                    job_id INTEGER NOT NULL,
+                    phase TEXT,
+                    at REAL,
+                    mono REAL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_job_events_job ON job_events (job_id)"
+            )
+            # DeepL translation memory, keyed by normalized segment text and
+            # language pair ('auto' when DeepL detected the source).
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS translation_memory (
+                    source_lang TEXT NOT NULL,
+                    target_lang TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    translation TEXT NOT NULL,
+                    last_used REAL,
+                    PRIMARY KEY (source_lang, target_lang, text)
+                )
+                """
+            )
+            # Full-text index of finished transcripts, one row per segment
+            # (see index_transcript). unicode61 folds case, and diacritics on
+            # Latin letters.
+            conn.execute(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS transcript_search USING fts5(
+                    text,
+                    start_ms UNINDEXED,
+                    end_ms UNINDEXED,
+                    tokenize = 'unicode61 remove_diacritics 2'
+                )
+                """
+            )
+            # Jobs whose transcript has been indexed, including those with no
+            # segments, so the startup backfill (utils.index_unsearchable_jobs)
+            # finds what is left in one query and never re-reads a job.
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS transcript_indexed (job_id INTEGER PRIMARY KEY)"
+            )
+            # Disk usage and last access of finished jobs, for the output
+            # quota (utils.enforce_output_quota). ``tier`` is how much of the
+            # job has been evicted: 0 nothing, 1 its media, 2 also the
+            # exports that can be re-rendered from the canonical SRT.
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS job_storage (
+                    job_id INTEGER PRIMARY KEY,
+                    bytes INTEGER NOT NULL DEFAULT 0,
+                    accessed REAL NOT NULL,
+                    measured REAL NOT NULL DEFAULT 0,
+                    tier INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_job_storage_accessed ON job_storage (accessed)"
+            )
+            # Jobs for standalone workers (WORKER_MODE=queue, worker.py): queued
+            # until claimed, then leased to one worker until ``lease_until``.
+            # The worker renews the lease while the job runs; once it lapses
+            # (the worker vanished) the job is claimable again.
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS job_queue (
+                    job_id INTEGER PRIMARY KEY,
+                    args TEXT NOT NULL,
+                    enqueued REAL NOT NULL,
+                    worker TEXT,
+                    lease_until REAL NOT NULL DEFAULT 0,
+                    attempts INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            # The web process that accepted a job, for as long as no worker
+            # has it: a pid plus the process's start time, so a recycled pid
+            # is not mistaken for it. Lets any process tell a job still being
+            # prepared by a sibling from one whose web process died.
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS job_owners (
+                    job_id INTEGER PRIMARY KEY,
+                    pid INTEGER NOT NULL,
+                    started REAL NOT NULL
+                )
+                """
+            )
+            # Named leases shared by the web processes (see acquire_lease).
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS leases (
+                    name TEXT PRIMARY KEY,
+                    holder TEXT NOT NULL,
+                    until REAL NOT NULL
+                )
+                """
+            )
+            # STORAGE prefixes of deleted jobs whose remote delete failed (an
+            # unreachable bucket); the retention sweep retries them.
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS storage_deletions (
+                    prefix TEXT PRIMARY KEY,
+                    failed REAL NOT NULL
+                )
+                """
+            )
+            # Token buckets shared by every process (see take_rate_token).
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS rate_limits (
+                    name TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL
+                )
+                """
+            )
 
     def _connect(self) -> sqlite3.Connection:
         conn = sqlite3.connect(self.db_path, timeout=30)
@@ -56,6 +211,13 @@ class transcriptionsDB:
         conn.execute("PRAGMA journal_mode=WAL")
         return conn
 
+    @staticmethod
+    def _record_event(conn: sqlite3.Connection, job_id: int, phase: str) -> None:
+        conn.execute(
+            _RECORD_EVENT_SQL,
+            (job_id, phase, time.time(), time.monotonic(), job_id, phase),
+        )
+
     def insert_transcription(
         self,
         youtube_url: str,
@@ -67,6 +229,7 @@ class transcriptionsDB:
         file_export: str,
         status: str,
         created_at: str,
+        owner: tuple = None,
     ) -> int:
         """
         Insert a new transcription record and return its job id.
@@ -81,6 +244,9 @@ class transcriptionsDB:
             file_export (str): The file export format.
             status (str): The current status of the transcription.
             created_at (str): The creation timestamp.
+            owner (tuple): (pid, start time) of the web process preparing the
+                job (see utils.process_identity), recorded in the same
+                transaction so the job is never without one.
 
         Returns:
             int: The job id of the new record.
@@ -106,6 +272,12 @@ class transcriptionsDB:
                     created_at,
                 ),
             )
+            self._record_event(conn, cursor.lastrowid, status)
+            if owner is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO job_owners (job_id, pid, started) VALUES (?, ?, ?)",
+                    (cursor.lastrowid, *owner),
+                )
             return cursor.lastrowid
 
     def get_transcription(self, job_id: int):
@@ -125,7 +297,7 @@ class transcriptionsDB:
 
     def update_transcription_status(
         self, status: str, completed_at: str, progress: int, job_id: int
-    ) -> None:
+    ) -> bool:
         """
         Update the status, completion timestamp, and progress of a record.
 
@@ -136,18 +308,23 @@ class transcriptionsDB:
             job_id (int): The job id.
 
         Returns:
-            None
+            bool: False if nothing was written (the job is gone, or the guard
+            below kept its terminal status).
         """
         with closing(self._connect()) as conn, conn:
             # Terminal states (Canceled / any Error) are never overwritten —
             # e.g. a worker update must not race past a user's cancel.
-            conn.execute(
+            cursor = conn.execute(
                 f"""
                 UPDATE transcriptions SET status=?, completed_at=?, progress=?
                 WHERE id=? AND {NOT_LOCKED_SQL}
                 """,
                 (status, completed_at, progress, job_id),
             )
+            # Same transaction: a write the guard rejected leaves no event.
+            if cursor.rowcount:
+                self._record_event(conn, job_id, status)
+            return cursor.rowcount > 0
 
     def set_process_pid(self, pid: int, job_id: int) -> None:
         """
@@ -181,24 +358,62 @@ class transcriptionsDB:
             ).fetchone()
             return row[0] if row else None
 
-    def mark_orphans_as_error(self) -> int:
+    def mark_orphans_as_error(self, job_ids: list = None, message: str = ERROR) -> int:
         """
-        Mark all unfinished jobs as Error. Called at server startup: workers
-        from a previous container run can never complete.
+        Mark unfinished jobs as failed. Queued jobs are left alone: standalone
+        workers outlive the server, and a job whose worker is gone is claimed
+        again once its lease lapses.
+
+        Args:
+            job_ids (list): The jobs nobody is working on any more (see
+                main._recover_orphaned_jobs); None marks every unfinished job.
+            message (str): The error status to write.
 
         Returns:
             int: Number of rows updated.
         """
+        where = f"""
+            progress < 100 AND {NOT_LOCKED_SQL}
+            AND id NOT IN (SELECT job_id FROM job_queue)
+        """
+        params = ()
+        if job_ids is not None:
+            if not job_ids:
+                return 0
+            where += f" AND id IN ({','.join('?' * len(job_ids))})"
+            params = tuple(job_ids)
         with closing(self._connect()) as conn, conn:
+            conn.execute(
+                f"INSERT INTO job_events (job_id, phase, at, mono) "
+                f"SELECT id, ?, ?, ? FROM transcriptions WHERE {where}",
+                (message, time.time(), time.monotonic(), *params),
+            )
             cursor = conn.execute(
-                f"""
-                UPDATE transcriptions SET status=?, progress=0
-                WHERE progress < 100 AND {NOT_LOCKED_SQL}
-                """,
-                (ERROR,),
+                f"UPDATE transcriptions SET status=?, progress=0 WHERE {where}",
+                (message, *params),
             )
             return cursor.rowcount
 
+    def get_job_owners(self, job_ids: list) -> dict:
+        """
+        The recorded web process of each of the given jobs.
+
+        Args:
+            job_ids (list): The job ids.
+
+        Returns:
+            dict: job_id -> (pid, start time), for jobs that have an owner.
+        """
+        if not job_ids:
+            return {}
+        with closing(self._connect()) as conn, conn:
+            rows = conn.execute(
+                f"SELECT job_id, pid, started FROM job_owners "
+                f"WHERE job_id IN ({','.join('?' * len(job_ids))})",
+                tuple(job_ids),
+            ).fetchall()
+        return {job_id: (pid, started) for job_id, pid, started in rows}
+
     def get_active_jobs(self):
         """
         Return (id, pid, created_at) for jobs still in flight: progress < 100
@@ -215,10 +430,148 @@ class transcriptionsDB:
                 """
             ).fetchall()
 
+    def enqueue_job(self, job_id: int, args: dict, now: float = None) -> None:
+        """
+        Queue a prepared job for a standalone worker (replacing any entry
+        left by an earlier job with the same id).
+
+        Args:
+            job_id (int): The job id.
+            args (dict): JSON-serializable worker arguments.
+            now (float): Enqueue time (default: time.time()).
+
+        Returns:
+            None
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO job_queue (job_id, args, enqueued) VALUES (?, ?, ?)",
+                (job_id, json.dumps(args), time.time() if now is None else now),
+            )
+
+    def claim_job(self, worker: str, lease_seconds: float, max_attempts: int, now: float = None):
+        """
+        Lease the oldest claimable job to ``worker``: one never claimed, or
+        one whose lease lapsed (its worker vanished). Entries for jobs that
+        finished, failed, were canceled or deleted meanwhile are dropped, and
+        a job whose lease lapsed ``max_attempts`` times is failed instead of
+        claimed again, so media that kills every worker can't cycle forever.
+
+        Args:
+            worker (str): The claiming worker's id.
+            lease_seconds (float): How long the lease lasts unless renewed.
+            max_attempts (int): Claims a job gets before it is failed.
+            now (float): Current time (default: time.time()).
+
+        Returns:
+            tuple[int, dict, int] | None: (job id, worker arguments, attempt
+            number), or None if nothing is claimable.
+        """
+        now = time.time() if now is None else now
+        with closing(self._connect()) as conn, conn:
+            # Lock before reading so two workers cannot claim one job.
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                f"""
+                DELETE FROM job_queue WHERE job_id NOT IN (
+                    SELECT id FROM transcriptions WHERE progress < 100 AND {NOT_LOCKED_SQL}
+                )
+                """
+            )
+            exhausted = [
+                row[0] for row in conn.execute(
+                    "SELECT job_id FROM job_queue WHERE lease_until < ? AND attempts >= ?",
+                    (now, max_attempts),
+                )
+            ]
+            for job_id in exhausted:
+                failed = worker_died(f"It was tried {max_attempts} time(s) without finishing.")
+                conn.execute(
+                    f"UPDATE transcriptions SET status=?, progress=0 WHERE id=? AND {NOT_LOCKED_SQL}",
+                    (failed, job_id),
+                )
+                self._record_event(conn, job_id, failed)
+                conn.execute("DELETE FROM job_queue WHERE job_id=?", (job_id,))
+            row = conn.execute(
+                """
+                SELECT job_id, args, attempts FROM job_queue WHERE lease_until < ?
+                ORDER BY enqueued, job_id LIMIT 1
+                """,
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE job_queue SET worker=?, lease_until=?, attempts=attempts + 1 WHERE job_id=?",
+                (worker, now + lease_seconds, row["job_id"]),
+            )
+            return row["job_id"], json.loads(row["args"]), row["attempts"] + 1
+
+    def renew_lease(self, job_id: int, worker: str, lease_seconds: float, now: float = None) -> bool:
+        """
+        Extend ``worker``'s lease on a job (its heartbeat).
+
+        Args:
+            job_id (int): The job id.
+            worker (str): The worker holding the lease.
+            lease_seconds (float): New lease length from now.
+            now (float): Current time (default: time.time()).
+
+        Returns:
+            bool: False if the worker should stop: the job was canceled,
+            failed, finished or deleted, or its lease went to another worker.
+        """
+        now = time.time() if now is None else now
+        with closing(self._connect()) as conn, conn:
+            cursor = conn.execute(
+                f"""
+                UPDATE job_queue SET lease_until=? WHERE job_id=? AND worker=?
+                AND job_id IN (
+                    SELECT id FROM transcriptions WHERE progress < 100 AND {NOT_LOCKED_SQL}
+                )
+                """,
+                (now + lease_seconds, job_id, worker),
+            )
+            return cursor.rowcount == 1
+
+    def release_job(self, job_id: int, worker: str) -> None:
+        """
+        Drop a job from the queue once ``worker`` is done with it (a lease
+        that already went to another worker is left to that one).
+
+        Args:
+            job_id (int): The job id.
+            worker (str): The worker holding the lease.
+
+        Returns:
+            None
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM job_queue WHERE job_id=? AND worker=?", (job_id, worker))
+
+    def get_queue(self, now: float = None) -> list:
+        """
+        Return (job_id, worker, leased) for every queue entry; ``leased`` is
+        whether a worker currently holds it.
+
+        Returns:
+            list[tuple]: The entries, oldest first.
+        """
+        now = time.time() if now is None else now
+        with closing(self._connect()) as conn, conn:
+            return conn.execute(
+                """
+                SELECT job_id, worker, lease_until >= ? AS leased FROM job_queue
+                ORDER BY enqueued, job_id
+                """,
+                (now,),
+            ).fetchall()
+
     def get_expired_job_ids(self, cutoff: float) -> list:
         """
         Return the ids of jobs created before ``cutoff`` (Unix seconds) that
-        are not still in flight, for the retention sweep.
+        are not still in flight, for the retention sweep. A job whose results
+        were opened since ``cutoff`` (see ``touch_job``) is not expired yet.
 
         In-flight jobs are excluded explicitly (same definition as
         ``get_active_jobs``) rather than relying on "an old job can't be
@@ -241,7 +594,9 @@ class transcriptionsDB:
             rows = conn.execute(
                 f"""
                 SELECT id FROM transcriptions
-                WHERE created_at != '' AND CAST(created_at AS REAL) < ?
+                LEFT JOIN job_storage ON job_storage.job_id = transcriptions.id
+                WHERE created_at != ''
+                  AND MAX(CAST(created_at AS REAL), COALESCE(accessed, 0)) < ?
                   AND NOT (progress < 100 AND {NOT_LOCKED_SQL})
                 """,
                 (cutoff,),
@@ -254,19 +609,532 @@ class transcriptionsDB:
         the page stays bounded (retention already limits how many rows exist).
 
         Args:
-            limit (int): Maximum rows to return.
+            limit (int): Maximum rows to return; None for all.
 
         Returns:
             list[sqlite3.Row]: The job rows.
         """
         with closing(self._connect()) as conn, conn:
             return conn.execute(
-                "SELECT * FROM transcriptions ORDER BY id DESC LIMIT ?", (limit,)
+                "SELECT * FROM transcriptions ORDER BY id DESC LIMIT ?",
+                (limit if limit is not None else -1,),
+            ).fetchall()
+
+    def get_job_events(self, job_id: int):
+        """
+        Return a job's status transitions in the order they happened.
+
+        Args:
+            job_id (int): The job id.
+
+        Returns:
+            list[sqlite3.Row]: Rows with ``phase``, ``at`` (wall) and ``mono``.
+        """
+        with closing(self._connect()) as conn, conn:
+            return conn.execute(
+                "SELECT phase, at, mono FROM job_events WHERE job_id=? ORDER BY id",
+                (job_id,),
+            ).fetchall()
+
+    def get_stage_durations(self, job_ids) -> dict:
+        """
+        Seconds spent in each stage, per job, from the event log.
+
+        A stage runs from its event to the next one; the stage a job is still
+        in (no later event) counts up to now. Repeated
+        stages are summed. Jobs without events are absent from the result.
+
+        Args:
+            job_ids (Iterable[int]): The job ids.
+
+        Returns:
+            dict[int, dict[str, float]]: job id -> {stage name: seconds}, with
+            stages in the order they were first entered (see status.STAGES).
+        """
+        job_ids = list(job_ids)
+        if not job_ids:
+            return {}
+        events: dict = {}
+        with closing(self._connect()) as conn, conn:
+            # Chunked: SQLite caps the number of bound parameters per query.
+            for i in range(0, len(job_ids), 500):
+                chunk = job_ids[i : i + 500]
+                rows = conn.execute(
+                    f"""
+                    SELECT job_id, phase, mono FROM job_events
+                    WHERE job_id IN ({",".join("?" * len(chunk))})
+                    ORDER BY id
+                    """,
+                    chunk,
+                ).fetchall()
+                for row in rows:
+                    events.setdefault(row["job_id"], []).append(
+                        (row["phase"], row["mono"])
+                    )
+
+        now = time.monotonic()
+        durations = {}
+        for job_id, job_events in events.items():
+            stages: dict = {}
+            for idx, (phase, mono) in enumerate(job_events):
+                name = STAGES.get(phase)
+                if name is None:
+                    continue
+                end = job_events[idx + 1][1] if idx + 1 < len(job_events) else now
+                # Clamped: mono restarts at reboot, so an orphan's closing
+                # event can predate the stage it closes.
+                stages[name] = round(stages.get(name, 0.0) + max(0.0, end - mono), 2)
+            durations[job_id] = stages
+        return durations
+
+    def get_translations(self, texts, source_lang: str, target_lang: str) -> dict:
+        """
+        Look up cached translations and mark the hits as recently used.
+
+        Args:
+            texts (Iterable[str]): Normalized segment texts.
+            source_lang (str): Source language code ('auto' if detected).
+            target_lang (str): Target language code.
+
+        Returns:
+            dict[str, str]: text -> cached translation, for the hits only.
+        """
+        texts = list(texts)
+        found = {}
+        with closing(self._connect()) as conn, conn:
+            for i in range(0, len(texts), 500):
+                chunk = texts[i : i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"""
+                    SELECT text, translation FROM translation_memory
+                    WHERE source_lang=? AND target_lang=? AND text IN ({placeholders})
+                    """,
+                    (source_lang, target_lang, *chunk),
+                ).fetchall()
+                found.update((row["text"], row["translation"]) for row in rows)
+            if found:
+                conn.executemany(
+                    """
+                    UPDATE translation_memory SET last_used=?
+                    WHERE source_lang=? AND target_lang=? AND text=?
+                    """,
+                    [(time.time(), source_lang, target_lang, t) for t in found],
+                )
+        return found
+
+    def put_translations(self, translations: dict, source_lang: str, target_lang: str) -> None:
+        """
+        Store fresh translations in the translation memory.
+
+        Args:
+            translations (dict[str, str]): Normalized text -> translation.
+            source_lang (str): Source language code ('auto' if detected).
+            target_lang (str): Target language code.
+
+        Returns:
+            None
+        """
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO translation_memory
+                    (source_lang, target_lang, text, translation, last_used)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                [
+                    (source_lang, target_lang, text, translation, now)
+                    for text, translation in translations.items()
+                ],
+            )
+
+    def purge_translation_memory(self, cutoff: float) -> int:
+        """
+        Drop translation memory entries not used since ``cutoff`` (Unix
+        seconds), so the cache is bounded by the same retention as jobs.
+
+        Args:
+            cutoff (float): Unix timestamp.
+
+        Returns:
+            int: Number of entries removed.
+        """
+        with closing(self._connect()) as conn, conn:
+            return conn.execute(
+                "DELETE FROM translation_memory WHERE last_used < ?", (cutoff,)
+            ).rowcount
+
+    def defer_storage_deletion(self, prefix: str) -> None:
+        """
+        Remember a STORAGE prefix whose delete failed, to retry later.
+
+        Args:
+            prefix (str): The STORAGE prefix.
+
+        Returns:
+            None
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO storage_deletions (prefix, failed) VALUES (?, ?)",
+                (prefix, time.time()),
+            )
+
+    def pending_storage_deletions(self) -> list[str]:
+        """
+        STORAGE prefixes still waiting to be deleted, oldest failure first.
+
+        Returns:
+            list[str]: The prefixes.
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT prefix FROM storage_deletions ORDER BY failed").fetchall()
+            return [row[0] for row in rows]
+
+    def forget_storage_deletion(self, prefix: str) -> None:
+        """
+        Drop a prefix from the retry list once it is deleted.
+
+        Args:
+            prefix (str): The STORAGE prefix.
+
+        Returns:
+            None
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM storage_deletions WHERE prefix=?", (prefix,))
+
+    def touch_job(self, job_id: int, now: float = None, granularity: float = 60) -> None:
+        """
+        Record that a job's results were just read, for LRU eviction and the
+        retention sweep. Writes at most once per ``granularity`` seconds per
+        job, so paging through a preview doesn't write on every request.
+        Reading re-renders evicted exports, so the job is back at tier 1.
+
+        Args:
+            job_id (int): The job id.
+            now (float): Unix time of the access (default: now).
+            granularity (float): Seconds within which repeat accesses are
+                not recorded.
+
+        Returns:
+            None
+        """
+        now = time.time() if now is None else now
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """
+                INSERT INTO job_storage (job_id, accessed) VALUES (?, ?)
+                ON CONFLICT (job_id) DO UPDATE
+                SET accessed = excluded.accessed, tier = MIN(tier, 1)
+                WHERE job_storage.accessed < excluded.accessed - ?
+                """,
+                (job_id, now, granularity),
+            )
+
+    def jobs_to_measure(self, limit: int) -> list:
+        """
+        Start tracking finished jobs the quota hasn't seen yet (last access =
+        completion), drop rows of deleted jobs, and return up to ``limit``
+        tracked jobs whose size is unknown or older than their last access.
+        Reads re-render exports, so a job only grows after one.
+
+        Args:
+            limit (int): Maximum ids to return.
+
+        Returns:
+            list[int]: Job ids to measure, least recently used first.
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                f"""
+                INSERT OR IGNORE INTO job_storage (job_id, accessed)
+                SELECT id, COALESCE(
+                    CAST(NULLIF(completed_at, '') AS REAL),
+                    CAST(NULLIF(created_at, '') AS REAL),
+                    0
+                )
+                FROM transcriptions
+                WHERE NOT (progress < 100 AND {NOT_LOCKED_SQL})
+                  AND id NOT IN (SELECT job_id FROM job_storage)
+                """
+            )
+            conn.execute(
+                "DELETE FROM job_storage WHERE job_id NOT IN (SELECT id FROM transcriptions)"
+            )
+            rows = conn.execute(
+                """
+                SELECT job_id FROM job_storage WHERE measured < accessed
+                ORDER BY accessed LIMIT ?
+                """,
+                (limit,),
+            ).fetchall()
+            return [row[0] for row in rows]
+
+    def record_job_size(self, job_id: int, size: int, measured: float) -> None:
+        """
+        Store a job's measured disk usage.
+
+        Args:
+            job_id (int): The job id.
+            size (int): Bytes on disk.
+            measured (float): Unix time of the measurement.
+
+        Returns:
+            None
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "UPDATE job_storage SET bytes=?, measured=? WHERE job_id=?",
+                (size, measured, job_id),
+            )
+
+    def storage_usage(self) -> int:
+        """
+        Total measured disk usage of the tracked (finished) jobs.
+
+        Returns:
+            int: Bytes.
+        """
+        with closing(self._connect()) as conn, conn:
+            return conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM job_storage").fetchone()[0]
+
+    def eviction_candidates(self, tier: int, limit: int) -> list:
+        """
+        Least recently used finished jobs not yet evicted to ``tier``.
+
+        Args:
+            tier (int): The eviction tier about to be applied (1-3).
+            limit (int): Maximum ids to return.
+
+        Returns:
+            list[int]: Job ids, least recently used first.
+        """
+        with closing(self._connect()) as conn, conn:
+            rows = conn.execute(
+                f"""
+                SELECT job_id FROM job_storage
+                JOIN transcriptions ON transcriptions.id = job_storage.job_id
+                WHERE tier < ? AND NOT (progress < 100 AND {NOT_LOCKED_SQL})
+                ORDER BY accessed, job_id LIMIT ?
+                """,
+                (tier, limit),
+            ).fetchall()
+            return [row[0] for row in rows]
+
+    def record_eviction(self, job_id: int, tier: int, freed: int) -> None:
+        """
+        Mark a job as evicted to ``tier`` and take the freed bytes off its size.
+
+        Args:
+            job_id (int): The job id.
+            tier (int): The tier applied.
+            freed (int): Bytes deleted.
+
+        Returns:
+            None
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "UPDATE job_storage SET tier=?, bytes=MAX(bytes - ?, 0) WHERE job_id=?",
+                (tier, freed, job_id),
+            )
+
+    def acquire_lease(self, name: str, holder: str, seconds: float, now: float = None) -> bool:
+        """
+        Take or renew the named lease. It is free once its holder has let it
+        lapse, so a holder that dies is replaced within ``seconds``.
+
+        Args:
+            name (str): Lease name.
+            holder (str): Id of the would-be holder.
+            seconds (float): Lease duration from now.
+            now (float): Current time (default: time.time()).
+
+        Returns:
+            bool: True if ``holder`` holds the lease until now + seconds.
+        """
+        now = time.time() if now is None else now
+        with closing(self._connect()) as conn, conn:
+            conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.execute(
+                """
+                INSERT INTO leases (name, holder, until) VALUES (?, ?, ?)
+                ON CONFLICT (name) DO UPDATE SET holder=excluded.holder, until=excluded.until
+                WHERE leases.holder=excluded.holder OR leases.until < ?
+                """,
+                (name, holder, now + seconds, now),
+            )
+            return cursor.rowcount == 1
+
+    def release_lease(self, name: str, holder: str) -> None:
+        """
+        Give up the named lease, if ``holder`` still holds it.
+
+        Args:
+            name (str): Lease name.
+            holder (str): Id of the holder.
+
+        Returns:
+            None
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM leases WHERE name=? AND holder=?", (name, holder))
+
+    def take_rate_token(self, name: str, rate: float, burst: float) -> float:
+        """
+        Take one token from the named token bucket. Jobs run in separate
+        worker processes, so the bucket lives here rather than in memory:
+        concurrent jobs share one budget.
+
+        Args:
+            name (str): Bucket name.
+            rate (float): Refill rate, tokens per second.
+            burst (float): Bucket capacity (a full bucket starts with this).
+
+        Returns:
+            float: 0 if a token was taken, otherwise the seconds until one is
+            available (nothing is taken; call again after waiting).
+        """
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            # Lock before reading so two processes cannot spend one token.
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT tokens, updated FROM rate_limits WHERE name=?", (name,)
+            ).fetchone()
+            if row is None or now < row["updated"]:  # new, or the clock stepped back
+                tokens = burst
+            else:
+                tokens = min(burst, row["tokens"] + (now - row["updated"]) * rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+            if not wait:
+                tokens -= 1
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limits (name, tokens, updated) VALUES (?, ?, ?)",
+                (name, tokens, now),
+            )
+        return wait
+
+    def index_transcript(self, job_id: int, segments) -> None:
+        """
+        Make a finished job's segments searchable, replacing any earlier
+        entries for the job.
+
+        Args:
+            job_id (int): The job id.
+            segments (Segments): The final segments.
+
+        Returns:
+            None
+        """
+        first = job_id << _SEARCH_SHIFT
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "DELETE FROM transcript_search WHERE rowid BETWEEN ? AND ?",
+                (first, first + (1 << _SEARCH_SHIFT) - 1),
+            )
+            conn.executemany(
+                "INSERT INTO transcript_search (rowid, text, start_ms, end_ms) VALUES (?, ?, ?, ?)",
+                (
+                    (first + i, text, start, end)
+                    for i, (start, end, text) in zip(range(1 << _SEARCH_SHIFT), segments)
+                ),
+            )
+            conn.execute("INSERT OR IGNORE INTO transcript_indexed (job_id) VALUES (?)", (job_id,))
+
+    def is_transcript_indexed(self, job_id: int) -> bool:
+        """
+        Whether a job's transcript has been indexed (even if it was empty).
+
+        Args:
+            job_id (int): The job id.
+
+        Returns:
+            bool: True once index_transcript ran for it.
+        """
+        with closing(self._connect()) as conn, conn:
+            return conn.execute(
+                "SELECT 1 FROM transcript_indexed WHERE job_id=?", (job_id,)
+            ).fetchone() is not None
+
+    def unindexed_job_ids(self) -> list:
+        """
+        Finished jobs whose transcript isn't in the search index yet.
+
+        Returns:
+            list[int]: Their ids, oldest first.
+        """
+        with closing(self._connect()) as conn, conn:
+            return [
+                row[0] for row in conn.execute(
+                    """
+                    SELECT id FROM transcriptions
+                    WHERE progress = 100
+                    AND id NOT IN (SELECT job_id FROM transcript_indexed)
+                    ORDER BY id
+                    """
+                )
+            ]
+
+    def delete_transcript_index(self, job_id: int) -> None:
+        """
+        Remove a job's segments from the search index.
+
+        Args:
+            job_id (int): The job id.
+
+        Returns:
+            None
+        """
+        first = job_id << _SEARCH_SHIFT
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "DELETE FROM transcript_search WHERE rowid BETWEEN ? AND ?",
+                (first, first + (1 << _SEARCH_SHIFT) - 1),
+            )
+            conn.execute("DELETE FROM transcript_indexed WHERE job_id=?", (job_id,))
+
+    def search_transcripts(self, query: str, limit: int = 100, before: int = None):
+        """
+        Find segments containing every word of ``query`` in completed jobs,
+        newest job first. Walking rowids in order (rather than sorting by
+        relevance) lets SQLite stop after ``limit`` matches, however many
+        there are.
+
+        Args:
+            query (str): Words to look for.
+            limit (int): Maximum segments to return.
+            before (int): Continue after an earlier page (its ``cursor``).
+
+        Returns:
+            list[sqlite3.Row]: cursor, job_id, position, start_ms, end_ms and
+            text per matching segment.
+        """
+        expression = _match_expression(query)
+        if not expression:
+            return []
+        with closing(self._connect()) as conn, conn:
+            return conn.execute(
+                f"""
+                SELECT transcript_search.rowid AS cursor,
+                       transcript_search.rowid >> {_SEARCH_SHIFT} AS job_id,
+                       transcript_search.rowid & {(1 << _SEARCH_SHIFT) - 1} AS position,
+                       start_ms, end_ms, text
+                FROM transcript_search
+                JOIN transcriptions ON transcriptions.id = transcript_search.rowid >> {_SEARCH_SHIFT}
+                WHERE transcript_search MATCH ? AND transcript_search.rowid < ?
+                AND transcriptions.progress = 100
+                ORDER BY transcript_search.rowid DESC
+                LIMIT ?
+                """,
+                (expression, before if before is not None else 1 << 62, limit),
             ).fetchall()
 
     def delete_transcription(self, job_id: int) -> None:
         """
-        Delete a transcription record by job id.
+        Delete a transcription record (and its event log) by job id.
 
         Args:
             job_id (int): The job id.
@@ -276,3 +1144,7 @@ class transcriptionsDB:
         """
         with closing(self._connect()) as conn, conn:
             conn.execute("DELETE FROM transcriptions WHERE id=?", (job_id,))
+            conn.execute("DELETE FROM job_events WHERE job_id=?", (job_id,))
+            conn.execute("DELETE FROM job_storage WHERE job_id=?", (job_id,))
+            conn.execute("DELETE FROM job_queue WHERE job_id=?", (job_id,))
+            conn.execute("DELETE FROM job_owners WHERE job_id=?", (job_id,))
@@ -0,0 +1,100 @@
+"""
+DeepL client for the workers: a token bucket shared by every job (kept in
+transcriptions.db, so concurrent worker processes draw from one budget),
+exponential backoff on 429/5xx/connection errors, so bursts of jobs slow down
+instead of failing, and one connection-pooled ``deepl.Translator`` per process.
+
+Each job runs in its own worker process, so the Translator and its
+connections are reused only within a job (its batches, batch threads and
+pipeline chunks), not across jobs. Only the rate budget is shared between jobs.
+"""
+
+import os
+import random
+import time
+from functools import lru_cache
+
+import deepl
+from loguru import logger
+
+import metrics
+
+# Request budget shared by all jobs. DeepL does not publish per-key rate
+# limits; lower this if the logs show retries on 429. 0 disables throttling.
+DEEPL_REQUESTS_PER_SECOND = float(os.getenv("DEEPL_REQUESTS_PER_SECOND", "5"))
+DEEPL_MAX_RETRIES = int(os.getenv("DEEPL_MAX_RETRIES", "5"))
+BACKOFF_BASE = 1.0  # seconds before the first retry, doubled per attempt
+BACKOFF_MAX = 60.0
+
+# Retries happen here, through the shared bucket. The library's own retry loop
+# would bypass it and multiply every attempt by its own five.
+deepl.http_client.max_network_retries = 0
+
+
+@lru_cache(maxsize=None)
+def get_translator(auth_key: str, server_url: str = None) -> deepl.Translator:
+    """
+    The process's Translator for this key/endpoint. Its requests.Session keeps
+    connections alive across one job's batches, batch threads and pipeline
+    chunks; the next job's worker process opens its own.
+    """
+    return deepl.Translator(auth_key, server_url=server_url)
+
+
+def _retryable(error: deepl.DeepLException) -> bool:
+    if isinstance(error, (deepl.TooManyRequestsException, deepl.ConnectionException)):
+        return True
+    return (error.http_status_code or 0) >= 500
+
+
+def _throttle(db) -> None:
+    """Block until the shared bucket grants a request."""
+    if DEEPL_REQUESTS_PER_SECOND <= 0:
+        return
+    burst = max(1.0, DEEPL_REQUESTS_PER_SECOND)
+    waited = 0.0
+    while (wait := db.take_rate_token("deepl", DEEPL_REQUESTS_PER_SECOND, burst)) > 0:
+        time.sleep(wait)
+        waited += wait
+    if waited:
+        metrics.DEEPL_THROTTLED_SECONDS.labels("deepl").inc(waited)
+
+
+def translate_texts(
+    translator: deepl.Translator, texts: list[str], source_lang, target_lang: str, db
+) -> list[str]:
+    """
+    Translate one batch of texts, rate-limited and retried.
+
+    Args:
+        translator (deepl.Translator): From get_translator().
+        texts (list[str]): Texts for one request.
+        source_lang (str | None): Source language code, None to auto-detect.
+        target_lang (str): Target language code.
+        db (transcriptionsDB): Holds the shared token bucket.
+
+    Returns:
+        list[str]: One translation per text, in order.
+
+    Raises:
+        deepl.DeepLException: A non-retryable error, or the last retryable one
+        after DEEPL_MAX_RETRIES retries.
+    """
+    attempt = 0
+    while True:
+        _throttle(db)
+        try:
+            results = translator.translate_text(
+                texts, source_lang=source_lang, target_lang=target_lang
+            )
+            return [result.text for result in results]
+        except deepl.DeepLException as e:
+            if attempt >= DEEPL_MAX_RETRIES or not _retryable(e):
+                raise
+            delay = min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt) * random.uniform(0.5, 1.0)
+            attempt += 1
+            metrics.DEEPL_RETRIES.labels(type(e).__name__).inc()
+            logger.warning(
+                f"DeepL {type(e).__name__}; retry {attempt}/{DEEPL_MAX_RETRIES} in {delay:.1f}s"
+            )
+            time.sleep(delay)
@@ -0,0 +1,95 @@
+"""
+Stand-in for stable-ts, for benchmarking and load-testing everything around
+the model (spawn, DB writes, exports, zip, status) without downloading or
+running one. Select it with WHISPER_BACKEND=fake; the worker then imports
+``load_model`` from here instead of stable_whisper (and skips torch).
+
+The fake "transcribes" deterministically: one segment every
+FAKE_WHISPER_SEGMENT_SECONDS, its text a function of the segment's position
+only, so repeated runs produce identical output. Its cost is configurable:
+
+  * FAKE_WHISPER_RTF: seconds of (sleeping) work per second of audio
+  * FAKE_WHISPER_MEMORY_MB: memory held by the loaded model, touched so it
+    is resident and shows up in RSS like real weights
+  * FAKE_WHISPER_LOAD_SECONDS: time load_model() takes
+  * FAKE_WHISPER_AUDIO_SECONDS: duration to assume when ffprobe can't tell
+    (e.g. no ffmpeg on the box)
+"""
+
+import os
+import random
+import time
+from dataclasses import dataclass
+
+from utils import media_duration
+
+FAKE_WHISPER_RTF = float(os.getenv("FAKE_WHISPER_RTF", "0.05"))
+FAKE_WHISPER_MEMORY_MB = int(os.getenv("FAKE_WHISPER_MEMORY_MB", "0"))
+FAKE_WHISPER_LOAD_SECONDS = float(os.getenv("FAKE_WHISPER_LOAD_SECONDS", "0"))
+FAKE_WHISPER_SEGMENT_SECONDS = float(os.getenv("FAKE_WHISPER_SEGMENT_SECONDS", "3"))
+FAKE_WHISPER_AUDIO_SECONDS = float(os.getenv("FAKE_WHISPER_AUDIO_SECONDS", "60"))
+
+SAMPLE_RATE = 16000  # of the float arrays load_clip() hands over
+
+# Vocabulary of the fake transcripts; benchmarks/conftest.py builds its
+# synthetic ones from it too.
+WORDS = (
+    "the quick brown fox jumps over a lazy dog while seven wizards quietly "
+    "judge every boxing match near twelve old bridges"
+).split()
+
+
+def segment_text(position: int) -> str:
+    """The fake's text for the segment at ``position``: same position, same text."""
+    rng = random.Random(position)
+    return " ".join(rng.choices(WORDS, k=rng.randint(6, 14))).capitalize() + "."
+
+
+@dataclass
+class FakeSegment:
+    start: float
+    end: float
+    text: str
+
+
+@dataclass
+class FakeResult:
+    """The parts of a stable-ts WhisperResult the worker reads."""
+
+    segments: list
+    language: str
+
+
+class FakeWhisper:
+    """A loaded fake model. Holds FAKE_WHISPER_MEMORY_MB of resident memory."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._weights = bytearray(b"\x01") * (FAKE_WHISPER_MEMORY_MB * 1024 * 1024)
+
+    def transcribe(self, audio, language=None, **options) -> FakeResult:
+        """
+        Segments covering ``audio``: a media path, or a clip of 16 kHz
+        samples from load_clip(). Clips are numbered from their own start, as
+        stable-ts does; transcribe_in_clips() shifts them.
+        """
+        if isinstance(audio, (str, os.PathLike)):
+            duration = media_duration(audio) or FAKE_WHISPER_AUDIO_SECONDS
+        else:
+            duration = len(audio) / SAMPLE_RATE
+        time.sleep(duration * FAKE_WHISPER_RTF)
+
+        segments = []
+        start = 0.0
+        while start < duration:
+            end = min(duration, start + FAKE_WHISPER_SEGMENT_SECONDS)
+            position = round(start / FAKE_WHISPER_SEGMENT_SECONDS)
+            segments.append(FakeSegment(start, end, " " + segment_text(position)))
+            start = end
+        return FakeResult(segments, language or "en")
+
+
+def load_model(name: str, **kwargs) -> FakeWhisper:
+    """Drop-in for stable_whisper.load_model (device etc. are ignored)."""
+    time.sleep(FAKE_WHISPER_LOAD_SECONDS)
+    return FakeWhisper(name)
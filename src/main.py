@@ -6,42 +6,96 @@
     - RESEND_API_KEY: Resend API key.
     - CONTACT_EMAIL: address that receives contact form submissions.
     - MAX_CONCURRENT_JOBS: max transcriptions running at once (default 2).
+    - PROFILE_JOBS: 'True' profiles every job's worker (default False; a
+      single job can opt in with the ``profile`` form field).
+    - OUTPUT_QUOTA_MB: disk budget for output/ (default 0 = none); least
+      recently used jobs are trimmed to fit, checked every
+      OUTPUT_QUOTA_SWEEP_SECONDS (default 60).
+    - STORAGE_BACKEND: 'local' (default) or 's3' to keep job files in an
+      S3-compatible bucket (S3_* settings; see storage.py).
+    - WORKER_MODE: 'local' (default) spawns each job's worker here; 'queue'
+      queues jobs for standalone workers (src/worker.py). MAX_CONCURRENT_JOBS
+      then caps queued + running jobs.
+    - WORKER_TOKEN: enables the /queue API that workers on other hosts use
+      instead of the database; they must send the same token.
+    - LEADER_LEASE_SECONDS: with several web processes (uvicorn --workers N),
+      one leader runs the sweeps; a dead leader is replaced within this time
+      (default 30).
+    - OUTPUT_DIR: where jobs and transcriptions.db live (default output/ next
+      to src/). Read at import, so set it in the process environment.
+    - PROMETHEUS_MULTIPROC_DIR: where web and worker processes write /metrics
+      samples (default $OUTPUT_DIR/metrics; exited processes' files are removed
+      at startup).
 """
 
 import asyncio
+import gzip
+import hmac
 import html
+import json
 import os
+import socket
+import sqlite3
 import time
 import uuid
-import zipfile
 from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
 from pathlib import Path
 from typing import Optional
 
+import brotli
 import resend
 from dotenv import load_dotenv
 from fastapi import FastAPI, File, Form, Request, UploadFile
 from fastapi.concurrency import run_in_threadpool
 from fastapi.exceptions import HTTPException
-from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
+from fastapi.responses import (
+    FileResponse,
+    HTMLResponse,
+    JSONResponse,
+    RedirectResponse,
+    Response,
+    StreamingResponse,
+)
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from loguru import logger
 
+import metrics
 import status as job_status  # aliased: the /status route defines a `status` name
 from db import transcriptionsDB
 from deepl_languages import SOURCE_LANGUAGES, TARGET_LANGUAGES
+from segments import SegmentIndex
 from utils import (
+    CANONICAL_EXPORT,
+    EXPORT_FORMATS,
     MAX_UPLOAD_SIZE_MB,
+    OUTPUT_QUOTA_MB,
     RETENTION_DAYS,
+    TEXT_EXPORT_FORMATS,
     cleanup_files,
+    enforce_output_quota,
+    fetch,
+    fetch_job,
     handle_transcription,
+    index_unsearchable_jobs,
+    is_process_alive,
     is_valid_media_file,
     is_valid_youtube_url,
     is_worker_alive,
+    job_dir,
+    job_media,
     kill_process_by_pid,
+    migrate_flat_layout,
+    process_identity,
     purge_expired_jobs,
     reap_workers,
+    render_export,
+    segment_index,
+    stored_url,
+    stream_zip,
+    worker_rss,
+    zip_members,
 )
 
 load_dotenv()
@@ -49,7 +103,7 @@ load_dotenv()
 BASE_DIR = Path(__file__).resolve().parent
 STATIC_DIR = BASE_DIR.parent / "static"
 TEMPLATES_DIR = BASE_DIR.parent / "templates"
-OUTPUT_DIR = BASE_DIR.parent / "output"
+OUTPUT_DIR = Path(os.getenv("OUTPUT_DIR", BASE_DIR.parent / "output"))
 
 for directory in [STATIC_DIR, TEMPLATES_DIR, OUTPUT_DIR]:
     directory.mkdir(parents=True, exist_ok=True)
@@ -60,16 +114,147 @@ templates = Jinja2Templates(directory=TEMPLATES_DIR)
 
 DB = transcriptionsDB(str(OUTPUT_DIR / "transcriptions.db"))
 
-# Workers from a previous container run can never finish their jobs.
-_orphans = DB.mark_orphans_as_error()
-if _orphans:
-    logger.warning(f"Marked {_orphans} unfinished jobs from a previous run as Error")
 
-# Reclaim disk from old jobs so a long-running self-host doesn't fill up.
-purge_expired_jobs()
+@app.middleware("http")
+async def _observe_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    # The route template ("/status", "/{path}"), never the raw URL: raw paths
+    # and query strings would make the label set unbounded.
+    route = getattr(request.scope.get("route"), "path", "<unmatched>")
+    metrics.HTTP_REQUEST_SECONDS.labels(
+        request.method, route, str(response.status_code)
+    ).observe(time.perf_counter() - started)
+    return response
+
+# The web tier may run as several processes (uvicorn --workers N); each imports
+# this module and serves requests. The housekeeping below — recovering orphaned
+# jobs, migrating and sweeping output/ — is done by one of them, the leader,
+# which holds a lease in the database and renews it every third of
+# LEADER_LEASE_SECONDS. If the leader dies, another process takes over once
+# the lease lapses and redoes the takeover work (_take_over).
+PROCESS_NAME = f"{socket.gethostname()}:{os.getpid()}"
+LEADER_LEASE = "web-leader"
+LEADER_LEASE_SECONDS = float(os.getenv("LEADER_LEASE_SECONDS", "30"))
+_leader = False
+
+
+def _job_liveness() -> list:
+    """
+    (job_id, pid, alive) for each in-flight job: whether something is still
+    working on it, in any web process — its worker process (pid > 0), the
+    queue (WORKER_MODE=queue; worker.py recovers those), or else the web
+    process preparing it, per the owner recorded when it was accepted. Jobs
+    without an owner predate that record and are taken as abandoned.
+    """
+    active = DB.get_active_jobs()
+    queued = {job_id for job_id, _worker, _leased in DB.get_queue()}
+    owners = DB.get_job_owners([job_id for job_id, pid, _created_at in active if not pid])
+    jobs = []
+    for job_id, pid, _created_at in active:
+        if job_id in queued:
+            alive = True
+        elif pid:
+            alive = is_worker_alive(pid)
+        else:
+            alive = job_id in owners and is_process_alive(*owners[job_id])
+        jobs.append((job_id, pid, alive))
+    return jobs
+
+
+def _worker_died(job_id: int) -> str:
+    return job_status.worker_died(
+        f"Details in {os.path.relpath(job_dir(job_id) / 'logs.txt', BASE_DIR.parent)}."
+    )
 
-# The startup sweep above only fires on (re)start; a container that runs for
-# weeks without restarting would still accumulate. Also sweep on an interval.
+
+def _recover_orphaned_jobs() -> int:
+    """
+    Fail the jobs nobody is working on any more, so the frontend stops
+    polling them and they no longer count against MAX_CONCURRENT_JOBS. Jobs
+    of live processes are left alone, whichever web process accepted them.
+    """
+    n = 0
+    abandoned = []
+    for job_id, pid, alive in _job_liveness():
+        if alive:
+            continue
+        if pid:
+            n += DB.mark_orphans_as_error([job_id], _worker_died(job_id))
+        else:  # its web process died while downloading or converting
+            abandoned.append(job_id)
+    n += DB.mark_orphans_as_error(abandoned)
+    if n:
+        logger.warning(f"Marked {n} abandoned job(s) as Error")
+    return n
+
+
+def _take_over() -> None:
+    """Housekeeping for a new leader: the tier just started, or its leader died."""
+    _recover_orphaned_jobs()
+    # Jobs saved before the sharded output layout (see utils.job_dir).
+    migrate_flat_layout()
+    # Reclaim disk from old jobs so a long-running self-host doesn't fill up.
+    purge_expired_jobs()
+    # Samples from exited processes would otherwise be summed forever.
+    metrics.reset()
+
+
+def _elect() -> bool:
+    """
+    Take or renew the leader lease; a leader also recovers orphaned jobs on
+    every renewal. Returns True when this process has just become the leader
+    (after running _take_over).
+    """
+    global _leader
+    was_leader = _leader
+    _leader = DB.acquire_lease(LEADER_LEASE, PROCESS_NAME, LEADER_LEASE_SECONDS)
+    if _leader and not was_leader:
+        logger.info(f"{PROCESS_NAME} is now the leader of the web tier")
+        _take_over()
+        return True
+    if was_leader and not _leader:
+        logger.warning(f"{PROCESS_NAME} lost the leader lease")
+    elif _leader:
+        _recover_orphaned_jobs()
+    return False
+
+
+async def _index_earlier_jobs() -> None:
+    # Jobs that finished before /search existed; in the background so a long
+    # history doesn't hold up startup.
+    try:
+        await run_in_threadpool(index_unsearchable_jobs)
+    except Exception as e:
+        logger.warning(f"Indexing earlier jobs for search failed: {e}")
+
+
+@app.on_event("startup")
+async def _schedule_leader_election() -> None:
+    async def _loop() -> None:
+        while True:
+            await asyncio.sleep(LEADER_LEASE_SECONDS / 3)
+            try:
+                if await run_in_threadpool(_elect):
+                    asyncio.create_task(_index_earlier_jobs())
+            except Exception as e:  # e.g. the database is briefly locked
+                logger.warning(f"Leader election failed: {e}")
+
+    # The first election runs before serving, as the startup sweeps always did.
+    if await run_in_threadpool(_elect):
+        asyncio.create_task(_index_earlier_jobs())
+    asyncio.create_task(_loop())
+
+
+@app.on_event("shutdown")
+async def _resign() -> None:
+    # Hand over at once on a clean stop instead of after the lease lapses.
+    if _leader:
+        DB.release_lease(LEADER_LEASE, PROCESS_NAME)
+
+
+# The takeover sweep only fires on (re)start or failover; a container that runs
+# for weeks would still accumulate. The leader also sweeps on an interval.
 RETENTION_SWEEP_HOURS = int(os.getenv("RETENTION_SWEEP_HOURS", "12"))
 
 
@@ -81,6 +266,8 @@ async def _schedule_retention_sweep() -> None:
     async def _loop() -> None:
         while True:
             await asyncio.sleep(RETENTION_SWEEP_HOURS * 3600)
+            if not _leader:
+                continue
             try:
                 await run_in_threadpool(purge_expired_jobs)
             except Exception as e:  # never let a sweep error kill the loop
@@ -90,8 +277,34 @@ async def _schedule_retention_sweep() -> None:
     logger.info(f"Periodic retention sweep armed: every {RETENTION_SWEEP_HOURS}h")
 
 
+# The disk quota works in small passes (utils.enforce_output_quota), so it
+# runs often rather than as one big sweep.
+OUTPUT_QUOTA_SWEEP_SECONDS = int(os.getenv("OUTPUT_QUOTA_SWEEP_SECONDS", "60"))
+
+
+@app.on_event("startup")
+async def _schedule_quota_sweep() -> None:
+    if OUTPUT_QUOTA_MB <= 0:
+        return
+
+    async def _loop() -> None:
+        while True:
+            try:
+                if _leader:
+                    await run_in_threadpool(enforce_output_quota)
+            except Exception as e:  # never let a pass error kill the loop
+                logger.warning(f"Output quota pass failed: {e}")
+            await asyncio.sleep(max(OUTPUT_QUOTA_SWEEP_SECONDS, 1))
+
+    asyncio.create_task(_loop())
+    logger.info(
+        f"Output quota armed: {OUTPUT_QUOTA_MB} MB, checked every {OUTPUT_QUOTA_SWEEP_SECONDS}s"
+    )
+
+
 # uvicorn doesn't reap the fire-and-forget worker subprocesses, so a finished or
-# killed worker would linger as a zombie. Reap ours on a short interval.
+# killed worker would linger as a zombie. Reap ours on a short interval — every
+# web process, not just the leader: only a worker's parent can wait() on it.
 REAP_INTERVAL_SECONDS = int(os.getenv("REAP_INTERVAL_SECONDS", "10"))
 
 
@@ -144,6 +357,103 @@ async def health():
     return {"status": "ok"}
 
 
+class _JobsCollector:
+    """
+    Job gauges computed at scrape time from the DB and the live worker
+    processes, so they are right no matter which process spawned the job.
+    """
+
+    def collect(self):
+        active = metrics.GaugeMetricFamily(
+            "txtify_jobs_active", "Jobs with a live transcription worker."
+        )
+        queued = metrics.GaugeMetricFamily(
+            "txtify_jobs_queued",
+            "Accepted jobs with no worker yet (downloading, converting or queued).",
+        )
+        rss = metrics.GaugeMetricFamily(
+            "txtify_worker_rss_bytes", "Resident memory of each live worker.",
+            labels=["job_id"],
+        )
+        n_active = n_queued = 0
+        # WORKER_MODE=queue: standalone workers, maybe in other containers.
+        leases = {job_id: leased for job_id, _worker, leased in DB.get_queue()}
+        for job_id, pid, _created_at in DB.get_active_jobs():
+            if job_id in leases:
+                n_active += bool(leases[job_id])
+                n_queued += not leases[job_id]
+                continue
+            if not pid:
+                n_queued += 1
+                continue
+            used = worker_rss(pid)
+            if used is not None:  # else dead, or the pid was recycled
+                rss.add_metric([str(job_id)], used)
+                n_active += 1
+        active.add_metric([], n_active)
+        queued.add_metric([], n_queued)
+        limit = metrics.GaugeMetricFamily(
+            "txtify_jobs_max_concurrent", "MAX_CONCURRENT_JOBS.", value=MAX_CONCURRENT_JOBS
+        )
+        output = metrics.GaugeMetricFamily(
+            "txtify_output_bytes",
+            "Measured disk usage of finished jobs (tracked with OUTPUT_QUOTA_MB).",
+            value=DB.storage_usage(),
+        )
+        return [active, queued, rss, limit, output]
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """
+    Prometheus scrape endpoint: job gauges plus the histograms/counters written
+    by the web process and every worker (see metrics.py).
+    """
+    body, content_type = await run_in_threadpool(metrics.render, _JobsCollector())
+    return Response(content=body, media_type=content_type)
+
+
+# Off-host workers (worker.py with QUEUE_URL) can't open transcriptions.db, so
+# they call these DB methods through /queue/<method> instead
+# (queue_client.QueueClient): the queue itself, their jobs' rows, and the
+# translation memory and DeepL budget their subprocesses share. Off unless
+# WORKER_TOKEN is set; workers send it as a bearer token.
+WORKER_TOKEN = os.getenv("WORKER_TOKEN", "")
+QUEUE_API_METHODS = frozenset({
+    "claim_job",
+    "renew_lease",
+    "release_job",
+    "get_transcription",
+    "update_transcription_status",
+    "index_transcript",
+    "get_stage_durations",
+    "get_translations",
+    "put_translations",
+    "take_rate_token",
+})
+
+
+@app.post("/queue/{method}", response_class=JSONResponse)
+async def queue_api(method: str, request: Request):
+    """
+    Call ``DB.<method>`` with the JSON body as keyword arguments, for an
+    off-host worker. Returns ``{"result": ...}``.
+    """
+    token = request.headers.get("authorization", "").encode("utf-8")
+    if not WORKER_TOKEN or not hmac.compare_digest(token, f"Bearer {WORKER_TOKEN}".encode("utf-8")):
+        raise HTTPException(status_code=403, detail="Invalid or missing worker token")
+    if method not in QUEUE_API_METHODS:
+        raise HTTPException(status_code=404, detail=f"Unknown queue method: {method}")
+    try:
+        kwargs = await request.json()
+        result = await run_in_threadpool(getattr(DB, method), **kwargs)
+    except (TypeError, ValueError) as e:  # bad JSON or arguments
+        raise HTTPException(status_code=400, detail=str(e))
+    if isinstance(result, sqlite3.Row):
+        result = dict(result)
+    return {"result": result}
+
+
 @app.get("/faq", response_class=HTMLResponse)
 async def faq(request: Request):
     """
@@ -185,6 +495,11 @@ def _duration_secs(created_at: str, completed_at: str):
         return None
 
 
+def _fmt_stages(stages: dict) -> str:
+    """One-line per-stage breakdown for the history page's duration tooltip."""
+    return " · ".join(f"{name} {secs:.1f}s" for name, secs in stages.items())
+
+
 def _status_class(status: str, progress: int) -> str:
     """Category used for the status badge color on the history page."""
     if job_status.is_canceled(status):
@@ -204,7 +519,9 @@ async def history(request: Request):
     if not ENABLE_HISTORY:
         raise HTTPException(status_code=404, detail="History is disabled.")
     jobs = []
-    for row in DB.list_jobs(limit=1000):
+    rows = DB.list_jobs(limit=1000)
+    stages = DB.get_stage_durations(row["id"] for row in rows)
+    for row in rows:
         # Downloadable once the exports exist (progress 100) and the job is not
         # canceled/errored — covers both success and "translation failed".
         downloadable = row["progress"] >= 100 and not job_status.is_locked(row["status"])
@@ -229,6 +546,7 @@ async def history(request: Request):
                 "source_is_url": bool(yt),
                 "duration": f"{secs}s" if secs is not None else "—",
                 "duration_secs": secs if secs is not None else -1,  # raw, for sorting
+                "stages": _fmt_stages(stages.get(row["id"], {})),
                 "model": MODEL_LABELS.get(row["model"], row["model"]),
                 "lang": lang_display,
                 "status": row["status"],
@@ -309,10 +627,9 @@ async def history_retry(pid: int):
     source_file = None
     if not youtube_url:
         # Reuse the previous upload's source if it hasn't been cleaned up.
-        candidates = [
-            f for f in OUTPUT_DIR.glob(f"{pid}_*")
-            if f.is_file() and not f.name.endswith("_logs.txt")
-        ]
+        candidates = job_media(pid)
+        if not candidates and await run_in_threadpool(fetch_job, pid, True):
+            candidates = job_media(pid)
         mp3s = [f for f in candidates if f.suffix == ".mp3"]
         chosen = mp3s or candidates
         if not chosen:
@@ -325,7 +642,7 @@ async def history_retry(pid: int):
     new_id = DB.insert_transcription(
         youtube_url, old["media_path"], old["language"], old["model"],
         old["translation"], old["language_translation"], old["file_export"],
-        job_status.PROCESSING, str(time.time()),
+        job_status.PROCESSING, str(time.time()), owner=process_identity(),
     )
     DB.update_transcription_status(job_status.PROCESSING, "", 10, new_id)
     started = await run_in_threadpool(
@@ -418,24 +735,12 @@ async def submit_contact(
 
 def _count_active_jobs() -> int:
     """
-    Number of jobs genuinely in flight. Rows with pid=0 are still in the
-    download phase — counted only while recent, so a row orphaned by a server
-    crash mid-download can't wedge the concurrency cap forever.
+    Number of jobs genuinely in flight: with a live worker, in the job queue
+    (WORKER_MODE=queue) until a worker finishes them, or still downloading
+    in a live web process — any of them, not just this one. A row orphaned
+    by a crash mid-download can't wedge the concurrency cap.
     """
-    now = time.time()
-    count = 0
-    for _job_id, pid, created_at in DB.get_active_jobs():
-        if pid:
-            if is_worker_alive(pid):
-                count += 1
-        else:
-            try:
-                recent = now - float(created_at) < 3600
-            except (TypeError, ValueError):
-                recent = False
-            if recent:
-                count += 1
-    return count
+    return sum(alive for _job_id, _pid, alive in _job_liveness())
 
 
 @app.post("/transcribe", response_class=JSONResponse)
@@ -446,9 +751,11 @@ async def transcribe(
     model: str = Form(...),
     translation: str = Form(...),
     language_translation: str = Form(...),
+    profile: bool = Form(False),
 ):
     """
-    Transcribe audio from YouTube or a media file.
+    Transcribe audio from YouTube or a media file. ``profile`` saves a CPU
+    profile and memory trace of the worker alongside the outputs.
     """
     file_export = "all"
 
@@ -509,6 +816,7 @@ async def transcribe(
         file_export,
         job_status.PROCESSING,
         str(time.time()),
+        owner=process_identity(),
     )
 
     DB.update_transcription_status(job_status.PROCESSING, "", 10, job_id)
@@ -525,6 +833,7 @@ async def transcribe(
         translation,
         language_translation,
         file_export,
+        profile=profile,
     )
 
     if not started:
@@ -578,12 +887,7 @@ async def status(pid: Optional[int] = None):
         already_terminal = job_status.is_locked(status_data["status"])
         if worker_pid and not already_terminal and not is_worker_alive(worker_pid):
             logger.error(f"Worker for job {pid} died without finishing")
-            died_msg = job_status.error(
-                "the transcription worker stopped unexpectedly. "
-                "This is usually the machine running out of memory for the "
-                "selected model — try a smaller model (e.g. base). "
-                f"Details in output/{pid}_logs.txt."
-            )
+            died_msg = _worker_died(pid)
             DB.update_transcription_status(died_msg, str(time.time()), 0, pid)
             return {
                 "progress": "0",
@@ -592,6 +896,7 @@ async def status(pid: Optional[int] = None):
                 "language": status_data["language"],
                 "translation": status_data["translation"],
                 "time_taken": "In Progress",
+                "stages": DB.get_stage_durations([pid]).get(pid, {}),
             }
     else:
         try:
@@ -600,12 +905,6 @@ async def status(pid: Optional[int] = None):
                 if status_data["created_at"]
                 else "In Progress"
             )
-            # No kill here: the worker exits on its own after its final
-            # DB write; kill_process_by_pid would be a no-op at best.
-            logs_file = OUTPUT_DIR / f"{pid}_logs.txt"
-            job_dir = OUTPUT_DIR / str(pid)
-            if logs_file.exists() and job_dir.exists():
-                logs_file.rename(job_dir / "logs.txt")
         except ValueError:
             time_taken = "Invalid data"
 
@@ -616,6 +915,9 @@ async def status(pid: Optional[int] = None):
         "language": status_data["language"],
         "translation": status_data["translation"],
         "time_taken": time_taken,
+        # Seconds per stage (prepare/download/convert/startup/load/...), from
+        # the job_events log; the current stage counts up while in flight.
+        "stages": DB.get_stage_durations([pid]).get(pid, {}),
     }
 
 
@@ -652,8 +954,85 @@ async def cancel_transcription(pid: Optional[int] = None):
     return {"message": "Transcription canceled successfully!"}
 
 
-@app.get("/download", response_class=FileResponse)
-async def download(pid: Optional[int] = None):
+# Finished jobs never change, so their exports are cacheable — but job ids
+# are reused once the newest job is deleted, so the lifetime is bounded
+# rather than forever, and the ETag still catches a reused id.
+FINISHED_CACHE_CONTROL = "private, max-age=86400, immutable"
+CONTENT_ENCODINGS = {"br": ".br", "gzip": ".gz"}  # preference order
+
+
+def _validators(*paths: Path) -> dict:
+    """ETag and Last-Modified for content built from these files."""
+    stats = [path.stat() for path in paths]
+    tag = "-".join(f"{st.st_mtime_ns:x}-{st.st_size:x}" for st in stats)
+    return {
+        "ETag": f'"{tag}"',
+        "Last-Modified": formatdate(max((st.st_mtime for st in stats), default=0), usegmt=True),
+        "Cache-Control": FINISHED_CACHE_CONTROL,
+    }
+
+
+def _not_modified(request: Request, headers: dict) -> Optional[Response]:
+    """A 304 if the client's cached copy is still current, else None."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match wins over If-Modified-Since (RFC 9110 13.1.3).
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        fresh = "*" in tags or headers["ETag"] in tags
+    else:
+        try:
+            since = parsedate_to_datetime(request.headers["if-modified-since"])
+            fresh = since >= parsedate_to_datetime(headers["Last-Modified"])
+        except (KeyError, TypeError, ValueError):
+            fresh = False
+    return Response(status_code=304, headers=headers) if fresh else None
+
+
+def _accepted_encodings(request: Request) -> set:
+    accepted = set()
+    for item in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = item.partition(";")
+        if params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _encode(request: Request, body: bytes, headers: dict) -> bytes:
+    """Compress a dynamic body for the client, updating headers to match."""
+    headers["Vary"] = "Accept-Encoding"
+    accepted = _accepted_encodings(request)
+    if "br" in accepted:
+        body, headers["Content-Encoding"] = brotli.compress(body, quality=5), "br"
+    elif "gzip" in accepted:
+        body, headers["Content-Encoding"] = gzip.compress(body, mtime=0), "gzip"
+    return body
+
+
+def _export_response(request: Request, path: Path) -> Response:
+    """
+    Serve a finished export with cache validators, answering 304 when the
+    client's copy is current, and its precompressed copy when the client
+    accepts it. Each encoding gets its own ETag, since the bytes differ.
+    """
+    accepted = _accepted_encodings(request)
+    for encoding, suffix in CONTENT_ENCODINGS.items():
+        encoded = path.with_name(path.name + suffix)
+        if encoding in accepted and encoded.exists():
+            headers = _validators(encoded)
+            headers["ETag"] = headers["ETag"][:-1] + f'-{encoding}"'
+            headers["Content-Encoding"] = encoding
+            break
+    else:
+        encoded, headers = path, _validators(path)
+    if path.suffix[1:] in TEXT_EXPORT_FORMATS:
+        headers["Vary"] = "Accept-Encoding"
+    return _not_modified(request, headers) or FileResponse(
+        path=encoded, filename=path.name, headers=headers
+    )
+
+
+@app.get("/download", response_class=StreamingResponse)
+async def download(request: Request, pid: Optional[int] = None):
     """
     Download the transcribed files as a zip.
     """
@@ -669,45 +1048,47 @@ async def download(pid: Optional[int] = None):
             status_code=404,
         )
 
-    folder_path = OUTPUT_DIR / str(pid)
-    zip_path = OUTPUT_DIR / f"{pid}.zip"
+    folder_path = job_dir(pid)
+    # From the store, if this node doesn't have (all of) the job.
+    await run_in_threadpool(fetch_job, pid)
     if not folder_path.exists():
         return JSONResponse(
             content={"message": "Transcription folder not found"}, status_code=404
         )
-
-    if not zip_path.exists():
-        # Build to a unique temp path then rename, so neither concurrent
-        # readers nor concurrent builders ever see a half-written zip;
-        # run off the event loop.
-        def build_zip():
-            tmp_path = OUTPUT_DIR / f"{pid}.zip.{uuid.uuid4().hex}.tmp"
-            with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-                for root, dirs, files in os.walk(folder_path):
-                    for file in files:
-                        file_path = Path(root) / file
-                        arcname = file_path.relative_to(folder_path)
-                        zipf.write(file_path, arcname)
-            tmp_path.rename(zip_path)
-
-        await run_in_threadpool(build_zip)
-
-    logger.info(f"Downloading zip file: {zip_path}")
-    if zip_path.exists():
-        return FileResponse(path=zip_path, filename=zip_path.name)
-
-    return JSONResponse(content={"message": "Zip file not found"}, status_code=404)
+    DB.touch_job(pid)
+
+    # The zip has every format, so render the ones nobody has asked for yet,
+    # then stream the archive as it is built: no temp zip on disk, and the
+    # first bytes go out immediately. Both steps run off the event loop.
+    # The validators cover every file that goes into the zip, so a repeat
+    # download is a 304 without building anything.
+    def prepare():
+        for fmt in EXPORT_FORMATS:
+            render_export(folder_path, fmt)
+        headers = _validators(*zip_members(folder_path))
+        if _not_modified(request, headers):
+            return headers, None, None
+        return headers, *stream_zip(folder_path)
+
+    headers, length, chunks = await run_in_threadpool(prepare)
+    if chunks is None:
+        return Response(status_code=304, headers=headers)
+    headers["Content-Disposition"] = f'attachment; filename="{pid}.zip"'
+    if length is not None:
+        headers["Content-Length"] = str(length)
+    logger.info(f"Streaming zip for job {pid} ({length or 'unknown'} bytes)")
+    return StreamingResponse(chunks, media_type="application/zip", headers=headers)
 
 
 @app.get("/downloadPreview", response_class=FileResponse)
-async def downloadPreview(pid: int, format: str):
+async def downloadPreview(request: Request, pid: int, format: str):
     """
     Download a preview of the transcribed file in a given format.
     """
     if format == "Text":
         format = "txt"
 
-    if format not in ["txt", "srt", "vtt", "sbv", "pdf"]:
+    if format not in EXPORT_FORMATS:
         return JSONResponse(content={"message": "Invalid file format"}, status_code=400)
 
     status_data = DB.get_transcription(pid)
@@ -717,47 +1098,49 @@ async def downloadPreview(pid: int, format: str):
             status_code=404,
         )
 
-    # The worker writes the final (possibly translated) exports as
-    # final_transcription.<ext>; transcription.txt is the raw whisper output.
-    file_path = OUTPUT_DIR / str(pid) / f"final_transcription.{format}"
+    DB.touch_job(pid)
+    # With object storage, an export this node hasn't got but the store has
+    # is downloaded straight from there.
+    local_path = job_dir(pid) / f"final_transcription.{format}"
+    if not local_path.exists() and (url := await run_in_threadpool(stored_url, local_path)):
+        return RedirectResponse(url, status_code=307)
+    # The final (possibly translated) exports are final_transcription.<ext>,
+    # rendered on first request; transcription.txt is the raw whisper output.
+    file_path = await run_in_threadpool(render_export, job_dir(pid), format)
     logger.info(f"Downloading file: {file_path}")
 
-    if file_path.exists():
-        return FileResponse(path=file_path, filename=file_path.name)
+    if file_path:
+        return _export_response(request, file_path)
     return JSONResponse(content={"message": "File not found"}, status_code=404)
 
 
 @app.get("/preview", response_class=JSONResponse)
-async def preview(pid: int):
+async def preview(request: Request, pid: int):
     """
     Fetch a preview of the transcribed files.
     """
-    files_dir = OUTPUT_DIR / str(pid)
+    files_dir = job_dir(pid)
     logger.info(f"Fetching preview in directory: {files_dir}")
 
-    txt_path = files_dir / "final_transcription.txt"
-    srt_path = files_dir / "final_transcription.srt"
-    vtt_path = files_dir / "final_transcription.vtt"
-    sbv_path = files_dir / "final_transcription.sbv"
+    # Every preview format is derived from the canonical SRT, so its
+    # validators cover the whole response and a repeat view reads nothing.
+    def read_exports():
+        if fetch(files_dir / CANONICAL_EXPORT):
+            DB.touch_job(pid)
+        headers = _validators(files_dir / CANONICAL_EXPORT)
+        if not_modified := _not_modified(request, headers):
+            return not_modified
+        contents = {}
+        for fmt in TEXT_EXPORT_FORMATS:
+            path = render_export(files_dir, fmt)
+            if path is None:
+                raise FileNotFoundError(files_dir / CANONICAL_EXPORT)
+            contents[fmt] = path.read_text(encoding="utf-8")
+        body = _encode(request, json.dumps(contents).encode("utf-8"), headers)
+        return Response(body, media_type="application/json", headers=headers)
 
     try:
-        with open(txt_path, "r", encoding="utf-8") as txt_file:
-            txt_content = txt_file.read()
-        with open(srt_path, "r", encoding="utf-8") as srt_file:
-            srt_content = srt_file.read()
-        with open(vtt_path, "r", encoding="utf-8") as vtt_file:
-            vtt_content = vtt_file.read()
-        with open(sbv_path, "r", encoding="utf-8") as sbv_file:
-            sbv_content = sbv_file.read()
-
-        return JSONResponse(
-            content={
-                "txt": txt_content,
-                "srt": srt_content,
-                "vtt": vtt_content,
-                "sbv": sbv_content,
-            }
-        )
+        return await run_in_threadpool(read_exports)
     except FileNotFoundError:
         return JSONResponse(
             content={"message": "Preview not found"}, status_code=404
@@ -769,6 +1152,116 @@ async def preview(pid: int):
         )
 
 
+PREVIEW_PAGE_MAX = 1000  # segments per /segments page
+
+
+@app.get("/segments", response_class=JSONResponse)
+async def segments(
+    request: Request,
+    pid: int,
+    cursor: Optional[int] = None,
+    limit: int = 200,
+    start_ms: Optional[int] = None,
+    end_ms: Optional[int] = None,
+):
+    """
+    A page of a finished job's segments, so previews load incrementally
+    whatever the media's length. A page starts at ``cursor`` (a segment
+    position), or when there is none at the first segment still running at
+    ``start_ms``; ``end_ms`` ends the page before the first segment starting
+    at or after it. Pass the response's ``next_cursor`` (null at the end)
+    to continue.
+    """
+    if not 1 <= limit <= PREVIEW_PAGE_MAX or (cursor or 0) < 0:
+        return JSONResponse(
+            content={"message": f"cursor must be >= 0 and limit 1-{PREVIEW_PAGE_MAX}"},
+            status_code=400,
+        )
+    files_dir = job_dir(pid)
+
+    def read_page():
+        index_path = segment_index(files_dir)
+        if index_path is None:
+            raise FileNotFoundError(files_dir / CANONICAL_EXPORT)
+        DB.touch_job(pid)
+        headers = _validators(files_dir / CANONICAL_EXPORT)
+        if not_modified := _not_modified(request, headers):
+            return not_modified
+        with SegmentIndex(index_path, files_dir / CANONICAL_EXPORT) as index:
+            first = cursor if cursor is not None else index.find(start_ms or 0)
+            last = len(index) if end_ms is None else max(first, index.find_start(end_ms))
+            stop = min(first + limit, last)
+            page = {
+                "total": len(index),
+                "duration_ms": index.duration_ms,
+                "cursor": first,
+                "next_cursor": stop if stop < last else None,
+                "segments": [
+                    {"start": start, "end": end, "text": text}
+                    for start, end, text in index.read(first, stop)
+                ],
+            }
+        body = _encode(request, json.dumps(page).encode("utf-8"), headers)
+        return Response(body, media_type="application/json", headers=headers)
+
+    try:
+        return await run_in_threadpool(read_page)
+    except FileNotFoundError:
+        return JSONResponse(content={"message": "Preview not found"}, status_code=404)
+
+
+SEARCH_PAGE_MAX = 200  # matching segments per /search page
+
+
+@app.get("/search", response_class=JSONResponse)
+async def search(q: str = "", limit: int = 50, cursor: Optional[int] = None):
+    """
+    Find past transcripts mentioning every word of ``q``: the matching jobs,
+    newest first, each with its matching segments (times in ms). Pass the
+    response's ``next_cursor`` (null at the end) as ``cursor`` for more; a
+    job with many matches can continue on the next page.
+    """
+    # Searches everyone's transcripts, so it goes wherever the history goes.
+    if not ENABLE_HISTORY:
+        raise HTTPException(status_code=404, detail="History is disabled.")
+    if not q.strip() or not 1 <= limit <= SEARCH_PAGE_MAX:
+        return JSONResponse(
+            content={"message": f"q is required and limit must be 1-{SEARCH_PAGE_MAX}"},
+            status_code=400,
+        )
+
+    def run_search():
+        rows = DB.search_transcripts(q, limit, cursor)
+        matches = {}
+        for row in rows:
+            matches.setdefault(row["job_id"], []).append(row)
+        results = []
+        for job_id, job_matches in matches.items():
+            job = DB.get_transcription(job_id)
+            if not job:
+                continue
+            results.append(
+                {
+                    "job_id": job_id,
+                    "source": job["youtube_url"] or job["media_path"],
+                    "created": _fmt_time(job["created_at"]),
+                    "matches": [
+                        {
+                            "position": row["position"],
+                            "start": row["start_ms"],
+                            "end": row["end_ms"],
+                            "text": row["text"],
+                        }
+                        for row in sorted(job_matches, key=lambda row: row["position"])
+                    ],
+                }
+            )
+        next_cursor = rows[-1]["cursor"] if len(rows) == limit else None
+        return {"results": results, "next_cursor": next_cursor}
+
+    return JSONResponse(content=await run_in_threadpool(run_search))
+
+
 @app.post("/cleanup")
 async def cleanup(pid: int):
     """
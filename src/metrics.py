@@ -0,0 +1,152 @@
+"""
+Prometheus metrics shared by the web process and the worker subprocesses.
+
+Uses prometheus_client's multiprocess mode: every process writes its samples to
+mmap'd files in PROMETHEUS_MULTIPROC_DIR (default ``output/metrics``) and
+``/metrics`` aggregates them, so the workers — where the heavy lifting happens —
+contribute model-load, real-time-factor, stage and DeepL numbers even though
+they exit long before the next scrape. The env var is set here, before
+prometheus_client is imported (it picks its storage at import time), and is
+inherited by the spawned workers. Import prometheus_client only through this
+module for the same reason.
+
+Every metric below is labelled on purpose: labelled children create their
+files lazily, so a process leaves files only for the metrics it used.
+"""
+
+import os
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+MULTIPROC_DIR = Path(
+    os.environ.setdefault(
+        "PROMETHEUS_MULTIPROC_DIR",
+        str(Path(os.getenv("OUTPUT_DIR", BASE_DIR.parent / "output")) / "metrics"),
+    )
+)
+MULTIPROC_DIR.mkdir(parents=True, exist_ok=True)
+
+from prometheus_client import (  # noqa: E402  (must follow the env var above)
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily  # noqa: E402,F401  (re-export)
+
+# Stages run from sub-second (save) to an hour+ (large model on long media).
+STAGE_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 7200)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "txtify_http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route", "status"],
+)
+STAGE_SECONDS = Histogram(
+    "txtify_stage_duration_seconds",
+    "Time completed jobs spent in each stage (from job_events).",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+MODEL_LOAD_SECONDS = Histogram(
+    "txtify_model_load_seconds",
+    "Whisper model load time in the worker.",
+    ["model"],
+    buckets=STAGE_BUCKETS,
+)
+REALTIME_FACTOR = Histogram(
+    "txtify_realtime_factor",
+    "Transcription wall time divided by audio duration (lower is faster).",
+    ["model"],
+    buckets=(0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 3, 5, 10),
+)
+EVICTED_BYTES = Counter(
+    "txtify_output_evicted_bytes_total",
+    "Bytes freed by the output disk quota, by what was evicted (media/exports/job).",
+    ["what"],
+)
+DEEPL_REQUEST_SECONDS = Histogram(
+    "txtify_deepl_request_duration_seconds",
+    "DeepL translate call latency.",
+    ["outcome"],
+)
+DEEPL_FAILURES = Counter(
+    "txtify_deepl_failures_total",
+    "DeepL translate calls that raised, by exception type.",
+    ["reason"],
+)
+DEEPL_RETRIES = Counter(
+    "txtify_deepl_retries_total",
+    "DeepL calls retried after a 429/5xx/connection error, by exception type.",
+    ["reason"],
+)
+DEEPL_THROTTLED_SECONDS = Counter(
+    "txtify_deepl_throttled_seconds_total",
+    "Time spent waiting on the shared DeepL rate limit.",
+    ["bucket"],
+)
+
+TRANSLATION_MEMORY_LOOKUPS = Counter(
+    "txtify_translation_memory_lookups_total",
+    "Segments looked up in the translation memory, by result.",
+    ["result"],
+)
+TRANSLATION_MEMORY_SAVED_CHARS = Counter(
+    "txtify_translation_memory_saved_characters_total",
+    "Characters served from the translation memory instead of DeepL.",
+    ["target_lang"],
+)
+
+
+def reset() -> None:
+    """
+    Drop samples left by processes that have exited. Called by the web tier's
+    leader when it takes over (main._elect): at startup that clears the
+    previous run; after a failover it also drops this run's exited workers,
+    which Prometheus sees as a counter reset. Files of running processes —
+    sibling web processes, live workers — are kept, as their owners still
+    write to them. prometheus_client names each file ``<type>_<pid>.db``.
+    """
+    for file in MULTIPROC_DIR.glob("*.db"):
+        try:
+            os.kill(int(file.stem.rpartition("_")[2]), 0)
+        except ValueError:  # not a per-process file
+            continue
+        except ProcessLookupError:
+            file.unlink(missing_ok=True)
+        except PermissionError:  # running, as another user
+            pass
+
+
+def render(*collectors) -> tuple[bytes, str]:
+    """
+    Aggregate every process's samples plus scrape-time ``collectors``.
+
+    Returns:
+        tuple[bytes, str]: The exposition body and its content type.
+    """
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=str(MULTIPROC_DIR))
+    for collector in collectors:
+        registry.register(collector)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def serve(port: int) -> None:
+    """
+    Serve this host's samples (every process writing to MULTIPROC_DIR) on
+    ``port``, from a daemon thread. For a standalone worker whose directory
+    the web tier's /metrics can't read: a second scrape target.
+
+    Args:
+        port (int): TCP port; the exposition is served at any path.
+
+    Returns:
+        None
+    """
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=str(MULTIPROC_DIR))
+    start_http_server(port, registry=registry)
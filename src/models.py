@@ -5,24 +5,66 @@ optional translation, and updates the transcription database accordingly.
 """
 
 import os
-import re
+import queue
+import subprocess
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-import deepl
-import torch
 from dotenv import load_dotenv
 from loguru import logger
-from stable_whisper import load_model
 
+import metrics
 import status
-from db import transcriptionsDB
+from deepl_client import get_translator, translate_texts
 from deepl_languages import SOURCE_LANGUAGES, TARGET_LANGUAGES
-from utils import convert_to_formats
+from profiling import JobProfiler
+from segments import Segments
+from utils import (
+    CANONICAL_EXPORT,
+    MEDIA_DIR,
+    fetch,
+    job_dir,
+    media_duration,
+    open_db,
+    precompress,
+    publish_job,
+)
 
 load_dotenv()  # Load environment variables (e.g., DEEPL_API_KEY)
 
+# "fake" swaps stable-ts for fake_whisper.py: deterministic segments at a
+# configurable speed and memory footprint, no torch and no model download.
+WHISPER_BACKEND = os.getenv("WHISPER_BACKEND", "stable-ts").lower()
+if WHISPER_BACKEND == "fake":
+    from fake_whisper import load_model
+else:
+    import torch
+    from stable_whisper import load_model
+
 DEEPL_API_KEY = os.getenv("DEEPL_API_KEY")
+# Alternative API endpoint, e.g. the offline stand-in (scripts/deepl_mock.py).
+DEEPL_SERVER_URL = os.getenv("DEEPL_SERVER_URL") or None
+
+# Segments are sent to DeepL as arrays of texts, one request per batch, a few
+# batches in flight at once. DeepL caps a request at 50 texts and 128 KiB, so
+# batches stay well under both.
+DEEPL_BATCH_TEXTS = 50
+DEEPL_BATCH_BYTES = int(os.getenv("DEEPL_BATCH_BYTES", "30000"))
+DEEPL_CONCURRENCY = int(os.getenv("DEEPL_CONCURRENCY", "4"))
+
+# Reuse earlier translations of identical segments (retries, the same media in
+# several target languages, boilerplate) instead of paying DeepL again.
+TRANSLATION_MEMORY = os.getenv("TRANSLATION_MEMORY", "True").lower() == "true"
+
+# Pipelined translation: transcribe in clips of this many seconds and translate
+# each clip's segments while the model decodes the next one, so a translated
+# job finishes shortly after its last segment instead of transcription +
+# translation in series. Off by default: the clip seams cost a re-decoded
+# segment each and reset Whisper's context to a short prompt.
+PIPELINE_TRANSLATION = os.getenv("PIPELINE_TRANSLATION", "False").lower() == "true"
+PIPELINE_CLIP_SECONDS = int(os.getenv("PIPELINE_CLIP_SECONDS", "300"))
 
 MODELS = {
     "whisper_tiny": "openai/whisper-tiny",
@@ -42,14 +84,13 @@ STABLE_MODELS = {
 
 DEFAULT_MODEL = "whisper_base"
 
-device = "cuda:0" if torch.cuda.is_available() else "cpu"
-torch_dtype = torch.float16 if torch.cuda.is_available() else torch.float32
-
-BASE_DIR = Path(__file__).resolve().parent
-OUTPUT_DIR = BASE_DIR.parent / "output"
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+if WHISPER_BACKEND == "fake":
+    device, torch_dtype = "cpu", None
+else:
+    device = "cuda:0" if torch.cuda.is_available() else "cpu"
+    torch_dtype = torch.float16 if torch.cuda.is_available() else torch.float32
 
-DB = transcriptionsDB(str(OUTPUT_DIR / "transcriptions.db"))
+DB = open_db()  # the web tier's /queue API on an off-host worker
 
 
 def transcribe_audio(
@@ -59,6 +100,7 @@ def transcribe_audio(
     translation: str,
     language_translation: str,
     job_id: int,
+    profile: bool = False,
 ) -> None:
     """
     Transcribe an audio file using stable-whisper. Optionally translate the
@@ -71,6 +113,8 @@ def transcribe_audio(
         translation (str): Translation model or 'none' to skip translation.
         language_translation (str): Target language for translation.
         job_id (int): Database job id for tracking.
+        profile (bool): Save a cProfile + RSS trace into the job directory
+            (see profiling.py).
 
     Returns:
         None
@@ -90,20 +134,53 @@ def transcribe_audio(
 
     logger.info(f"Transcribing file: {file_path}")
 
+    pid_dir = job_dir(job_id)
+    profiler = JobProfiler(pid_dir) if profile else None
+    if profiler:
+        profiler.start()
+
     try:
+        translate = bool(
+            translation
+            and translation.lower() != "none"
+            and language.lower() != language_translation.lower()
+        )
+        source_lang = None
+        if translate:
+            if not TARGET_LANGUAGES.get(language_translation.upper()):
+                raise ValueError(
+                    f"Invalid target language code: {language_translation}"
+                )
+            # 'auto' -> None lets DeepL detect the source language itself.
+            source_lang = None if language.lower() == "auto" else language.upper()
+            if source_lang and source_lang not in SOURCE_LANGUAGES:
+                raise ValueError(f"Invalid source language code: {language}")
+
         logger.info("Loading stable-whisper model... Progress: 30%")
         DB.update_transcription_status(
             status.LOADING, "", 30, job_id
         )
 
         stable_model_name = STABLE_MODELS.get(MODELS.get(model, DEFAULT_MODEL), "base")
+        started = time.perf_counter()
         model_instance = load_model(stable_model_name, device=device, cpu_preload=True)
+        metrics.MODEL_LOAD_SECONDS.labels(stable_model_name).observe(
+            time.perf_counter() - started
+        )
 
         logger.info("Transcribing... Progress: 40%")
         DB.update_transcription_status(status.TRANSCRIBING, "", 40, job_id)
 
-        result = model_instance.transcribe(
-            file_path,
+        pid_dir.mkdir(parents=True, exist_ok=True)
+        # Prepared on another node (whose output/ may live elsewhere): take
+        # the media from the store.
+        if not Path(file_path).exists():
+            local_media = pid_dir / MEDIA_DIR / Path(file_path).name
+            if fetch(local_media):
+                file_path = str(local_media)
+        srt_file = pid_dir / "en_transcription.srt"
+        audio_secs = media_duration(file_path)
+        options = dict(
             language=None if language == "auto" else language,
             vad=True,
             word_timestamps=True,
@@ -111,161 +188,339 @@ def transcribe_audio(
             suppress_silence=True,
         )
 
-        pid_dir = OUTPUT_DIR / str(job_id)
-        pid_dir.mkdir(parents=True, exist_ok=True)
-        srt_file = pid_dir / "en_transcription.srt"
-
-        # Save transcription to .srt and .txt
-        result.to_srt_vtt(str(srt_file), word_level=False, segment_level=True)
-        result.to_txt(str(pid_dir / "transcription.txt"))
+        pipeline = None
+        started = time.perf_counter()
+        if translate and PIPELINE_TRANSLATION and audio_secs:
+            pipeline = TranslationPipeline(source_lang, language_translation, job_id)
+            segments = Segments.from_seconds(
+                transcribe_in_clips(
+                    model_instance, file_path, audio_secs, options, pipeline.submit
+                )
+            )
+        else:
+            segments = Segments.from_result(model_instance.transcribe(file_path, **options))
+        if audio_secs:
+            metrics.REALTIME_FACTOR.labels(stable_model_name).observe(
+                (time.perf_counter() - started) / audio_secs
+            )
 
         logger.info("Saving transcription... Progress: 70%")
         DB.update_transcription_status(status.SAVING, "", 70, job_id)
 
+        # The untranslated whisper output, kept next to the final exports.
+        segments.write_srt(srt_file)
+        segments.write_text(pid_dir / "transcription.txt")
         logger.info(f"Saved transcription to: {pid_dir / 'transcription.txt'}")
-        with open(pid_dir / "transcription.txt", "r", encoding="utf-8") as f:
-            transcription = f.read()
+        # One text per segment: translated 1:1, so every line keeps its own
+        # timestamps.
+        transcription = segments.texts
 
         # Perform translation if requested
         translation_failed = False
-        if (
-            translation
-            and translation.lower() != "none"
-            and language.lower() != language_translation.lower()
-        ):
+        if translate:
             logger.info("Translating... Progress: 85%")
             DB.update_transcription_status(status.TRANSLATING, "", 85, job_id)
             logger.info(f"Translating from {language} to {language_translation}")
-            if not TARGET_LANGUAGES.get(language_translation.upper()):
-                raise ValueError(
-                    f"Invalid target language code: {language_translation}"
+            if pipeline:
+                # Most segments are already translated; wait for the tail.
+                transcription, translation_failed = pipeline.finish()
+            else:
+                transcription, translation_failed = deepl_translate(
+                    transcription, source_lang, language_translation, job_id
                 )
-            # 'auto' -> None lets DeepL detect the source language itself.
-            source_lang = None if language.lower() == "auto" else language.upper()
-            if source_lang and source_lang not in SOURCE_LANGUAGES:
-                raise ValueError(f"Invalid source language code: {language}")
-            transcription, translation_failed = deepl_translate(
-                transcription, source_lang, language_translation, job_id
-            )
-
-        srt_file = str(pid_dir / "en_transcription.srt")
-        translated_text_file = str(pid_dir / "final_transcription.txt")
 
-        # Save final timestamps with translation
-        transcription = save_final_transcription(
-            srt_file, transcription, translated_text_file
+        # Save final timestamps with translation. Only this canonical SRT is
+        # written here; the web app renders txt/vtt/sbv/pdf from it on first
+        # request (utils.render_export).
+        final = save_final_transcription(
+            segments, transcription, str(pid_dir / CANONICAL_EXPORT)
         )
-
-        logger.info("Exporting transcription... Progress: 90%")
-        DB.update_transcription_status(status.EXPORTING, "", 90, job_id)
-        convert_to_formats(transcription, str(translated_text_file), "all")
+        precompress(pid_dir / CANONICAL_EXPORT)
 
         final_status = (
             status.COMPLETED_TRANSLATION_FAILED
             if translation_failed
             else status.COMPLETED
         )
+        # Before the final write: a downloadable job must already have them.
+        if profiler:
+            profiler.stop()
+            profiler = None
+        publish_job(job_id)
         logger.info(f"{final_status} Progress: 100%")
-        DB.update_transcription_status(final_status, str(time.time()), 100, job_id)
+        # Searchable only once completed: a job canceled before this write
+        # keeps its Canceled status and stays out of the index.
+        if DB.update_transcription_status(final_status, str(time.time()), 100, job_id):
+            DB.index_transcript(job_id, final)
+        for stage, secs in DB.get_stage_durations([job_id]).get(job_id, {}).items():
+            metrics.STAGE_SECONDS.labels(stage).observe(secs)
 
     except Exception as e:
         logger.error(f"Transcription failed: {str(e)}. Progress: 0%")
+        if profiler:
+            profiler.stop()
         DB.update_transcription_status(status.ERROR, "", 0, job_id)
 
 
+def load_clip(file_path: str, start: float, length: float):
+    """
+    Decode ``length`` seconds of ``file_path`` from ``start`` into the 16 kHz
+    mono float32 array Whisper takes as input (ffmpeg seeks, so a clip late in
+    a long file costs no more than one at the start).
+    """
+    import numpy as np  # stable-ts dependency; only this mode needs it here
+
+    cmd = [
+        "ffmpeg", "-nostdin", "-v", "error",
+        "-ss", f"{start:.3f}", "-t", f"{length:.3f}", "-i", file_path,
+        "-f", "s16le", "-ac", "1", "-ar", "16000", "-",
+    ]
+    pcm = subprocess.run(cmd, capture_output=True, check=True).stdout
+    return np.frombuffer(pcm, np.int16).astype(np.float32) / 32768.0
+
+
+def transcribe_in_clips(
+    model_instance, file_path: str, duration: float, options: dict, on_segments
+) -> list[tuple[float, float, str]]:
+    """
+    Transcribe ``file_path`` in clips of PIPELINE_CLIP_SECONDS, handing each
+    clip's final segments to ``on_segments`` as soon as the clip is done.
+
+    stable-ts has no per-segment callback and regroups segments only once the
+    whole input is decoded, so a single transcribe() call cannot stream final
+    segments. Clips can: a non-final clip drops its last segment (it may be
+    cut mid-word) and the next clip starts where the kept ones end, with the
+    preceding text as prompt so wording and casing carry over.
+
+    Args:
+        model_instance: Loaded stable-whisper model.
+        file_path (str): Media file to transcribe.
+        duration (float): Media duration in seconds.
+        options (dict): Keyword arguments for ``model_instance.transcribe``.
+        on_segments (callable): Called with each clip's list of segment texts.
+
+    Returns:
+        list[tuple[float, float, str]]: (start, end, text) for every segment,
+        in absolute seconds.
+    """
+    options = dict(options)
+    segments = []
+    start = 0.0
+    while start < duration:
+        length = min(PIPELINE_CLIP_SECONDS, duration - start)
+        last_clip = start + length >= duration
+        result = model_instance.transcribe(
+            load_clip(file_path, start, length), **options
+        )
+        # Keep the language detected on the first clip; re-detecting per clip
+        # could switch languages mid-job.
+        options["language"] = options.get("language") or result.language
+
+        clip = [
+            (start + seg.start, start + seg.end, " ".join(seg.text.split()))
+            for seg in result.segments
+        ]
+        clip = [seg for seg in clip if seg[2]]
+        if not last_clip and len(clip) > 1:
+            clip.pop()
+            next_start = clip[-1][1]
+        else:
+            next_start = start + length
+        if clip:
+            segments.extend(clip)
+            on_segments([text for _, _, text in clip])
+            options["initial_prompt"] = " ".join(text for _, _, text in clip[-3:])
+        # Always move forward, even if the kept segments end where we began.
+        start = max(next_start, start + 1.0)
+    return segments
+
+
+class TranslationPipeline:
+    """
+    Translates transcript chunks on a background thread while the model keeps
+    decoding. ``submit()`` never blocks; ``finish()`` waits for the remainder
+    and returns the texts in submission order, one per submitted text.
+    """
+
+    def __init__(self, source_lang, target_lang: str, job_id: int):
+        self.source_lang = source_lang
+        self.target_lang = target_lang
+        self.job_id = job_id
+        self._chunks: queue.Queue = queue.Queue()
+        self._source: list[str] = []
+        self._translated: list[str] = []
+        self._failed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while (texts := self._chunks.get()) is not None:
+            if self._failed:
+                continue  # all-or-nothing: the job falls back to the originals
+            try:
+                translated, failed = deepl_translate(
+                    texts, self.source_lang, self.target_lang, self.job_id
+                )
+            except Exception as e:
+                # Keep draining until the sentinel so finish() never hangs.
+                logger.warning(f"Pipelined translation failed for job {self.job_id}: {e}")
+                translated, failed = [], True
+            self._failed = failed
+            self._translated.extend(translated)
+
+    def submit(self, texts: list[str]) -> None:
+        self._source.extend(texts)
+        self._chunks.put(list(texts))
+
+    def finish(self) -> tuple[list[str], bool]:
+        """
+        Returns:
+            tuple[list[str], bool]: Same contract as deepl_translate.
+        """
+        self._chunks.put(None)
+        self._thread.join()
+        if self._failed:
+            return self._source, True
+        return self._translated, False
+
+
+def _batches(texts: list[str]) -> list[list[int]]:
+    """
+    Group segment indexes into DeepL requests bounded by DEEPL_BATCH_TEXTS and
+    DEEPL_BATCH_BYTES (an oversized single segment gets a batch of its own).
+    """
+    batches, current, size = [], [], 0
+    for idx, text in enumerate(texts):
+        n = len(text.encode("utf-8"))
+        if current and (len(current) >= DEEPL_BATCH_TEXTS or size + n > DEEPL_BATCH_BYTES):
+            batches.append(current)
+            current, size = [], 0
+        current.append(idx)
+        size += n
+    if current:
+        batches.append(current)
+    return batches
+
 
 def deepl_translate(
-    text: str, source_lang, target_lang: str, job_id: int
-) -> tuple[str, bool]:
+    texts: list[str], source_lang, target_lang: str, job_id: int
+) -> tuple[list[str], bool]:
     """
-    Translate text using DeepL.
+    Translate transcript segments using DeepL.
+
+    Segments are whitespace-normalized and de-duplicated, then looked up in
+    the translation memory (a table in transcriptions.db); only the misses go
+    to DeepL, as arrays of texts in size-bounded batches issued concurrently.
+    DeepL returns one result per text, in order, so each translation maps back
+    to its own segment (and timestamps).
 
     Args:
-        text (str): Original text to translate.
+        texts (list[str]): Segment texts to translate.
         source_lang (str | None): Source language code, or None for DeepL
             auto-detection.
         target_lang (str): Target language code.
         job_id (int): Database job id for tracking.
 
     Returns:
-        tuple[str, bool]: (translated text, failed) — on failure the original
-        text is returned with failed=True so the job can finish honestly.
+        tuple[list[str], bool]: (translated segments, failed) — on failure the
+        original segments are returned with failed=True so the job can finish
+        honestly.
     """
-    logger.info(f"Translating text from {source_lang or 'auto'} to {target_lang}")
+    logger.info(
+        f"Translating {len(texts)} segments from {source_lang or 'auto'} to {target_lang}"
+    )
+    source_key, target_key = source_lang or "auto", target_lang.upper()
+
+    # DeepL rejects empty texts; blank segments stay blank.
+    keys = [" ".join(text.split()) for text in texts]
+    unique = list(dict.fromkeys(key for key in keys if key))
+    known = {}
+    if TRANSLATION_MEMORY:
+        try:
+            known = DB.get_translations(unique, source_key, target_key)
+        except Exception as e:  # locked/corrupt DB: the memory is only a cache
+            logger.warning(f"Translation memory lookup failed, translating everything: {e}")
+        metrics.TRANSLATION_MEMORY_LOOKUPS.labels("hit").inc(len(known))
+        metrics.TRANSLATION_MEMORY_LOOKUPS.labels("miss").inc(len(unique) - len(known))
+        metrics.TRANSLATION_MEMORY_SAVED_CHARS.labels(target_key).inc(
+            sum(len(key) for key in known)
+        )
+    misses = [key for key in unique if key not in known]
 
-    if not DEEPL_API_KEY:
+    if misses and not DEEPL_API_KEY:
         # Missing key must not kill an otherwise-finished transcription —
         # the job completes with the honest 'Completed (translation failed)'.
         logger.warning("DEEPL_API_KEY is not set; skipping translation.")
-        return text, True
+        return texts, True
+
+    fresh = {}
+
+    def translate_batch(batch: list[int]) -> None:
+        started = time.perf_counter()
+        try:
+            results = translate_texts(
+                translator, [misses[i] for i in batch], source_lang, target_key, DB
+            )
+        except Exception as e:
+            metrics.DEEPL_REQUEST_SECONDS.labels("error").observe(time.perf_counter() - started)
+            metrics.DEEPL_FAILURES.labels(type(e).__name__).inc()
+            raise
+        metrics.DEEPL_REQUEST_SECONDS.labels("ok").observe(time.perf_counter() - started)
+        for i, result in zip(batch, results):
+            fresh[misses[i]] = result
 
     try:
-        translator = deepl.Translator(DEEPL_API_KEY)
-        result = translator.translate_text(
-            text,
-            source_lang=source_lang,
-            target_lang=target_lang.upper(),
+        if misses:
+            translator = get_translator(DEEPL_API_KEY, DEEPL_SERVER_URL)
+            batches = _batches(misses)
+            with ThreadPoolExecutor(max_workers=max(1, DEEPL_CONCURRENCY)) as pool:
+                # list() re-raises the first failed batch here.
+                list(pool.map(translate_batch, batches))
+        logger.info(
+            f"Translated {len(unique)} unique segments: {len(known)} from the "
+            f"translation memory, {len(misses)} via DeepL"
         )
-        return result.text, False
     except Exception as e:
         # Degrade gracefully: keep the original text and let the job finish
         # (the caller reports the failure honestly in the final status).
         logger.warning(f"Translation failed, keeping original text: {str(e)}")
-        return text, True
+        return texts, True
+
+    if TRANSLATION_MEMORY and fresh:
+        try:
+            DB.put_translations(fresh, source_key, target_key)
+        except Exception as e:  # the translation itself succeeded
+            logger.warning(f"Could not store translations in the memory: {e}")
+    known.update(fresh)
+    return [known[key] if key else text for text, key in zip(texts, keys)], False
 
 
 def save_final_transcription(
-    srt_file_path: str, translated_text: str, output_file_path: str
-) -> str:
+    segments: Segments, translated_text: list[str], output_file_path: str
+) -> Segments:
     """
-    Combine SRT timestamps with translated lines to create a final transcription.
+    Pair the segment timestamps with the final (possibly translated) texts and
+    save the result as SRT blocks.
 
     Args:
-        srt_file_path (str): Path to the original SRT file.
-        translated_text (str): Translated transcription text.
+        segments (Segments): The transcribed segments.
+        translated_text (list[str]): One text per segment.
         output_file_path (str): Output file path for the merged result.
 
     Returns:
-        list[str]: The merged transcription as numbered SRT blocks.
+        Segments: The final segments.
     """
-    with open(srt_file_path, "r", encoding="utf-8") as srt_file:
-        srt_content = srt_file.readlines()
-
-    timestamps = []
-    timestamp_pattern = re.compile(
-        r"(\d{2}:\d{2}:\d{2},\d{3}) --> (\d{2}:\d{2}:\d{2},\d{3})"
-    )
-    for line in srt_content:
-        match = timestamp_pattern.match(line.strip())
-        if match:
-            timestamps.append((match.group(1), match.group(2)))
-
-    translated_lines = [line for line in translated_text.split("\n") if line.strip()]
-    if len(translated_lines) != len(timestamps):
-        # DeepL sometimes merges or splits lines. Align what matches, merge any
-        # extra lines into the last block, and pad missing ones instead of
-        # failing the whole job.
+    if len(translated_text) != len(segments):
+        # deepl_translate keeps texts 1:1, so this is a bug upstream; still
+        # align what matches rather than failing the whole job.
         logger.warning(
-            f"Timestamp/translation count mismatch: {len(timestamps)} timestamps "
-            f"vs {len(translated_lines)} lines. Aligning best-effort."
+            f"Timestamp/translation count mismatch: {len(segments)} timestamps "
+            f"vs {len(translated_text)} lines. Aligning best-effort."
         )
-        if len(translated_lines) > len(timestamps):
-            extra = " ".join(translated_lines[len(timestamps) - 1 :])
-            translated_lines = translated_lines[: len(timestamps) - 1] + [extra]
-        else:
-            # Pad with a visible placeholder, never "": the srt/vtt/sbv
-            # converters drop empty lines, which would mispair every
-            # (timestamp, text) couple after the pad point.
-            translated_lines += ["..."] * (len(timestamps) - len(translated_lines))
-
-    final_blocks = []
-    for idx, (start, end) in enumerate(timestamps):
-        final_blocks.append(
-            f"{idx + 1}\n{start} --> {end}\n{translated_lines[idx]}\n\n"
-        )
-
-    with open(output_file_path, "w", encoding="utf-8") as output_file:
-        output_file.writelines(final_blocks)
-
+    final = segments.with_texts(translated_text)
+    # Atomic: exports are rendered from this file as soon as it exists.
+    tmp_path = f"{output_file_path}.tmp"
+    final.write_srt(tmp_path)
+    os.replace(tmp_path, output_file_path)
     logger.info(f"Final translated transcription saved to: {output_file_path}")
-    return final_blocks
+    return final
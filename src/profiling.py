@@ -0,0 +1,85 @@
+"""
+Opt-in per-job profiling for the worker (PROFILE_JOBS=True, or the per-job
+``profile`` form field on /transcribe).
+
+Runs the job under cProfile and samples the worker's RSS on a background
+thread. The results land in the job directory, so /download ships them with
+the transcripts:
+
+  * ``profile.prof`` — raw cProfile stats (``snakeviz``/``pstats`` compatible)
+  * ``profile.txt``  — peak RSS plus the top functions by cumulative time
+  * ``memory.csv``   — ``unix_time,rss_bytes`` samples; join with the job's
+    ``job_events`` (same wall clock) to see memory per stage
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+from pathlib import Path
+
+import psutil
+from loguru import logger
+
+# Seconds between RSS samples. Whisper's allocations are large and slow-moving,
+# so 100 ms catches the peak without measurable overhead.
+SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_SECONDS", "0.1"))
+
+
+def enabled_by_env() -> bool:
+    """True if PROFILE_JOBS asks for this worker to be profiled."""
+    return os.getenv("PROFILE_JOBS", "False").lower() == "true"
+
+
+class JobProfiler:
+    """
+    cProfile + RSS sampler for one job. ``start()`` and ``stop()`` are explicit
+    (not a context manager) so the worker can stop before its final status
+    write — the files must exist by the time the job reads as downloadable.
+    """
+
+    def __init__(self, out_dir: Path):
+        self.out_dir = Path(out_dir)
+        self._profile = cProfile.Profile()
+        self._samples: list = []
+        self._done = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self) -> None:
+        process = psutil.Process()
+        while True:
+            self._samples.append((time.time(), process.memory_info().rss))
+            if self._done.wait(SAMPLE_INTERVAL):
+                return
+
+    def start(self) -> None:
+        self._sampler.start()
+        self._profile.enable()
+
+    def stop(self) -> None:
+        """Stop profiling and write the results. Never raises."""
+        self._profile.disable()
+        self._done.set()
+        self._sampler.join()
+        try:
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+            self._profile.dump_stats(str(self.out_dir / "profile.prof"))
+
+            peak = max((rss for _, rss in self._samples), default=0)
+            report = io.StringIO()
+            report.write(f"Peak RSS: {peak / 1024 / 1024:.1f} MiB\n\n")
+            pstats.Stats(self._profile, stream=report).sort_stats(
+                "cumulative"
+            ).print_stats(60)
+            (self.out_dir / "profile.txt").write_text(
+                report.getvalue(), encoding="utf-8"
+            )
+
+            with open(self.out_dir / "memory.csv", "w", encoding="utf-8") as f:
+                f.write("unix_time,rss_bytes\n")
+                f.writelines(f"{at:.3f},{rss}\n" for at, rss in self._samples)
+            logger.info(f"Profile saved to {self.out_dir} (peak RSS {peak} bytes)")
+        except Exception as e:  # profiling must never fail the job
+            logger.warning(f"Failed to save the job profile: {e}")
@@ -0,0 +1,84 @@
+"""
+The database as an off-host worker sees it: the web tier's ``/queue`` API
+(main.queue_api) instead of transcriptions.db, which only the web host can
+open (SQLite in WAL mode needs a local disk). utils.open_db() returns one of
+these when QUEUE_URL is set, so worker.py and the transcription subprocesses
+it spawns use it like a transcriptionsDB. Only the methods they call exist
+here; each is one POST of its arguments as JSON, authenticated with
+WORKER_TOKEN.
+
+A failed call raises OSError (urllib's URLError/HTTPError), which the callers
+already handle like a busy database: a claim is retried at the next poll, a
+lease renewal until the lease would lapse.
+"""
+
+import json
+import urllib.request
+
+TIMEOUT = 30  # seconds per call
+
+
+class QueueClient:
+    """transcriptionsDB's worker-side methods, over HTTP."""
+
+    def __init__(self, url: str, token: str, timeout: float = TIMEOUT):
+        self.url = url.rstrip("/")
+        self.token = token
+        self.timeout = timeout
+
+    def _call(self, method: str, **kwargs):
+        request = urllib.request.Request(
+            f"{self.url}/queue/{method}",
+            data=json.dumps(kwargs).encode("utf-8"),
+            headers={
+                "Authorization": f"Bearer {self.token}",
+                "Content-Type": "application/json",
+            },
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())["result"]
+
+    def claim_job(self, worker: str, lease_seconds: float, max_attempts: int):
+        claimed = self._call(
+            "claim_job", worker=worker, lease_seconds=lease_seconds, max_attempts=max_attempts
+        )
+        return tuple(claimed) if claimed else None
+
+    def renew_lease(self, job_id: int, worker: str, lease_seconds: float) -> bool:
+        return self._call("renew_lease", job_id=job_id, worker=worker, lease_seconds=lease_seconds)
+
+    def release_job(self, job_id: int, worker: str) -> None:
+        self._call("release_job", job_id=job_id, worker=worker)
+
+    def get_transcription(self, job_id: int):
+        return self._call("get_transcription", job_id=job_id)
+
+    def update_transcription_status(
+        self, status: str, completed_at: str, progress: int, job_id: int
+    ) -> bool:
+        return self._call(
+            "update_transcription_status",
+            status=status, completed_at=completed_at, progress=progress, job_id=job_id,
+        )
+
+    def index_transcript(self, job_id: int, segments) -> None:
+        self._call("index_transcript", job_id=job_id, segments=list(segments))
+
+    def get_stage_durations(self, job_ids) -> dict:
+        durations = self._call("get_stage_durations", job_ids=list(job_ids))
+        return {int(job_id): stages for job_id, stages in durations.items()}
+
+    def get_translations(self, texts, source_lang: str, target_lang: str) -> dict:
+        return self._call(
+            "get_translations", texts=list(texts), source_lang=source_lang, target_lang=target_lang
+        )
+
+    def put_translations(self, translations: dict, source_lang: str, target_lang: str) -> None:
+        self._call(
+            "put_translations",
+            translations=translations, source_lang=source_lang, target_lang=target_lang,
+        )
+
+    def take_rate_token(self, name: str, rate: float, burst: float) -> float:
+        return self._call("take_rate_token", name=name, rate=rate, burst=burst)
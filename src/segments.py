@@ -0,0 +1,244 @@
+"""
+Compact in-memory transcript: start/end times in milliseconds (``array('q')``)
+plus one text per segment. Built once from the stable-ts result and handed to
+translation and every exporter, so nothing re-parses SRT text downstream and
+timestamps can never drift out of step with their lines.
+
+For finished jobs, write_index()/SegmentIndex give random access to the
+canonical SRT by segment position or time, so a page of a long transcript
+never needs the whole file parsed.
+"""
+
+import bisect
+import mmap
+import re
+import struct
+from array import array
+from pathlib import Path
+
+_TIMESTAMP = re.compile(
+    r"(\d+):(\d{2}):(\d{2})[,.](\d{3}) --> (\d+):(\d{2}):(\d{2})[,.](\d{3})"
+)
+
+
+def timecode(ms: int, sep: str) -> str:
+    """Milliseconds -> ``HH:MM:SS<sep>mmm``."""
+    seconds, ms = divmod(ms, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02}:{minutes:02}:{seconds:02}{sep}{ms:03}"
+
+
+class Segments:
+    """Transcript segments as parallel arrays; iterates as (start_ms, end_ms, text)."""
+
+    __slots__ = ("starts", "ends", "texts")
+
+    def __init__(self):
+        self.starts = array("q")
+        self.ends = array("q")
+        self.texts: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def __iter__(self):
+        return zip(self.starts, self.ends, self.texts)
+
+    def append(self, start_ms: int, end_ms: int, text: str) -> None:
+        self.starts.append(start_ms)
+        self.ends.append(end_ms)
+        self.texts.append(text)
+
+    @classmethod
+    def from_seconds(cls, items) -> "Segments":
+        """
+        Build from (start, end, text) tuples in seconds. Whitespace (including
+        newlines) is collapsed, so every segment is exactly one line of text.
+        """
+        segments = cls()
+        for start, end, text in items:
+            segments.append(round(start * 1000), round(end * 1000), " ".join(text.split()))
+        return segments
+
+    @classmethod
+    def from_result(cls, result) -> "Segments":
+        """Build from a stable-ts WhisperResult."""
+        return cls.from_seconds((seg.start, seg.end, seg.text) for seg in result.segments)
+
+    @classmethod
+    def from_srt(cls, srt_file_path) -> "Segments":
+        """
+        Read an SRT file. Multi-line cue text is joined with spaces.
+
+        Args:
+            srt_file_path (str | Path): Path to the SRT file.
+
+        Returns:
+            Segments: The cues, in file order.
+        """
+        segments = cls()
+        text_lines = None
+        with open(srt_file_path, "r", encoding="utf-8") as srt_file:
+            for line in srt_file:
+                line = line.strip()
+                match = _TIMESTAMP.match(line)
+                if match:
+                    if text_lines is not None:
+                        segments.texts.append(" ".join(text_lines))
+                    h1, m1, s1, ms1, h2, m2, s2, ms2 = map(int, match.groups())
+                    segments.starts.append(((h1 * 60 + m1) * 60 + s1) * 1000 + ms1)
+                    segments.ends.append(((h2 * 60 + m2) * 60 + s2) * 1000 + ms2)
+                    text_lines = []
+                elif line and text_lines is not None:
+                    text_lines.append(line)
+                elif not line and text_lines is not None:
+                    segments.texts.append(" ".join(text_lines))  # blank line ends the cue
+                    text_lines = None
+        if text_lines is not None:
+            segments.texts.append(" ".join(text_lines))
+        return segments
+
+    def with_texts(self, texts: list[str]) -> "Segments":
+        """
+        Same timings, new texts (e.g. the translation). Blank texts become
+        "..." so no cue is empty. A count mismatch is aligned best-effort:
+        extra texts merge into the last segment, missing ones are padded.
+        """
+        texts = [text.strip() or "..." for text in texts]
+        n = len(self)
+        if len(texts) > n and n:
+            texts = texts[: n - 1] + [" ".join(texts[n - 1 :])]
+        texts = texts[:n] + ["..."] * (n - len(texts))
+
+        segments = Segments()
+        segments.starts = array("q", self.starts)
+        segments.ends = array("q", self.ends)
+        segments.texts = texts
+        return segments
+
+    def write_srt(self, file_path) -> None:
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.writelines(
+                f"{n}\n{timecode(start, ',')} --> {timecode(end, ',')}\n{text}\n\n"
+                for n, (start, end, text) in enumerate(self, 1)
+            )
+
+    def write_vtt(self, file_path) -> None:
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write("WEBVTT\n\n")
+            f.writelines(
+                f"{timecode(start, '.')} --> {timecode(end, '.')}\n{text}\n\n"
+                for start, end, text in self
+            )
+
+    def write_sbv(self, file_path) -> None:
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.writelines(
+                f"{timecode(start, '.')},{timecode(end, '.')}\n{text}\n\n"
+                for start, end, text in self
+            )
+
+    def write_text(self, file_path) -> None:
+        """Plain text, one segment per line."""
+        Path(file_path).write_text(
+            "".join(f"{text}\n" for text in self.texts), encoding="utf-8"
+        )
+
+
+# One record per cue: start_ms, end_ms, and the byte offset and length of the
+# cue's text in the SRT. Fixed width, so record i is at i * size.
+_INDEX_RECORD = struct.Struct("<qqqq")
+
+
+def write_index(srt_file_path, index_path) -> None:
+    """
+    Index an SRT file for SegmentIndex. Cues are found exactly as
+    Segments.from_srt() finds them.
+
+    Args:
+        srt_file_path (str | Path): The SRT to index.
+        index_path (str | Path): Where to write the index.
+    """
+    records = bytearray()
+    cue = None  # [start_ms, end_ms, text offset, text end]
+    offset = 0
+    with open(srt_file_path, "rb") as srt_file:
+        for raw in srt_file:
+            line = raw.decode("utf-8").strip()
+            match = _TIMESTAMP.match(line)
+            if match:
+                if cue is not None:
+                    records += _INDEX_RECORD.pack(cue[0], cue[1], cue[2], cue[3] - cue[2])
+                h1, m1, s1, ms1, h2, m2, s2, ms2 = map(int, match.groups())
+                start = ((h1 * 60 + m1) * 60 + s1) * 1000 + ms1
+                end = ((h2 * 60 + m2) * 60 + s2) * 1000 + ms2
+                cue = [start, end, offset + len(raw), offset + len(raw)]
+            elif line and cue is not None:
+                cue[3] = offset + len(raw)
+            elif not line and cue is not None:
+                records += _INDEX_RECORD.pack(cue[0], cue[1], cue[2], cue[3] - cue[2])
+                cue = None
+            offset += len(raw)
+    if cue is not None:
+        records += _INDEX_RECORD.pack(cue[0], cue[1], cue[2], cue[3] - cue[2])
+    Path(index_path).write_bytes(records)
+
+
+class SegmentIndex:
+    """
+    Read ranges of an indexed SRT. The index is memory-mapped and the SRT is
+    read only for the requested span, so a page costs the same however long
+    the transcript is. Use as a context manager.
+    """
+
+    def __init__(self, index_path, srt_file_path):
+        self._srt_file_path = srt_file_path
+        with open(index_path, "rb") as index_file:
+            # mmap refuses empty files; an empty transcript has no records.
+            size = index_file.seek(0, 2)
+            self._map = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __enter__(self) -> "SegmentIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+
+    def __len__(self) -> int:
+        return len(self._map) // _INDEX_RECORD.size
+
+    def _record(self, i: int) -> tuple:
+        return _INDEX_RECORD.unpack_from(self._map, i * _INDEX_RECORD.size)
+
+    @property
+    def duration_ms(self) -> int:
+        return self._record(len(self) - 1)[1] if len(self) else 0
+
+    def find(self, ms: int) -> int:
+        """Position of the first segment still running at ``ms`` (len() if none)."""
+        return bisect.bisect_right(range(len(self)), ms, key=lambda i: self._record(i)[1])
+
+    def find_start(self, ms: int) -> int:
+        """Position of the first segment starting at or after ``ms``."""
+        return bisect.bisect_left(range(len(self)), ms, key=lambda i: self._record(i)[0])
+
+    def read(self, start: int, stop: int) -> Segments:
+        """Segments ``start`` up to (not including) ``stop``."""
+        stop = min(stop, len(self))
+        segments = Segments()
+        if start >= stop:
+            return segments
+        records = [self._record(i) for i in range(start, stop)]
+        first = records[0][2]
+        with open(self._srt_file_path, "rb") as srt_file:
+            srt_file.seek(first)
+            span = srt_file.read(records[-1][2] + records[-1][3] - first)
+        for start_ms, end_ms, offset, length in records:
+            text = span[offset - first : offset - first + length].decode("utf-8")
+            segments.append(start_ms, end_ms, " ".join(line.strip() for line in text.splitlines()))
+        return segments
@@ -18,14 +18,45 @@ Kept dependency-free so low-level modules (db.py) can import it safely.
 """
 
 # --- In-progress states, in the order the worker advances through them ---
-PROCESSING = "Processing request..."       # progress 10 (spawned)
+PROCESSING = "Processing request..."       # progress 10 (accepted)
+DOWNLOADING = "Downloading media..."        # progress 10 (YouTube only)
+CONVERTING = "Converting media..."          # progress 15 (non-mp3 uploads)
+QUEUED = "Waiting for a worker..."         # progress 20 (WORKER_MODE=queue)
+STARTING = "Starting transcription worker..."  # progress 20 (spawned, importing)
 LOADING = "Loading transcription model..."  # progress 30
 TRANSCRIBING = "Transcribing..."            # progress 40
 SAVING = "Saving transcription..."          # progress 70
 TRANSLATING = "Translating..."              # progress 85
-EXPORTING = "Exporting transcription..."    # progress 90
+EXPORTING = "Exporting transcription..."    # progress 90 (jobs before on-demand exports)
+
+IN_PROGRESS = (
+    PROCESSING,
+    DOWNLOADING,
+    CONVERTING,
+    QUEUED,
+    STARTING,
+    LOADING,
+    TRANSCRIBING,
+    SAVING,
+    TRANSLATING,
+    EXPORTING,
+)
 
-IN_PROGRESS = (PROCESSING, LOADING, TRANSCRIBING, SAVING, TRANSLATING, EXPORTING)
+# Short stage names for the job_events timing breakdown (/status ``stages``,
+# the history page, the benchmark). A stage lasts from its status write to the
+# next one; terminal states only close the last stage and have no name here.
+STAGES = {
+    PROCESSING: "prepare",
+    DOWNLOADING: "download",
+    CONVERTING: "convert",
+    QUEUED: "queue",
+    STARTING: "startup",
+    LOADING: "load",
+    TRANSCRIBING: "transcribe",
+    SAVING: "save",
+    TRANSLATING: "translate",
+    EXPORTING: "export",
+}
 
 # --- Terminal states ---
 COMPLETED = "Completed successfully!"                    # progress 100
@@ -40,6 +71,15 @@ def error(detail: str) -> str:
     return f"{ERROR_PREFIX} {detail}"
 
 
+def worker_died(details: str) -> str:
+    """Error status for a job whose worker exited without finishing it."""
+    return error(
+        "the transcription worker stopped unexpectedly. "
+        "This is usually the machine running out of memory for the "
+        f"selected model — try a smaller model (e.g. base). {details}"
+    )
+
+
 def is_error(status: str) -> bool:
     """
     Any error status — generic ``Error`` or an ``Error: <detail>`` message.
@@ -0,0 +1,299 @@
+"""
+Where finished job files are kept, so the web tier and the workers don't have
+to share a disk. Selected with STORAGE_BACKEND:
+
+  * ``local`` (the default): output/ on this host is the only copy and every
+    method here is a no-op.
+  * ``s3``: an S3-compatible bucket (AWS S3, MinIO, R2, ... or the offline
+    stand-in, scripts/s3_mock.py) holds each job's media and exports; output/
+    is a local working copy that utils.fetch() refills from the bucket on
+    demand. Configured with S3_ENDPOINT_URL, S3_BUCKET, S3_ACCESS_KEY_ID,
+    S3_SECRET_ACCESS_KEY and optionally S3_REGION, S3_PREFIX, S3_PUBLIC_URL
+    (the endpoint as browsers reach it, for download redirects) and
+    S3_URL_EXPIRES (seconds a download link stays valid).
+
+Keys are a file's path below output/, e.g. ``jobs/07/7/final_transcription.srt``.
+The S3 client is the standard library plus Signature Version 4 (path-style
+addressing, unsigned payloads), so neither backend adds a dependency.
+"""
+
+import hashlib
+import hmac
+import http.client
+import os
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Optional
+from urllib.parse import quote, urlsplit
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local").lower()
+
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+_CHUNK = 1024 * 1024
+_S3_NS = "{http://s3.amazonaws.com/doc/2006-03-01/}"
+
+
+class StorageError(OSError):
+    """A storage request failed (the backend answered with an error)."""
+
+
+class LocalStorage:
+    """output/ is the store: nothing to copy, fetch or presign."""
+
+    remote = False
+
+    def put(self, key: str, path: Path) -> None:
+        pass
+
+    def get(self, key: str, path: Path) -> bool:
+        return False
+
+    def exists(self, key: str) -> bool:
+        return False
+
+    def keys(self, prefix: str) -> list[str]:
+        return []
+
+    def delete(self, prefix: str) -> int:
+        return 0
+
+    def url(self, key: str, filename: str) -> Optional[str]:
+        return None
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _hmac(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode("utf-8"), hashlib.sha256).digest()
+
+
+def _canonical_query(query: dict) -> str:
+    return "&".join(
+        f"{quote(str(k), safe='-_.~')}={quote(str(v), safe='-_.~')}"
+        for k, v in sorted(query.items())
+    )
+
+
+def signature_v4(
+    method: str,
+    path: str,
+    query: dict,
+    headers: dict,
+    payload_hash: str,
+    secret_key: str,
+    scope: str,
+    amz_date: str,
+) -> tuple[str, str]:
+    """
+    An AWS Signature Version 4 over a request (``headers`` lower-cased,
+    including ``host``; ``scope`` is ``<date>/<region>/s3/aws4_request``).
+
+    Returns:
+        tuple[str, str]: (signed header names, hex signature).
+    """
+    signed_headers = ";".join(sorted(headers))
+    canonical_request = "\n".join(
+        [
+            method,
+            quote(path, safe="/-_.~"),
+            _canonical_query(query),
+            "".join(f"{name}:{str(headers[name]).strip()}\n" for name in sorted(headers)),
+            signed_headers,
+            payload_hash,
+        ]
+    )
+    string_to_sign = "\n".join(
+        ["AWS4-HMAC-SHA256", amz_date, scope, _sha256(canonical_request.encode("utf-8"))]
+    )
+    key = ("AWS4" + secret_key).encode("utf-8")
+    for part in scope.split("/"):
+        key = _hmac(key, part)
+    return signed_headers, hmac.new(
+        key, string_to_sign.encode("utf-8"), hashlib.sha256
+    ).hexdigest()
+
+
+class S3Storage:
+    """
+    An S3-compatible bucket. Every call opens its own connection, so one
+    instance is safe to share between threads.
+    """
+
+    remote = True
+
+    def __init__(
+        self,
+        endpoint_url: str,
+        bucket: str,
+        access_key: str,
+        secret_key: str,
+        region: str = "us-east-1",
+        prefix: str = "",
+        public_url: str = None,
+        url_expires: int = 3600,
+        timeout: float = 60,
+    ):
+        self.endpoint = urlsplit(endpoint_url.rstrip("/"))
+        self.public = urlsplit((public_url or endpoint_url).rstrip("/"))
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.url_expires = url_expires
+        self.timeout = timeout
+
+    def _path(self, key: str = "") -> str:
+        path = f"{self.endpoint.path}/{self.bucket}"
+        return f"{path}/{self.prefix}{key}" if key else path
+
+    def _scope(self, now: float) -> tuple[str, str]:
+        amz_date = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime(now))
+        return amz_date, f"{amz_date[:8]}/{self.region}/s3/aws4_request"
+
+    def _request(self, method: str, key: str = "", query: dict = None, body=None, headers=None):
+        """Send a signed request; returns the open response (caller reads it)."""
+        query = query or {}
+        path = self._path(key)
+        amz_date, scope = self._scope(time.time())
+        headers = {
+            **{name.lower(): value for name, value in (headers or {}).items()},
+            "host": self.endpoint.netloc,
+            "x-amz-content-sha256": UNSIGNED_PAYLOAD,
+            "x-amz-date": amz_date,
+        }
+        signed, signature = signature_v4(
+            method, path, query, headers, UNSIGNED_PAYLOAD, self.secret_key, scope, amz_date
+        )
+        headers["authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key}/{scope}, "
+            f"SignedHeaders={signed}, Signature={signature}"
+        )
+        connection_class = (
+            http.client.HTTPSConnection if self.endpoint.scheme == "https" else http.client.HTTPConnection
+        )
+        connection = connection_class(self.endpoint.netloc, timeout=self.timeout)
+        target = quote(path, safe="/-_.~") + (f"?{_canonical_query(query)}" if query else "")
+        connection.request(method, target, body=body, headers=headers)
+        response = connection.getresponse()
+        response.connection = connection  # closed along with the response below
+        return response
+
+    def _check(self, response, *ok: int) -> None:
+        if response.status not in ok:
+            detail = response.read(2048).decode("utf-8", "replace")
+            response.connection.close()
+            raise StorageError(f"S3 {response.status} {response.reason}: {detail}")
+
+    def put(self, key: str, path: Path) -> None:
+        """Upload a local file (streamed from disk) to ``key``."""
+        with open(path, "rb") as body:
+            response = self._request(
+                "PUT", key, body=body,
+                headers={"Content-Length": str(os.fstat(body.fileno()).st_size)},
+            )
+        self._check(response, 200)
+        response.read()
+        response.connection.close()
+
+    def get(self, key: str, path: Path) -> bool:
+        """Download ``key`` into ``path``; False if there is no such object."""
+        response = self._request("GET", key)
+        if response.status == 404:
+            response.connection.close()
+            return False
+        self._check(response, 200)
+        try:
+            with open(path, "wb") as out:
+                while chunk := response.read(_CHUNK):
+                    out.write(chunk)
+        finally:
+            response.connection.close()
+        return True
+
+    def exists(self, key: str) -> bool:
+        response = self._request("HEAD", key)
+        response.read()
+        response.connection.close()
+        if response.status == 404:
+            return False
+        self._check(response, 200)
+        return True
+
+    def keys(self, prefix: str) -> list[str]:
+        """Every key under ``prefix``, following list pagination."""
+        found, token = [], None
+        while True:
+            query = {"list-type": "2", "prefix": self.prefix + prefix}
+            if token:
+                query["continuation-token"] = token
+            response = self._request("GET", query=query)
+            self._check(response, 200)
+            root = ET.fromstring(response.read())
+            response.connection.close()
+            found += [
+                node.findtext(f"{_S3_NS}Key")[len(self.prefix):]
+                for node in root.iter(f"{_S3_NS}Contents")
+            ]
+            token = root.findtext(f"{_S3_NS}NextContinuationToken")
+            if root.findtext(f"{_S3_NS}IsTruncated") != "true" or not token:
+                return found
+
+    def delete(self, prefix: str) -> int:
+        """Delete every object under ``prefix``. Returns how many."""
+        keys = self.keys(prefix)
+        for key in keys:
+            response = self._request("DELETE", key)
+            self._check(response, 200, 204, 404)
+            response.read()
+            response.connection.close()
+        return len(keys)
+
+    def url(self, key: str, filename: str) -> Optional[str]:
+        """A presigned GET link, valid for ``url_expires`` seconds, that downloads as ``filename``."""
+        path = f"{self.public.path}/{self.bucket}/{self.prefix}{key}"
+        amz_date, scope = self._scope(time.time())
+        query = {
+            "X-Amz-Algorithm": "AWS4-HMAC-SHA256",
+            "X-Amz-Credential": f"{self.access_key}/{scope}",
+            "X-Amz-Date": amz_date,
+            "X-Amz-Expires": str(self.url_expires),
+            "X-Amz-SignedHeaders": "host",
+            "response-content-disposition": f'attachment; filename="{filename}"',
+        }
+        _, signature = signature_v4(
+            "GET", path, query, {"host": self.public.netloc}, UNSIGNED_PAYLOAD,
+            self.secret_key, scope, amz_date,
+        )
+        query["X-Amz-Signature"] = signature
+        return (
+            f"{self.public.scheme}://{self.public.netloc}{quote(path, safe='/-_.~')}"
+            f"?{_canonical_query(query)}"
+        )
+
+
+def open_storage(backend: str = STORAGE_BACKEND):
+    """The storage backend configured in the environment (see the module docstring)."""
+    if backend == "local":
+        return LocalStorage()
+    if backend == "s3":
+        missing = [
+            name for name in ("S3_ENDPOINT_URL", "S3_BUCKET", "S3_ACCESS_KEY_ID", "S3_SECRET_ACCESS_KEY")
+            if not os.getenv(name)
+        ]
+        if missing:
+            raise ValueError(f"STORAGE_BACKEND=s3 needs {', '.join(missing)}")
+        return S3Storage(
+            os.environ["S3_ENDPOINT_URL"],
+            os.environ["S3_BUCKET"],
+            os.environ["S3_ACCESS_KEY_ID"],
+            os.environ["S3_SECRET_ACCESS_KEY"],
+            region=os.getenv("S3_REGION", "us-east-1"),
+            prefix=os.getenv("S3_PREFIX", ""),
+            public_url=os.getenv("S3_PUBLIC_URL") or None,
+            url_expires=int(os.getenv("S3_URL_EXPIRES", "3600")),
+        )
+    raise ValueError(f"Unknown STORAGE_BACKEND {backend!r} (expected local or s3)")
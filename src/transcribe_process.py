@@ -1,8 +1,13 @@
 """
 Worker entrypoint: transcribes a single audio file via `transcribe_audio` and
-updates the transcription database. Spawned by handle_transcription with
-stdout/stderr redirected to output/<job_id>_logs.txt, so everything printed
-or logged here (including import-time crashes) lands in the job log.
+updates the transcription database. Spawned by utils.spawn_worker (for
+handle_transcription, or for a queued job in worker.py) with
+stdout/stderr redirected to logs.txt in the job's directory (utils.job_dir),
+so everything printed or logged here (including import-time crashes) lands in
+the job log.
+
+PROFILE_JOBS=True in the environment (set per job by handle_transcription, or
+for every job in .env) profiles the job; see profiling.py.
 """
 
 import sys
@@ -10,6 +15,7 @@ import sys
 from loguru import logger
 
 from models import transcribe_audio
+from profiling import enabled_by_env
 
 if __name__ == "__main__":
     """
@@ -38,4 +44,5 @@ if __name__ == "__main__":
         translation=translation,
         language_translation=language_translation,
         job_id=job_id,
+        profile=enabled_by_env(),
     )
@@ -5,27 +5,58 @@ PDF, SRT, VTT, and SBV. It also includes helper functions for cleaning filenames
 validating YouTube URLs, and managing file cleanup.
 """
 
+import gzip
+import http.client
+import io
 import os
 import re
 import shutil
 import subprocess
 import sys
 import time
+import uuid
+import zipfile
+import zlib
+from functools import lru_cache
 from pathlib import Path
 
+import brotli
 import psutil
 import yt_dlp
 from fpdf import FPDF
 from loguru import logger
 
+import metrics
 import status
+import storage
 from db import transcriptionsDB
+from queue_client import QueueClient
+from segments import Segments, timecode, write_index
 
 BASE_DIR = Path(__file__).resolve().parent
-OUTPUT_DIR = BASE_DIR.parent / "output"
+OUTPUT_DIR = Path(os.getenv("OUTPUT_DIR", BASE_DIR.parent / "output"))
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-DB = transcriptionsDB(OUTPUT_DIR / "transcriptions.db")
+# Set on off-host workers (see worker.py): the web tier's URL, whose /queue
+# API then stands in for transcriptions.db. WORKER_TOKEN must match the web
+# tier's.
+QUEUE_URL = os.getenv("QUEUE_URL")
+
+
+def open_db():
+    """
+    The job database: transcriptions.db in OUTPUT_DIR, or, with QUEUE_URL
+    set, the web tier's /queue API (queue_client.QueueClient).
+    """
+    if QUEUE_URL:
+        return QueueClient(QUEUE_URL, os.getenv("WORKER_TOKEN", ""))
+    return transcriptionsDB(OUTPUT_DIR / "transcriptions.db")
+
+
+DB = open_db()
+# Durable home of job files (see storage.py); with the default local backend
+# that is output/ itself and fetch()/publish() below do nothing.
+STORAGE = storage.open_storage()
 
 # User-facing limits, overridable per deployment. Keep the copy in
 # templates/index.html and templates/faq.html in sync when changing defaults.
@@ -39,6 +70,147 @@ MAX_UPLOAD_SIZE_MB = int(os.getenv("MAX_UPLOAD_SIZE_MB", 0))  # MB; 0 = no limit
 # this at startup. Set to 0 to keep everything forever.
 RETENTION_DAYS = int(os.getenv("RETENTION_DAYS", 7))
 
+# Disk budget for job outputs (MB; 0 = none). A burst of large uploads can
+# fill a disk well inside RETENTION_DAYS, so when set, least recently used
+# finished jobs are evicted until the outputs fit (enforce_output_quota).
+OUTPUT_QUOTA_MB = int(os.getenv("OUTPUT_QUOTA_MB", 0))
+# Per quota pass: jobs (re)measured and eviction steps taken. Passes repeat
+# every OUTPUT_QUOTA_SWEEP_SECONDS, so no single one walks the whole output.
+QUOTA_MEASURE_BATCH = 100
+QUOTA_EVICT_BATCH = 50
+
+# "local" (the default): handle_transcription spawns each job's worker as a
+# child of the web process. "queue": it queues the job instead, for standalone
+# workers (worker.py), on this host or others, that claim jobs with leases
+# (see transcriptionsDB.claim_job).
+WORKER_MODE = os.getenv("WORKER_MODE", "local").lower()
+
+# Every file of a job lives under its own directory, sharded by the low byte
+# of the id into 256 directories, so each holds a few hundred jobs even at
+# 100k (about 390):
+#   output/jobs/<id & 0xff, 2 hex digits>/<id>/        exports, logs.txt, profile
+#   output/jobs/<id & 0xff, 2 hex digits>/<id>/media/  the upload or download
+#   output/jobs/<id & 0xff, 2 hex digits>/<id>/tmp/    atomic-write temp files
+# Deleting or measuring a job is one directory operation, never a scan of
+# output/. Only the top level and non-reserved subfolders go into the zip.
+JOBS_DIR = "jobs"
+MEDIA_DIR = "media"
+TMP_DIR = "tmp"
+
+
+def job_dir(job_id: int) -> Path:
+    """
+    A job's directory (see JOBS_DIR above); its top level holds the exports.
+
+    Args:
+        job_id (int): The job id.
+
+    Returns:
+        Path: ``output/jobs/<shard>/<id>``, whether or not it exists yet.
+    """
+    return OUTPUT_DIR / JOBS_DIR / f"{job_id & 0xFF:02x}" / str(job_id)
+
+
+def storage_key(path: Path) -> str:
+    """A job file's STORAGE key: its path below OUTPUT_DIR."""
+    return Path(path).relative_to(OUTPUT_DIR).as_posix()
+
+
+def publish(*paths: Path) -> None:
+    """
+    Store job files in STORAGE, so another node can fetch() them. A no-op
+    with the local backend.
+
+    Args:
+        *paths (Path): Files under OUTPUT_DIR.
+
+    Returns:
+        None
+    """
+    if not STORAGE.remote:
+        return
+    for path in paths:
+        STORAGE.put(storage_key(path), path)
+
+
+def publish_job(job_id: int) -> None:
+    """Store every file of a job except its media (published on arrival) and temp files."""
+    if not STORAGE.remote:
+        return
+    root = job_dir(job_id)
+    publish(*(
+        path for path in sorted(root.rglob("*"))
+        if path.is_file() and path.relative_to(root).parts[0] not in (MEDIA_DIR, TMP_DIR)
+    ))
+
+
+def fetch(path: Path) -> bool:
+    """
+    Make sure a job file is on local disk, downloading it from STORAGE if
+    only the store has it (another node wrote it, or the quota evicted the
+    local copy). The download lands atomically, like a rendered export.
+
+    Args:
+        path (Path): A file under OUTPUT_DIR.
+
+    Returns:
+        bool: Whether the file is now on disk.
+    """
+    path = Path(path)
+    if path.exists():
+        return True
+    if not STORAGE.remote:
+        return False
+    tmp_path = _tmp_sibling(path)
+    try:
+        if not STORAGE.get(storage_key(path), tmp_path):
+            return False
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return True
+
+
+def fetch_job(job_id: int, media: bool = False) -> int:
+    """
+    Download a job's stored files that are missing locally (not its media
+    unless ``media``), e.g. before zipping it.
+
+    Args:
+        job_id (int): The job id.
+        media (bool): Also download the job's source media.
+
+    Returns:
+        int: Files downloaded.
+    """
+    if not STORAGE.remote:
+        return 0
+    root = job_dir(job_id)
+    fetched = 0
+    for key in STORAGE.keys(storage_key(root) + "/"):
+        path = OUTPUT_DIR / key
+        if path.exists() or (not media and path.relative_to(root).parts[0] == MEDIA_DIR):
+            continue
+        fetched += fetch(path)
+    return fetched
+
+
+def stored_url(path: Path) -> str | None:
+    """
+    A direct (presigned) download link for a job file held by a remote
+    STORAGE, so the web tier can redirect instead of relaying the bytes.
+
+    Args:
+        path (Path): A file under OUTPUT_DIR.
+
+    Returns:
+        str | None: The link, or None with the local backend or if the
+        store doesn't have the file.
+    """
+    if not STORAGE.remote or not STORAGE.exists(storage_key(path)):
+        return None
+    return STORAGE.url(storage_key(path), Path(path).name)
+
 
 def is_valid_youtube_url(url: str) -> bool:
     """
@@ -108,6 +280,7 @@ def handle_transcription(
     language_translation: str,
     file_export: str,
     source_file: str = None,
+    profile: bool = False,
 ) -> bool:
     """
     Handle the transcription process: download YouTube or handle uploaded media,
@@ -122,13 +295,23 @@ def handle_transcription(
         translation (str): Translation model.
         language_translation (str): Target language for translation.
         file_export (str): Export format.
+        source_file (str): Source to reuse instead of a download/upload (retry).
+        profile (bool): Profile this job's worker (PROFILE_JOBS=True for it).
 
     Returns:
         bool: True if the subprocess was launched, False on failure.
     """
     output_file = None
     try:
+        # Ids are reused once a job is deleted; never inherit its files.
+        root = job_dir(job_id)
+        if root.exists():
+            shutil.rmtree(root)
+        media_dir = root / MEDIA_DIR
+        media_dir.mkdir(parents=True)
+
         if youtube_url:
+            DB.update_transcription_status(status.DOWNLOADING, "", 10, job_id)
             ydl_opts = {
                 "format": "bestaudio/best",
                 "noplaylist": True,
@@ -164,22 +347,17 @@ def handle_transcription(
                 )
                 return False
 
-            # Prefix with the job id so concurrent jobs never share files.
             # The FFmpegExtractAudio postprocessor always produces mp3, so the
             # final path is known — no prepare_filename suffix guessing.
-            ydl_opts["outtmpl"] = str(
-                OUTPUT_DIR / f"{job_id}_{sanitized_title}.%(ext)s"
-            )
+            ydl_opts["outtmpl"] = str(media_dir / f"{sanitized_title}.%(ext)s")
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                 ydl.download([youtube_url])
-            output_file = str(OUTPUT_DIR / f"{job_id}_{sanitized_title}.mp3")
+            output_file = str(media_dir / f"{sanitized_title}.mp3")
 
             logger.info(f"Downloaded video: {output_file}")
 
         elif media:
-            # Prefix with the job id so concurrent jobs never share files.
-            media_filename = clean_filename(media.filename)
-            media_file_path = OUTPUT_DIR / f"{job_id}_{media_filename}"
+            media_file_path = media_dir / clean_filename(media.filename)
             max_bytes = MAX_UPLOAD_SIZE_MB * 1024 * 1024  # 0 = unlimited
             written = 0
             try:
@@ -195,18 +373,24 @@ def handle_transcription(
             except Exception:
                 media_file_path.unlink(missing_ok=True)
                 raise
+            if media_file_path.suffix.lower() != ".mp3":
+                DB.update_transcription_status(status.CONVERTING, "", 15, job_id)
             output_file = convert_to_mp3(media_file_path)
 
         elif source_file:
             # Retry of a previous upload: reuse the source still on disk, copied
-            # under this job's id so the two jobs own independent files.
+            # into this job's media so the two jobs own independent files.
             src = Path(source_file)
-            dest = OUTPUT_DIR / f"{job_id}_{src.name}"
+            dest = media_dir / src.name
             if src.resolve() != dest.resolve():
                 shutil.copy(src, dest)
+            if dest.suffix.lower() != ".mp3":
+                DB.update_transcription_status(status.CONVERTING, "", 15, job_id)
             output_file = convert_to_mp3(dest)
 
         logger.info(f"Transcription started for: {output_file}")
+        # A worker on another node fetches it from there.
+        publish(Path(output_file))
 
         # The download/convert above can take minutes; the user may have
         # canceled meanwhile — spawning would resurrect the job's files and
@@ -216,34 +400,24 @@ def handle_transcription(
             logger.info(f"Job {job_id} canceled during preparation; not spawning")
             return False
 
-        # Prepare the job output dir BEFORE spawning the worker — a fast
-        # worker (cached model) could otherwise write into a dir we then wipe.
-        job_output_dir = OUTPUT_DIR / str(job_id)
-        if job_output_dir.exists():
-            shutil.rmtree(job_output_dir)
-        job_output_dir.mkdir(parents=True, exist_ok=True)
-
-        # Worker output goes straight to the job log file: a PIPE that nobody
-        # reads loses import-time crashes and blocks the worker once full.
-        worker_log = open(OUTPUT_DIR / f"{job_id}_logs.txt", "a")
-        process = subprocess.Popen(
-            [
-                sys.executable,
-                str(BASE_DIR / "transcribe_process.py"),
-                str(job_id),
-                str(output_file),
-                language,
-                model,
-                translation,
-                language_translation,
-                file_export,
-            ],
-            stdout=worker_log,
-            stderr=subprocess.STDOUT,
-            text=True,
-        )
-        worker_log.close()
-
+        worker_args = {
+            "file": str(output_file),
+            "language": language,
+            "model": model,
+            "translation": translation,
+            "language_translation": language_translation,
+            "file_export": file_export,
+            "profile": profile,
+        }
+        if WORKER_MODE == "queue":
+            DB.update_transcription_status(status.QUEUED, "", 20, job_id)
+            DB.enqueue_job(job_id, worker_args)
+            logger.info(f"Transcription job {job_id} queued for a worker")
+            return True
+
+        # Worker startup (interpreter + torch import) is its own timed stage.
+        DB.update_transcription_status(status.STARTING, "", 20, job_id)
+        process = spawn_worker(job_id, worker_args)
         DB.set_process_pid(process.pid, job_id)
         _unreaped_workers.add(process.pid)
         logger.info(f"Transcription job {job_id} started with PID: {process.pid}")
@@ -257,6 +431,43 @@ def handle_transcription(
         return False
 
 
+def spawn_worker(job_id: int, args: dict) -> subprocess.Popen:
+    """
+    Start a job's transcription subprocess (transcribe_process.py).
+
+    Args:
+        job_id (int): The job id.
+        args (dict): Worker arguments, as handle_transcription builds them:
+            file, language, model, translation, language_translation,
+            file_export and profile.
+
+    Returns:
+        subprocess.Popen: The worker process.
+    """
+    root = job_dir(job_id)
+    root.mkdir(parents=True, exist_ok=True)
+    # Worker output goes straight to the job log file: a PIPE that nobody
+    # reads loses import-time crashes and blocks the worker once full.
+    with open(root / "logs.txt", "a") as worker_log:
+        return subprocess.Popen(
+            [
+                sys.executable,
+                str(BASE_DIR / "transcribe_process.py"),
+                str(job_id),
+                args["file"],
+                args["language"],
+                args["model"],
+                args["translation"],
+                args["language_translation"],
+                args["file_export"],
+            ],
+            stdout=worker_log,
+            stderr=subprocess.STDOUT,
+            text=True,
+            env={**os.environ, "PROFILE_JOBS": "True"} if args.get("profile") else None,
+        )
+
+
 def convert_to_mp3(file_path: Path) -> Path:
     """
     Convert a media file to MP3 format if not already MP3.
@@ -293,6 +504,38 @@ def convert_to_mp3(file_path: Path) -> Path:
     return file_path
 
 
+def media_duration(file_path) -> float:
+    """
+    Duration of a media file in seconds, via ffprobe (reads the container
+    header only, no decoding).
+
+    Args:
+        file_path: Path to the media file.
+
+    Returns:
+        float or None: Seconds, or None if ffprobe can't tell.
+    """
+    try:
+        out = subprocess.run(
+            [
+                "ffprobe",
+                "-v",
+                "error",
+                "-show_entries",
+                "format=duration",
+                "-of",
+                "default=noprint_wrappers=1:nokey=1",
+                str(file_path),
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        return float(out.strip())
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+
+
 def clean_filename(filename: str) -> str:
     """
     Sanitize a filename by replacing special characters with underscores.
@@ -341,6 +584,51 @@ def is_worker_alive(pid: int) -> bool:
         return False
 
 
+def process_identity() -> tuple:
+    """
+    (pid, start time) of this process: what job_owners records for the web
+    process that accepted a job. Computed per call, as each uvicorn worker
+    process imports this module on its own.
+    """
+    return os.getpid(), psutil.Process().create_time()
+
+
+def is_process_alive(pid: int, started: float) -> bool:
+    """
+    True if the process recorded by process_identity() is still running —
+    the same pid AND the same start time, so a recycled pid doesn't count.
+
+    Args:
+        pid (int): The OS process ID.
+        started (float): Its start time, as recorded.
+
+    Returns:
+        bool: True if running, False if exited, a zombie, or another process.
+    """
+    try:
+        process = psutil.Process(pid)
+        return process.create_time() == started and process.status() != psutil.STATUS_ZOMBIE
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return False
+
+
+def worker_rss(pid: int):
+    """
+    Resident memory of a live worker, in bytes.
+
+    Args:
+        pid (int): The OS process ID.
+
+    Returns:
+        int or None: RSS bytes, or None if it isn't a running worker.
+    """
+    process = _worker_process(pid)
+    try:
+        return process.memory_info().rss if process is not None else None
+    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+        return None
+
+
 # Workers are spawned fire-and-forget; uvicorn never wait()s on them, so a
 # finished or killed worker lingers as a zombie holding a pid slot until the
 # container restarts. Track the pids we spawn and reap them ourselves.
@@ -396,227 +684,377 @@ def kill_process_by_pid(pid: int) -> bool:
         return False
 
 
-def convert_to_formats(
-    transcription_text: list, base_file_path: str, export_format: str
-) -> None:
+def render_export(job_dir: Path, export_format: str):
     """
-    Convert the transcription text to various formats.
+    Path of a job's ``final_transcription.<export_format>``, rendering it on
+    first access. The worker only saves the canonical
+    ``final_transcription.srt``; the other formats are derived from it when
+    someone asks for them and then served from disk. Rendering goes through a
+    temp file and an atomic rename, so concurrent requests never see (or
+    serve) a half-written export.
 
     Args:
-        transcription_text (list[str]): The transcription as SRT blocks
-            (as returned by save_final_transcription).
-        base_file_path (str): Base path for output files.
-        export_format (str): Desired format ('pdf', 'srt', 'vtt', 'sbv', or 'all').
+        job_dir (Path): The job's output directory.
+        export_format (str): One of EXPORT_FORMATS.
 
     Returns:
-        None
+        Path | None: The export, or None if the job has no canonical SRT.
     """
-    base_file_path = Path(base_file_path)
-    transcription_text = "\n".join(transcription_text)
-
-    if export_format == "pdf":
-        convert_to_pdf(transcription_text, base_file_path.with_suffix(".pdf"))
-    elif export_format == "srt":
-        convert_to_srt(transcription_text, base_file_path.with_suffix(".srt"))
-    elif export_format == "vtt":
-        convert_to_vtt(transcription_text, base_file_path.with_suffix(".vtt"))
-    elif export_format == "sbv":
-        convert_to_sbv(transcription_text, base_file_path.with_suffix(".sbv"))
-    elif export_format == "all":
-        convert_to_pdf(transcription_text, base_file_path.with_suffix(".pdf"))
-        convert_to_srt(transcription_text, base_file_path.with_suffix(".srt"))
-        convert_to_vtt(transcription_text, base_file_path.with_suffix(".vtt"))
-        convert_to_sbv(transcription_text, base_file_path.with_suffix(".sbv"))
+    job_dir = Path(job_dir)
+    path = job_dir / f"final_transcription.{export_format}"
+    if not path.exists() and not fetch(path):
+        canonical = job_dir / CANONICAL_EXPORT
+        if not fetch(canonical):
+            return None
+        tmp_path = _tmp_sibling(path)
+        try:
+            EXPORTERS[export_format](Segments.from_srt(canonical), tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        try:
+            publish(path)  # other nodes fetch (or redirect to) it instead
+        except OSError as e:
+            logger.warning(f"Could not store {path.name}: {e}")
+    if export_format in TEXT_EXPORT_FORMATS:
+        precompress(path)  # no-op once the copies exist
+    return path
 
 
-def convert_to_pdf(text: str, file_path: Path) -> None:
+def segment_index(job_dir: Path):
     """
-    Convert transcription text to a PDF.
+    Path of the segment index for a job's canonical SRT (see
+    segments.SegmentIndex), built on first access like the exports.
 
     Args:
-        text (str): Transcription text.
-        file_path (Path): Output PDF file.
+        job_dir (Path): The job's output directory.
 
     Returns:
-        None
+        Path | None: The index, or None if the job has no canonical SRT.
     """
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    # Bundled Unicode font so non-Latin scripts (Greek, Cyrillic, ...) render
-    # instead of degrading to "?" via latin-1.
-    pdf.add_font("DejaVu", fname=str(BASE_DIR.parent / "static" / "fonts" / "DejaVuSans.ttf"))
-    pdf.set_font("DejaVu", size=12)
+    path = Path(job_dir) / SEGMENT_INDEX
+    if path.exists():
+        return path
+    canonical = Path(job_dir) / CANONICAL_EXPORT
+    if not fetch(canonical):
+        return None
+    tmp_path = _tmp_sibling(path)
+    try:
+        write_index(canonical, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return path
 
-    for line in text.split("\n"):
-        try:
-            pdf.multi_cell(0, 10, text=line, align="L", new_x="LMARGIN", new_y="NEXT")
-        except Exception as e:
-            logger.error(f"Error writing line to PDF: {str(e)}")
-            continue
 
-    pdf.output(str(file_path))
-    logger.info(f"Transcription saved to PDF: {file_path}")
+def _tmp_sibling(path: Path) -> Path:
+    # In the job's tmp/, which the zip skips, so a concurrent /download never
+    # zips a partial file; leftovers go with the job.
+    tmp_dir = path.parent / TMP_DIR
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    return tmp_dir / f"{path.name}.{uuid.uuid4().hex}.tmp"
 
 
-def convertMillisToTc(millis: float) -> str:
+def precompress(path: Path) -> None:
     """
-    Convert milliseconds to timecode (hh:mm:ss.mmm).
+    Save gzip and brotli copies of a finished text export next to it
+    (``<name>.gz``/``<name>.br``), so responses can send them as-is instead
+    of compressing on every request. Existing copies are kept.
 
     Args:
-        millis (float): Time in milliseconds.
+        path (Path): The export to compress.
 
     Returns:
-        str: Timecode string.
+        None
     """
-    millis = int(millis * 1000)
-    milliseconds = millis % 1000
-    seconds = (millis // 1000) % 60
-    minutes = (millis // (1000 * 60)) % 60
-    hours = (millis // (1000 * 60 * 60)) % 24
-    return f"{hours}:{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
+    path = Path(path)
+    data = None
+    for suffix, compress in PRECOMPRESSORS.items():
+        target = path.with_name(path.name + suffix)
+        if target.exists():
+            continue
+        if data is None:
+            data = path.read_bytes()
+        tmp_path = _tmp_sibling(target)
+        try:
+            tmp_path.write_bytes(compress(data))
+            os.replace(tmp_path, target)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+
+# PDF layout (A4, mm). Lines are wrapped here rather than by fpdf's
+# multi_cell, whose line breaker re-measures the whole line for every
+# character — quadratic per line and minutes for a multi-hour transcript.
+PDF_FONT = BASE_DIR.parent / "static" / "fonts" / "DejaVuSans.ttf"
+PDF_FONT_SIZE = 12  # pt
+PDF_LINE_HEIGHT = 10
+PDF_MARGIN = 10
+PDF_BOTTOM_MARGIN = 15
 
 
-def makeStr(rawText: str, initialTimeCode: str, endTimeCode: str) -> str:
+@lru_cache(maxsize=None)
+def _pdf_char_widths() -> tuple[dict, int]:
     """
-    Create a formatted string block for subtitles.
+    The bundled font's advance widths (1/1000 em) by code point, and the
+    width of a missing glyph. Parsed once per process, then reused by every
+    PDF this process renders.
+    """
+    pdf = FPDF()
+    pdf.add_font("DejaVu", fname=str(PDF_FONT))
+    pdf.set_font("DejaVu", size=PDF_FONT_SIZE)
+    return dict(pdf.current_font.cw), pdf.current_font.desc.missing_width
+
+
+def _pdf_safe(text: str, widths: dict) -> str:
+    """
+    ``text`` with what the bundled font has no glyph for replaced: other
+    whitespace (newlines, tabs) by a space, anything else (CJK, control
+    characters, ...) by "?". fpdf cannot place a missing glyph.
+    """
+    return "".join(
+        c if ord(c) in widths else " " if c.isspace() else "?" for c in text
+    )
+
+
+def _wrap(text: str, max_width: float, widths: dict, missing: int) -> list[str]:
+    """Greedy word wrap to ``max_width`` font units; over-long words are split."""
+    lines, line, line_width = [], "", 0
+    space = widths.get(32, missing)
+    for word in text.split(" "):
+        word_width = sum(widths.get(ord(c), missing) for c in word)
+        if line and line_width + space + word_width <= max_width:
+            line, line_width = f"{line} {word}", line_width + space + word_width
+            continue
+        if line:
+            lines.append(line)
+        line, line_width = "", 0
+        if word_width > max_width:
+            for c in word:
+                w = widths.get(ord(c), missing)
+                if line and line_width + w > max_width:
+                    lines.append(line)
+                    line, line_width = "", 0
+                line, line_width = line + c, line_width + w
+        else:
+            line, line_width = word, word_width
+    lines.append(line)
+    return lines
+
+
+def convert_to_pdf(segments: Segments, file_path: Path) -> None:
+    """
+    Convert the transcription to a PDF (index, timing and text per segment).
 
     Args:
-        rawText (str): Subtitle text.
-        initialTimeCode (str): Start timecode.
-        endTimeCode (str): End timecode.
+        segments (Segments): Transcription segments.
+        file_path (Path): Output PDF file.
 
     Returns:
-        str: Formatted subtitle string.
+        None
     """
-    initialTimeCodeFormatted = convertMillisToTc(float(initialTimeCode))
-    endTimeCodeFormatted = convertMillisToTc(float(endTimeCode))
-    return f"{initialTimeCodeFormatted},{endTimeCodeFormatted}\n{rawText}\n\n"
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=False)
+    # Bundled Unicode font so non-Latin scripts (Greek, Cyrillic, ...) render
+    # instead of degrading to "?" via latin-1.
+    pdf.add_font("DejaVu", fname=str(PDF_FONT))
+    pdf.set_font("DejaVu", size=PDF_FONT_SIZE)
+
+    widths, missing = _pdf_char_widths()
+    # mm -> font units: 1 unit = size_pt / 1000 pt, and pdf.k is pt per mm.
+    max_width = (pdf.w - 2 * PDF_MARGIN) * pdf.k * 1000 / PDF_FONT_SIZE
+    bottom = pdf.h - PDF_BOTTOM_MARGIN - PDF_LINE_HEIGHT
+    # Same vertical placement as a cell of PDF_LINE_HEIGHT.
+    baseline = PDF_LINE_HEIGHT / 2 + 0.3 * PDF_FONT_SIZE / pdf.k
+    y = bottom + 1  # forces the first page
+
+    def lines():
+        for n, (start, end, text) in enumerate(segments, 1):
+            yield str(n)
+            yield f"{timecode(start, ',')} --> {timecode(end, ',')}"
+            yield from _wrap(_pdf_safe(text, widths), max_width, widths, missing)
+            yield ""
+
+    for line in lines():
+        if y > bottom:
+            pdf.add_page()
+            y = PDF_MARGIN
+        if line:
+            pdf.text(PDF_MARGIN, y + baseline, line)
+        y += PDF_LINE_HEIGHT
 
+    pdf.output(str(file_path))
+    logger.info(f"Transcription saved to PDF: {file_path}")
 
-def convert_to_srt(text: str, file_path: Path) -> None:
+
+def convert_to_srt(segments: Segments, file_path: Path) -> None:
     """
-    Convert transcription text to SRT format.
+    Convert the transcription to SRT format.
 
     Args:
-        text (str): Transcription text.
+        segments (Segments): Transcription segments.
         file_path (Path): Output SRT file.
 
     Returns:
         None
     """
-    lines = text.strip().split("\n")
-    filtered_lines = []
-    for line in lines:
-        if "-->" in line or (line.strip() and not line.strip().isdigit()):
-            filtered_lines.append(line)
-
-    with open(file_path, "w", encoding="utf-8") as subFile:
-        current_section = 0
-        for i in range(0, len(filtered_lines), 2):
-            try:
-                start_end_times = filtered_lines[i].split(" --> ")
-                if len(start_end_times) == 2:
-                    start_time, end_time = start_end_times
-                    raw_text = filtered_lines[i + 1].strip()
-                    current_section += 1
-                    subFile.write(
-                        f"{current_section}\n"
-                        f"{start_time} --> {end_time}\n"
-                        f"{raw_text}\n\n"
-                    )
-                else:
-                    raise ValueError("Invalid timestamp format")
-            except Exception as e:
-                logger.error(f"Error processing SRT entry at index {i}: {str(e)}")
-                current_section += 1
-                subFile.write(
-                    f"{current_section}\n"
-                    f"00:00:00,000 --> 00:00:10,000\n"
-                    f"Invalid timestamp or text\n\n"
-                )
-
+    segments.write_srt(file_path)
     logger.info(f"Transcription saved to SRT: {file_path}")
 
 
-def convert_to_vtt(text: str, file_path: Path) -> None:
+def convert_to_vtt(segments: Segments, file_path: Path) -> None:
     """
-    Convert transcription text to WebVTT format.
+    Convert the transcription to WebVTT format.
 
     Args:
-        text (str): Transcription text.
+        segments (Segments): Transcription segments.
         file_path (Path): Output VTT file.
 
     Returns:
         None
     """
-    lines = text.strip().split("\n")
-
-    # Filter out numeric index lines
-    filtered_lines = []
-    for line in lines:
-        # If it's just digits (like "1", "2", "3"), skip it
-        if line.strip().isdigit():
-            continue
-        # Otherwise keep it
-        filtered_lines.append(line)
-
-    with open(file_path, mode="w", encoding="utf-8") as vttFile:
-        vttFile.write("WEBVTT\n\n")
-
-        # Now iterate in pairs of (time_line, text_line)
-        for i in range(0, len(filtered_lines), 2):
-            if i + 1 < len(filtered_lines):
-                start_end_times = filtered_lines[i].split(" --> ")
-                if len(start_end_times) == 2:
-                    start_time, end_time = start_end_times
-                    raw_text = filtered_lines[i + 1].strip()
-                    vttFile.write(f"{start_time} --> {end_time}\n{raw_text}\n\n")
-            else:
-                # Last odd line doesn't have a matching pair
-                raw_text = filtered_lines[i].strip()
-                vttFile.write(f"00:00:00.000 --> 00:00:10.000\n{raw_text}\n\n")
-
+    segments.write_vtt(file_path)
     logger.info(f"Transcription saved to VTT: {file_path}")
 
 
-def convert_to_sbv(text: str, file_path: Path) -> None:
+def convert_to_sbv(segments: Segments, file_path: Path) -> None:
     """
-    Convert transcription text to SBV format.
+    Convert the transcription to SBV format.
 
     Args:
-        text (str): Transcription text.
+        segments (Segments): Transcription segments.
         file_path (Path): Output SBV file.
 
     Returns:
         None
     """
-    lines = text.strip().split("\n")
-    filtered_lines = []
-    for line in lines:
-        stripped = line.strip()
-        if "-->" in stripped or (stripped and not stripped.isdigit()):
-            filtered_lines.append(stripped)
-
-    with open(file_path, mode="w", encoding="utf-8") as sbvFile:
-        for i in range(0, len(filtered_lines), 2):
-            if i + 1 < len(filtered_lines):
-                start_end_times = filtered_lines[i].split(" --> ")
-                if len(start_end_times) == 2:
-                    start_time, end_time = start_end_times
-                    start_time = start_time.replace(",", ".")
-                    end_time = end_time.replace(",", ".")
-                    raw_text = filtered_lines[i + 1]
-                    sbvFile.write(f"{start_time},{end_time}\n{raw_text}\n\n")
-                else:
-                    sbvFile.write("00:00:00.000,00:00:10.000\nInvalid timestamp\n\n")
-            else:
-                raw_text = filtered_lines[i]
-                sbvFile.write("00:00:00.000,00:00:10.000\n" + raw_text + "\n\n")
-
+    segments.write_sbv(file_path)
     logger.info(f"Transcription saved to SBV: {file_path}")
 
 
+# The .txt download has always been the same numbered blocks as the .srt.
+EXPORTERS = {
+    "txt": convert_to_srt,
+    "srt": convert_to_srt,
+    "vtt": convert_to_vtt,
+    "sbv": convert_to_sbv,
+    "pdf": convert_to_pdf,
+}
+EXPORT_FORMATS = tuple(EXPORTERS)
+TEXT_EXPORT_FORMATS = ("txt", "srt", "vtt", "sbv")
+CANONICAL_EXPORT = "final_transcription.srt"
+SEGMENT_INDEX = "final_transcription.idx"
+
+# Precompressed copies of text exports, by file suffix. gzip's mtime is fixed
+# so a copy's bytes (and ETag) only depend on the export. Brotli's default
+# quality (11) takes ~15 s on a 50k-segment SRT; 9 is ~20x faster for ~15%
+# larger output, and gzip's level 9 is no smaller than its default here.
+PRECOMPRESSORS = {
+    ".br": lambda data: brotli.compress(data, quality=9),
+    ".gz": lambda data: gzip.compress(data, mtime=0),
+}
+
+
+# Members deflated in /download zips; everything else (the PDF, media,
+# binary profiles) is already compressed or not worth it and is stored.
+ZIP_DEFLATE_SUFFIXES = {".txt", ".srt", ".vtt", ".sbv", ".csv", ".json", ".log"}
+_ZIP_CHUNK = 1024 * 1024
+
+
+class _ZipSink(io.RawIOBase):
+    """Write-only, unseekable buffer that zipfile streams into."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer += data
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        data, self._buffer = bytes(self._buffer), bytearray()
+        return data
+
+
+def zip_members(folder: Path) -> list[Path]:
+    """The files stream_zip() puts in a job's zip, in archive order."""
+    # The zip has the originals, not their compressed copies or the index,
+    # and neither the source media nor temp files.
+    folder = Path(folder)
+    return sorted(
+        p for p in folder.rglob("*")
+        if p.is_file() and p.suffix not in PRECOMPRESSORS and p.name != SEGMENT_INDEX
+        and p.relative_to(folder).parts[0] not in (MEDIA_DIR, TMP_DIR)
+    )
+
+
+def stream_zip(folder: Path):
+    """
+    Zip a job directory on the fly, for a streaming /download response.
+
+    Text members are deflated and everything else stored. The deflated
+    members are compressed once up front (transcripts are small) with the
+    same settings and in the same single write as the stream below, so their
+    compressed size is known and the archive's exact length can be sent as
+    Content-Length. Archives that would need zip64 (over 2 GiB) stream
+    without one.
+
+    Args:
+        folder (Path): The job directory.
+
+    Returns:
+        tuple[int | None, Iterator[bytes]]: (content length, zip bytes).
+    """
+    members = []
+    length = 22  # end of central directory record
+    for path in zip_members(folder):
+        info = zipfile.ZipInfo.from_file(
+            path, path.relative_to(folder).as_posix(), strict_timestamps=False
+        )
+        data = None
+        if path.suffix.lower() in ZIP_DEFLATE_SUFFIXES:
+            info.compress_type = zipfile.ZIP_DEFLATED
+            data = path.read_bytes()
+            compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+            size = len(compressor.compress(data)) + len(compressor.flush())
+        else:
+            info.compress_type = zipfile.ZIP_STORED
+            size = info.file_size
+        # Local header + data + data descriptor + central directory entry.
+        name = len(info.filename.encode("utf-8"))
+        length += 30 + name + size + 16 + 46 + name
+        members.append((path, info, data))
+    if length > zipfile.ZIP64_LIMIT or any(
+        info.file_size * 1.05 > zipfile.ZIP64_LIMIT for _, info, _ in members
+    ):
+        length = None
+
+    def generate():
+        sink = _ZipSink()
+        with zipfile.ZipFile(sink, "w") as zf:
+            for path, info, data in members:
+                with zf.open(info, "w") as member:
+                    if data is not None:
+                        member.write(data)
+                    else:
+                        with open(path, "rb") as src:
+                            while chunk := src.read(_ZIP_CHUNK):
+                                member.write(chunk)
+                                yield sink.take()
+                yield sink.take()
+        yield sink.take()
+
+    return length, generate()
+
+
 def cleanup_files(pid: int) -> None:
     """
     Cleanup files generated during the transcription process.
@@ -627,27 +1065,70 @@ def cleanup_files(pid: int) -> None:
     Returns:
         None
     """
-    job_directory = OUTPUT_DIR / str(pid)
-    if job_directory.exists():
-        shutil.rmtree(job_directory)
-
-    # Only this job's artifacts — deleting every *.mp3/*.zip used to destroy
-    # concurrently running jobs' inputs.
-    for file in OUTPUT_DIR.glob(f"{pid}_*"):
-        file.unlink(missing_ok=True)
-    (OUTPUT_DIR / f"{pid}.zip").unlink(missing_ok=True)
+    shutil.rmtree(job_dir(pid), ignore_errors=True)
+    prefix = storage_key(job_dir(pid)) + "/"
+    try:
+        STORAGE.delete(prefix)
+    except (OSError, http.client.HTTPException) as e:
+        # The bucket is unreachable: the job still goes, its objects later.
+        logger.warning(f"Job {pid}: could not delete stored files, will retry: {e}")
+        DB.defer_storage_deletion(prefix)
+    DB.delete_transcript_index(pid)
 
     logger.info(f"Files cleaned up for job: {pid}")
 
 
+def retry_storage_deletions() -> int:
+    """
+    Retry the STORAGE deletes that cleanup_files() could not do. Stops at the
+    first failure: the store is most likely still unreachable.
+
+    Returns:
+        int: Number of prefixes deleted.
+    """
+    deleted = 0
+    for prefix in DB.pending_storage_deletions():
+        try:
+            STORAGE.delete(prefix)
+        except (OSError, http.client.HTTPException) as e:
+            logger.warning(f"Stored files of deleted jobs still not removed: {e}")
+            break
+        DB.forget_storage_deletion(prefix)
+        deleted += 1
+    return deleted
+
+
+def index_unsearchable_jobs() -> int:
+    """
+    Add finished jobs that are missing from the search index (those that
+    completed before it existed) from their canonical SRT. One query finds
+    them; a job whose SRT is gone is skipped.
+
+    Returns:
+        int: Number of jobs indexed.
+    """
+    indexed = 0
+    for job_id in DB.unindexed_job_ids():
+        canonical = job_dir(job_id) / CANONICAL_EXPORT
+        if not canonical.exists():
+            continue
+        DB.index_transcript(job_id, Segments.from_srt(canonical))
+        indexed += 1
+    if indexed:
+        logger.info(f"Indexed {indexed} earlier job(s) for search")
+    return indexed
+
+
 def purge_expired_jobs(retention_days: int = RETENTION_DAYS) -> int:
     """
-    Delete output files and DB rows for jobs older than ``retention_days``.
+    Delete output files and DB rows for jobs older than ``retention_days``
+    whose results weren't opened within it either (``DB.touch_job``).
 
     Called once at startup so a long-running deployment doesn't accumulate
     every job's media/transcripts/zip on disk (and rows in the DB) forever.
     A running job is never touched — its ``created_at`` is recent, so it can't
-    be older than the window.
+    be older than the window. Also retries failed STORAGE deletes
+    (retry_storage_deletions), whatever the retention.
 
     Args:
         retention_days (int): Age threshold in days. ``<= 0`` disables the
@@ -656,6 +1137,7 @@ def purge_expired_jobs(retention_days: int = RETENTION_DAYS) -> int:
     Returns:
         int: Number of jobs removed.
     """
+    retry_storage_deletions()
     if retention_days <= 0:
         return 0
     cutoff = time.time() - retention_days * 86400
@@ -665,4 +1147,192 @@ def purge_expired_jobs(retention_days: int = RETENTION_DAYS) -> int:
         DB.delete_transcription(job_id)
     if ids:
         logger.info(f"Retention sweep removed {len(ids)} job(s) older than {retention_days} day(s)")
+    stale = DB.purge_translation_memory(cutoff)
+    if stale:
+        logger.info(f"Retention sweep dropped {stale} unused translation memory entries")
     return len(ids)
+
+
+def job_media(job_id: int) -> list[Path]:
+    """
+    A job's source media: the upload or YouTube download (and its mp3
+    conversion), in the job's ``media/``.
+
+    Args:
+        job_id (int): The job id.
+
+    Returns:
+        list[Path]: The media files still on disk.
+    """
+    media_dir = job_dir(job_id) / MEDIA_DIR
+    return [f for f in media_dir.iterdir() if f.is_file()] if media_dir.is_dir() else []
+
+
+# What older versions left side by side in output/: "<id>" (the exports),
+# "<id>_<media name>", "<id>_logs.txt" and "<id>.zip".
+_FLAT_ARTIFACT = re.compile(r"(\d+)(?:_(.+)|(\.zip))?")
+
+
+def _move_into(src: Path, dest: Path) -> None:
+    # Merge src into dest (a crash may have left a job half migrated); what
+    # dest already has wins.
+    dest.mkdir(parents=True, exist_ok=True)
+    for child in src.iterdir():
+        target = dest / child.name
+        if child.is_dir() and target.is_dir():
+            _move_into(child, target)
+        elif not target.exists():
+            os.replace(child, target)
+    shutil.rmtree(src, ignore_errors=True)
+
+
+def migrate_flat_layout() -> int:
+    """
+    Move jobs saved by versions before the sharded layout (see job_dir) into
+    it: ``output/<id>/`` becomes the job's directory, ``output/<id>_<name>``
+    its ``media/<name>`` and ``output/<id>_logs.txt`` its ``logs.txt``. Old
+    ``<id>.zip`` archives and temp files are deleted (zips are streamed now).
+    Safe to run on every start: a migrated tree costs one listing of output/.
+
+    Returns:
+        int: Number of entries migrated.
+    """
+    entries = []
+    for entry in OUTPUT_DIR.iterdir():
+        if match := _FLAT_ARTIFACT.fullmatch(entry.name):
+            entries.append((entry, int(match[1]), match[2], match[3]))
+    # Job directories first, so the files then land in place.
+    entries.sort(key=lambda e: not e[0].is_dir())
+    for entry, job_id, name, zip_suffix in entries:
+        root = job_dir(job_id)
+        if entry.is_dir():
+            if name is None and not zip_suffix:
+                _move_into(entry, root)
+            continue
+        if zip_suffix or name.endswith(".tmp"):
+            entry.unlink(missing_ok=True)
+            continue
+        target = root / "logs.txt" if name == "logs.txt" else root / MEDIA_DIR / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if target.exists():
+            entry.unlink(missing_ok=True)
+        else:
+            os.replace(entry, target)
+    if entries:
+        logger.info(f"Moved {len(entries)} file(s) of earlier jobs into output/{JOBS_DIR}/")
+    return len(entries)
+
+
+def _derived_exports(job_dir: Path) -> list[Path]:
+    # Everything render_export/precompress/segment_index recreate from the
+    # canonical SRT on the next read.
+    return [
+        f for f in job_dir.glob("final_transcription.*")
+        if f.name != CANONICAL_EXPORT
+    ]
+
+
+def job_disk_usage(job_id: int) -> int:
+    """
+    Bytes a job occupies on disk (everything under its directory).
+
+    Args:
+        job_id (int): The job id.
+
+    Returns:
+        int: Bytes.
+    """
+    total = 0
+    for file in job_dir(job_id).rglob("*"):
+        try:
+            if file.is_file():
+                total += file.stat().st_size
+        except FileNotFoundError:  # deleted under us (cleanup, rename)
+            pass
+    return total
+
+
+def _unlink_all(files: list[Path]) -> int:
+    freed = 0
+    for file in files:
+        try:
+            size = file.stat().st_size
+            file.unlink()
+            freed += size
+        except FileNotFoundError:
+            pass
+    return freed
+
+
+def _evict_media(job_id: int) -> int:
+    return _unlink_all(job_media(job_id))
+
+
+def _evict_exports(job_id: int) -> int:
+    return _unlink_all(_derived_exports(job_dir(job_id)))
+
+
+def _evict_job(job_id: int) -> int:
+    freed = job_disk_usage(job_id)
+    if STORAGE.remote:  # the store keeps the job; only this copy goes
+        shutil.rmtree(job_dir(job_id), ignore_errors=True)
+        return freed
+    cleanup_files(job_id)
+    DB.delete_transcription(job_id)
+    return freed
+
+
+# Eviction order: media is only needed to re-run a job; derived exports are
+# re-rendered on the next read; the job itself (its canonical SRT) goes last.
+_EVICTIONS = ((1, "media", _evict_media), (2, "exports", _evict_exports), (3, "job", _evict_job))
+
+
+def enforce_output_quota(quota_mb: int = OUTPUT_QUOTA_MB) -> int:
+    """
+    One bounded pass of the output disk quota. Measures up to
+    QUOTA_MEASURE_BATCH finished jobs that are new or were read since their
+    last measurement, then, while the outputs exceed ``quota_mb``, evicts
+    least recently used finished jobs — every such job's media first, then
+    its re-renderable exports, and only then whole jobs — taking at most
+    QUOTA_EVICT_BATCH steps. In-flight jobs count towards the usage but are
+    never evicted. The next pass continues where this one stopped. With a
+    remote STORAGE, output/ is only a working copy, so the whole-job step
+    drops the local files and keeps the job.
+
+    Args:
+        quota_mb (int): Budget in MB. ``<= 0`` disables the quota.
+
+    Returns:
+        int: Bytes freed.
+    """
+    if quota_mb <= 0:
+        return 0
+    budget = quota_mb * 1024 * 1024
+    now = time.time()
+    for job_id in DB.jobs_to_measure(QUOTA_MEASURE_BATCH):
+        DB.record_job_size(job_id, job_disk_usage(job_id), now)
+    used = DB.storage_usage() + sum(
+        job_disk_usage(job_id) for job_id, _pid, _created_at in DB.get_active_jobs()
+    )
+
+    freed = steps = 0
+    for tier, name, evict in _EVICTIONS:
+        while used - freed > budget and steps < QUOTA_EVICT_BATCH:
+            candidates = DB.eviction_candidates(tier, QUOTA_EVICT_BATCH - steps)
+            if not candidates:
+                break
+            for job_id in candidates:
+                if used - freed <= budget:
+                    break
+                bytes_freed = evict(job_id)
+                if tier < 3 or STORAGE.remote:  # else the job's row is gone
+                    DB.record_eviction(job_id, tier, bytes_freed)
+                metrics.EVICTED_BYTES.labels(name).inc(bytes_freed)
+                freed += bytes_freed
+                steps += 1
+    if freed:
+        logger.info(
+            f"Output quota: freed {freed / 1024 / 1024:.1f} MB in {steps} step(s); "
+            f"{(used - freed) / 1024 / 1024:.1f} of {quota_mb} MB used"
+        )
+    return freed
@@ -0,0 +1,191 @@
+"""
+Standalone transcription worker for WORKER_MODE=queue. The web process
+queues prepared jobs (transcriptionsDB.enqueue_job) instead of spawning
+their workers, and any number of these claim them — in other processes or
+containers on the web host, which open transcriptions.db directly, or on
+other machines:
+
+    python src/worker.py --concurrency 2
+
+transcriptions.db is SQLite in WAL mode, which needs a local disk, so a worker
+on another machine sets QUEUE_URL to the web tier's URL and WORKER_TOKEN to
+its token: it and its jobs' subprocesses then go through the web tier's
+/queue API (queue_client.py). Such a worker shares no disk with the web tier,
+so it needs STORAGE_BACKEND=s3: media comes from the bucket and the job's
+files go back to it, after which its local copy is removed.
+
+A claim is a lease of WORKER_LEASE_SECONDS, renewed every third of that
+while the job's transcribe_process.py runs. A worker that vanishes stops
+renewing, and once its lease lapses the job is claimed again, up to
+WORKER_MAX_ATTEMPTS times. A renewal that fails because the job was
+canceled (or the lease went to another worker) kills the job's process; one
+that errors (the database is busy, the web tier unreachable) is retried until
+the lease would lapse, then the process is killed and the job left to be
+claimed again. SIGTERM/SIGINT stop claiming; running jobs are finished first.
+
+Job metrics (model load, real-time factor, stages, DeepL) are written by the
+job subprocesses to PROMETHEUS_MULTIPROC_DIR. If that is the web tier's, its
+/metrics includes them. Otherwise set WORKER_METRICS_PORT and scrape each
+worker there as well.
+"""
+
+import argparse
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import threading
+import time
+
+from loguru import logger
+
+import metrics
+import status
+from utils import DB, QUEUE_URL, STORAGE, job_dir, publish, spawn_worker
+
+WORKER_LEASE_SECONDS = float(os.getenv("WORKER_LEASE_SECONDS", "60"))
+WORKER_MAX_ATTEMPTS = int(os.getenv("WORKER_MAX_ATTEMPTS", "3"))
+WORKER_POLL_SECONDS = float(os.getenv("WORKER_POLL_SECONDS", "2"))
+# Serve this worker's job metrics here (0 = don't). Only for a worker with its
+# own PROMETHEUS_MULTIPROC_DIR; one sharing the web tier's is already in /metrics.
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "0"))
+
+
+def run_job(job_id: int, args: dict, worker: str) -> None:
+    """
+    Run a claimed job's transcription subprocess to the end, renewing the
+    lease meanwhile, then take the job off the queue.
+
+    Args:
+        job_id (int): The claimed job.
+        args (dict): Its worker arguments (see utils.spawn_worker).
+        worker (str): This worker's id, which holds the lease.
+
+    Returns:
+        None
+    """
+    lost = False  # the job is no longer ours: leave its status alone
+    release = True
+    process = None
+    try:
+        DB.update_transcription_status(status.STARTING, "", 20, job_id)
+        process = spawn_worker(job_id, args)
+        logger.info(f"Job {job_id}: started PID {process.pid}")
+        renewed = time.monotonic()
+        while True:
+            try:
+                process.wait(timeout=WORKER_LEASE_SECONDS / 3)
+                break
+            except subprocess.TimeoutExpired:
+                pass
+            try:
+                held = DB.renew_lease(job_id, worker, WORKER_LEASE_SECONDS)
+            except Exception as e:  # e.g. "database is locked": retry while the lease lasts
+                logger.warning(f"Job {job_id}: renewing the lease failed: {e}")
+                if time.monotonic() - renewed + WORKER_LEASE_SECONDS / 3 < WORKER_LEASE_SECONDS:
+                    continue
+                # Lapsing before the next try: the job goes back to the queue.
+                logger.warning(f"Job {job_id}: lease lapsing; stopping PID {process.pid}")
+                lost, release = True, False
+            else:
+                if held:
+                    renewed = time.monotonic()
+                    continue
+                logger.warning(f"Job {job_id}: canceled or lease lost; stopping PID {process.pid}")
+                lost = True
+            process.kill()
+            process.wait()
+            break
+        row = DB.get_transcription(job_id)
+        if not lost and row and row["progress"] < 100 and not status.is_locked(row["status"]):
+            # Exited without a final status: import crash, OOM kill, ...
+            logger.error(f"Job {job_id}: PID {process.pid} died without finishing")
+            DB.update_transcription_status(
+                status.worker_died(f"Details in the job's logs.txt on {socket.gethostname()}."),
+                str(time.time()), 0, job_id,
+            )
+    except Exception as e:
+        logger.exception(f"Job {job_id}: {e}")
+        if process is not None and process.poll() is None:
+            # Failed here, so it must not finish (and overwrite the Error) later.
+            process.kill()
+            process.wait()
+        DB.update_transcription_status(status.ERROR, "", 0, job_id)
+    finally:
+        if release:
+            DB.release_job(job_id, worker)
+    if not lost:
+        try:
+            publish(job_dir(job_id) / "logs.txt")  # with the lines after the exports
+        except OSError as e:  # e.g. the job was deleted meanwhile
+            logger.warning(f"Job {job_id}: could not store logs.txt: {e}")
+    if QUEUE_URL:
+        # Off-host, this is only a working copy: the bucket has the job.
+        shutil.rmtree(job_dir(job_id), ignore_errors=True)
+
+
+def serve(worker: str, concurrency: int, stop: threading.Event) -> None:
+    """
+    Claim and run jobs, ``concurrency`` at a time, until ``stop`` is set.
+
+    Args:
+        worker (str): This worker's id in the queue.
+        concurrency (int): Jobs run at once.
+        stop (threading.Event): Set to stop claiming; running jobs finish.
+
+    Returns:
+        None
+    """
+
+    def loop() -> None:
+        while not stop.is_set():
+            try:
+                claimed = DB.claim_job(worker, WORKER_LEASE_SECONDS, WORKER_MAX_ATTEMPTS)
+            except Exception as e:  # e.g. the database is briefly unreachable
+                logger.warning(f"Claiming a job failed: {e}")
+                claimed = None
+            if claimed is None:
+                stop.wait(WORKER_POLL_SECONDS)
+                continue
+            job_id, args, attempt = claimed
+            logger.info(f"Job {job_id}: claimed by {worker} (attempt {attempt})")
+            run_job(job_id, args, worker)
+
+    threads = [
+        threading.Thread(target=loop, name=f"worker-{slot}") for slot in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--concurrency", type=int, default=int(os.getenv("WORKER_CONCURRENCY", "1")),
+        help="jobs run at once (each is a full Whisper process)",
+    )
+    parser.add_argument(
+        "--name", default=f"{socket.gethostname()}:{os.getpid()}", help="worker id in the queue"
+    )
+    args = parser.parse_args()
+    if QUEUE_URL and not STORAGE.remote:
+        parser.error("QUEUE_URL needs STORAGE_BACKEND=s3 (this host has no copy of the jobs)")
+
+    if WORKER_METRICS_PORT:
+        metrics.reset()  # samples of this worker's previous run
+        metrics.serve(WORKER_METRICS_PORT)
+        logger.info(f"Serving job metrics on port {WORKER_METRICS_PORT}")
+
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop.set())
+    logger.info(f"Worker {args.name} waiting for jobs ({args.concurrency} at a time)")
+    serve(args.name, args.concurrency, stop)
+    logger.info(f"Worker {args.name} stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -99,18 +99,7 @@ function resetTranscription() {
     document.querySelector('.download-button').classList.add('hidden');
     document.querySelector('.close-button').classList.add('hidden');
 
-    // Check if preview elements exist before setting innerText
-    const previewText = document.getElementById('previewText');
-    if (previewText) previewText.innerText = '';
-
-    const previewSRT = document.getElementById('previewSRT');
-    if (previewSRT) previewSRT.innerText = '';
-
-    const previewVTT = document.getElementById('previewVTT');
-    if (previewVTT) previewVTT.innerText = '';
-
-    const previewSBV = document.getElementById('previewSBV');
-    if (previewSBV) previewSBV.innerText = '';
+    resetPreview();
 
     // Reset preview content
     document.getElementById('previewContainer').style.display = 'none';
@@ -370,68 +359,119 @@ function updateProgress(progress, phase, model, language, translation, timeTaken
     }
 }
 
-function fetchPreview() {
-    const xhr = new XMLHttpRequest();
-    xhr.open('GET', `/preview?pid=${currentPid}`, true);
-    xhr.onload = function () {
-        if (xhr.status === 200) {
-            const response = JSON.parse(xhr.responseText);
+// The preview loads a page of segments at a time from /segments as the user
+// scrolls, and only the active tab is rendered (from the segments), so long
+// transcripts never arrive or sit in the page four times over.
+const PREVIEW_PAGE_SIZE = 200;
+const PREVIEW_ELEMENTS = { txt: 'previewText', srt: 'previewSRT', vtt: 'previewVTT', sbv: 'previewSBV' };
+let previewSegments = [];
+let previewCursor = 0;  // next segment to fetch; null once all are loaded
+let previewLoading = false;
+let previewFormat = 'txt';
+
+function resetPreview() {
+    previewSegments = [];
+    previewCursor = 0;
+    previewLoading = false;
+    previewFormat = 'txt';
+    Object.values(PREVIEW_ELEMENTS).forEach(id => {
+        const el = document.getElementById(id);
+        if (el) el.textContent = '';
+    });
+}
 
-            // Preview content
-            document.getElementById('previewText').innerText = response.txt;
-            document.getElementById('previewSRT').innerText = response.srt;
-            document.getElementById('previewVTT').innerText = response.vtt;
-            document.getElementById('previewSBV').innerText = response.sbv;
+function timecode(ms, sep) {
+    const pad = (n, width) => String(n).padStart(width, '0');
+    const hours = Math.floor(ms / 3600000);
+    const minutes = Math.floor(ms / 60000) % 60;
+    const seconds = Math.floor(ms / 1000) % 60;
+    return `${pad(hours, 2)}:${pad(minutes, 2)}:${pad(seconds, 2)}${sep}${pad(ms % 1000, 3)}`;
+}
 
+// Same layout as the server's exports; the .txt export is SRT-formatted too.
+function formatSegments(format, segments, first) {
+    const header = format === 'vtt' && first === 0 ? 'WEBVTT\n\n' : '';
+    return header + segments.map((seg, i) => {
+        switch (format) {
+            case 'vtt':
+                return `${timecode(seg.start, '.')} --> ${timecode(seg.end, '.')}\n${seg.text}\n\n`;
+            case 'sbv':
+                return `${timecode(seg.start, '.')},${timecode(seg.end, '.')}\n${seg.text}\n\n`;
+            default:
+                return `${first + i + 1}\n${timecode(seg.start, ',')} --> ${timecode(seg.end, ',')}\n${seg.text}\n\n`;
+        }
+    }).join('');
+}
 
-            // if previewContent is hidden, unhide it
-            if (document.getElementById('previewContent').classList.contains('hidden')) {
-                document.getElementById('previewContent').classList.remove('hidden');
-            }
+function fetchPreview() {
+    resetPreview();
+    fetchPreviewPage();
+}
 
-            // Show the text preview by default
-            showPreview('txt'); // Show the text preview by default
-        } else {
+function fetchPreviewPage() {
+    if (previewLoading || previewCursor === null) return;
+    previewLoading = true;
+    const pid = currentPid;
+    const xhr = new XMLHttpRequest();
+    xhr.open('GET', `/segments?pid=${pid}&cursor=${previewCursor}&limit=${PREVIEW_PAGE_SIZE}`, true);
+    xhr.onload = function () {
+        if (pid !== currentPid) return;  // a new job started meanwhile
+        previewLoading = false;
+        if (xhr.status !== 200) {
             showAlert('Error', 'Failed to fetch the preview.');
+            return;
         }
+        const page = JSON.parse(xhr.responseText);
+        const first = previewSegments.length;
+        previewSegments.push(...page.segments);
+        previewCursor = page.next_cursor;
+        // textContent: transcript text is never parsed as HTML
+        document.getElementById(PREVIEW_ELEMENTS[previewFormat])
+            .append(formatSegments(previewFormat, page.segments, first));
+
+        const content = document.getElementById('previewContent');
+        if (content.classList.contains('hidden')) {
+            content.classList.remove('hidden');
+            showPreview(previewFormat);
+        }
+        // Keep going until the box can scroll, so scrolling can load more.
+        if (content.clientHeight && content.scrollHeight <= content.clientHeight) fetchPreviewPage();
+    };
+    xhr.onerror = function () {
+        previewLoading = false;
+        showAlert('Error', 'Failed to fetch the preview.');
     };
     xhr.send();
 }
 
-function showPreview(format) {
-    // Hide all previews
-    document.getElementById('previewText').classList.add('hidden');
-    document.getElementById('previewSRT').classList.add('hidden');
-    document.getElementById('previewVTT').classList.add('hidden');
-    document.getElementById('previewSBV').classList.add('hidden');
-
-    // Remove active class from all tab buttons
-    const tabButtons = document.querySelectorAll('.tab-button');
-    tabButtons.forEach(button => {
-        button.classList.remove('active');
+document.addEventListener('DOMContentLoaded', function () {
+    const content = document.getElementById('previewContent');
+    if (!content) return;
+    content.addEventListener('scroll', function () {
+        if (content.scrollTop + content.clientHeight >= content.scrollHeight - 200) {
+            fetchPreviewPage();
+        }
     });
+});
 
-    // Show the selected preview and set the active tab button
-    switch (format) {
-        case 'txt':
-            document.getElementById('previewText').classList.remove('hidden');
-            document.querySelector('.tab-button[onclick="showPreview(\'txt\')"]').classList.add('active');
-            break;
-        case 'srt':
-            document.getElementById('previewSRT').classList.remove('hidden');
-            document.querySelector('.tab-button[onclick="showPreview(\'srt\')"]').classList.add('active');
-            break;
-        case 'vtt':
-            document.getElementById('previewVTT').classList.remove('hidden');
-            document.querySelector('.tab-button[onclick="showPreview(\'vtt\')"]').classList.add('active');
-            break;
-        case 'sbv':
-            document.getElementById('previewSBV').classList.remove('hidden');
-            document.querySelector('.tab-button[onclick="showPreview(\'sbv\')"]').classList.add('active');
-            break;
-        default:
-            console.error('Unsupported format:', format);
+function showPreview(format) {
+    if (!PREVIEW_ELEMENTS[format]) {
+        console.error('Unsupported format:', format);
+        return;
     }
+    // Render the loaded segments into the selected tab only.
+    previewFormat = format;
+    Object.entries(PREVIEW_ELEMENTS).forEach(([fmt, id]) => {
+        const el = document.getElementById(id);
+        el.classList.toggle('hidden', fmt !== format);
+        el.textContent = fmt === format ? formatSegments(fmt, previewSegments, 0) : '';
+    });
+
+    // Set the active tab button
+    document.querySelectorAll('.tab-button').forEach(button => {
+        button.classList.remove('active');
+    });
+    document.querySelector(`.tab-button[onclick="showPreview('${format}')"]`).classList.add('active');
 }
 
 // Download one export directly (used by the .pdf button, which has no text
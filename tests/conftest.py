@@ -2,14 +2,24 @@
 Shared fixtures. Adds src/ to the import path and stubs the heavy ML modules
 (torch, stable_whisper) when they are not installed, so the suite runs in a
 lightweight environment; with the real packages installed the stubs are unused.
+Metrics samples go to a temp dir rather than the working tree's output/metrics
+(benchmarks/conftest.py imports this module first, so it applies there too).
 """
 
+import atexit
+import os
+import shutil
 import sys
+import tempfile
 import types
 from pathlib import Path
 
 import pytest
 
+# Before anything imports metrics: prometheus_client reads it at import time.
+os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="txtify-metrics-")
+atexit.register(shutil.rmtree, os.environ["PROMETHEUS_MULTIPROC_DIR"], True)
+
 SRC_DIR = Path(__file__).resolve().parent.parent / "src"
 sys.path.insert(0, str(SRC_DIR))
 
@@ -1,6 +1,8 @@
 import io
+import zipfile
 
 import main
+from segments import Segments
 
 
 def test_health(client):
@@ -60,15 +62,21 @@ def test_history_retry_refuses_running(client, monkeypatch):
 
 
 def test_history_retry_upload_reuses_source(client, monkeypatch, tmp_path):
+    import utils
     monkeypatch.setattr(main, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(utils, "OUTPUT_DIR", tmp_path)
     monkeypatch.setattr(main, "handle_transcription", lambda *a, **k: True)
     job = _seed(media_path="clip.mp3")
-    (tmp_path / f"{job}_clip.mp3").write_bytes(b"fake")  # source still on disk
+    media = utils.job_dir(job) / "media"
+    media.mkdir(parents=True)
+    (media / "clip.mp3").write_bytes(b"fake")  # source still on disk
     assert client.post(f"/history/retry?pid={job}").status_code == 200
 
 
 def test_history_retry_upload_missing_source_is_410(client, monkeypatch, tmp_path):
+    import utils
     monkeypatch.setattr(main, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(utils, "OUTPUT_DIR", tmp_path)
     monkeypatch.setattr(main, "handle_transcription", lambda *a, **k: True)
     job = _seed(media_path="clip.mp3")  # no file on disk
     assert client.post(f"/history/retry?pid={job}").status_code == 410
@@ -78,11 +86,11 @@ def test_history_delete_removes_job_and_files(client, monkeypatch, tmp_path):
     import utils
     monkeypatch.setattr(utils, "OUTPUT_DIR", tmp_path)
     job_id = _completed_job(client, monkeypatch, tmp_path)
-    assert (tmp_path / str(job_id)).exists()
+    assert utils.job_dir(job_id).exists()
     r = client.post(f"/history/delete?pid={job_id}")
     assert r.status_code == 200
     assert main.DB.get_transcription(job_id) is None
-    assert not (tmp_path / str(job_id)).exists()
+    assert not utils.job_dir(job_id).exists()
 
 
 def test_history_delete_refuses_running_job(client, monkeypatch):
@@ -179,6 +187,7 @@ def test_transcribe_returns_job_id_and_status(client, monkeypatch):
     status = client.get(f"/status?pid={job_id}")
     assert status.status_code == 200
     assert status.json()["progress"] == "10"
+    assert list(status.json()["stages"]) == ["prepare"]
 
     assert client.get("/status?pid=99999").status_code == 404
 
@@ -244,7 +253,7 @@ def test_worker_argv_contract(monkeypatch, tmp_path):
     # translation, language_translation, file_export — in this order.
     assert args[1].endswith("transcribe_process.py")
     assert args[2] == "7"
-    assert args[3].endswith("7_clip.mp3")
+    assert args[3] == str(tmp_path / "jobs" / "07" / "7" / "media" / "clip.mp3")
     assert args[4:] == ["en", "whisper_tiny", "none", "EL", "all"]
 
 
@@ -335,16 +344,18 @@ def test_transcribe_busy_returns_429(client, monkeypatch):
 
 def _completed_job(client, monkeypatch, tmp_path):
     """Insert a completed job with real export files in a temp OUTPUT_DIR."""
+    import utils
+
     monkeypatch.setattr(main, "handle_transcription", lambda *a, **k: True)
-    monkeypatch.setattr(main, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(utils, "OUTPUT_DIR", tmp_path)
     job_id = client.post(
         "/transcribe",
         data=_form(),
         files={"media": ("a.mp3", io.BytesIO(b"x"), "audio/mpeg")},
     ).json()["pid"]
     main.DB.update_transcription_status("Completed successfully!", "2.0", 100, job_id)
-    job_dir = tmp_path / str(job_id)
-    job_dir.mkdir()
+    job_dir = utils.job_dir(job_id)
+    job_dir.mkdir(parents=True)
     for ext in ("txt", "srt", "vtt", "sbv", "pdf"):
         (job_dir / f"final_transcription.{ext}").write_text(
             f"content-{ext}", encoding="utf-8"
@@ -360,8 +371,187 @@ def test_download_preview_serves_final_files(client, monkeypatch, tmp_path):
         assert r.content.decode() == f"content-{fmt}"
 
 
+def _canonical_only_job(client, monkeypatch, tmp_path):
+    """A completed job as the worker leaves it: only final_transcription.srt."""
+    job_id = _completed_job(client, monkeypatch, tmp_path)
+    job_dir = main.job_dir(job_id)
+    for file in job_dir.iterdir():
+        file.unlink()
+    (job_dir / "final_transcription.srt").write_text(
+        "1\n00:00:00,000 --> 00:00:01,500\nHello\n\n", encoding="utf-8"
+    )
+    return job_id, job_dir
+
+
+def test_exports_are_rendered_on_first_request_and_cached(client, monkeypatch, tmp_path):
+    job_id, job_dir = _canonical_only_job(client, monkeypatch, tmp_path)
+
+    r = client.get(f"/downloadPreview?pid={job_id}&format=vtt")
+    assert r.status_code == 200
+    assert r.text == "WEBVTT\n\n00:00:00.000 --> 00:00:01.500\nHello\n\n"
+    # Only the requested format was rendered (plus its compressed copies);
+    # nothing left behind.
+    assert sorted(f.name for f in job_dir.iterdir() if f.is_file()) == [
+        "final_transcription.srt",
+        "final_transcription.vtt",
+        "final_transcription.vtt.br",
+        "final_transcription.vtt.gz",
+    ]
+    assert not list(tmp_path.rglob("*.tmp"))
+
+    (job_dir / "final_transcription.vtt").write_text("cached", encoding="utf-8")
+    r = client.get(
+        f"/downloadPreview?pid={job_id}&format=vtt",
+        headers={"Accept-Encoding": "identity"},
+    )
+    assert r.text == "cached"
+
+
+def test_preview_and_download_render_missing_formats(client, monkeypatch, tmp_path):
+    job_id, job_dir = _canonical_only_job(client, monkeypatch, tmp_path)
+
+    body = client.get(f"/preview?pid={job_id}").json()
+    assert body["sbv"] == "00:00:00.000,00:00:01.500\nHello\n\n"
+    assert body["txt"] == body["srt"]
+
+    r = client.get(f"/download?pid={job_id}")
+    assert r.status_code == 200
+    assert r.headers["content-length"] == str(len(r.content))
+    assert not list(tmp_path.rglob("*.zip"))  # streamed, no copy on disk
+    with zipfile.ZipFile(io.BytesIO(r.content)) as zf:
+        assert {f"final_transcription.{ext}" for ext in ("txt", "srt", "vtt", "sbv", "pdf")} <= set(zf.namelist())
+
+
+def test_exports_revalidate_with_304(client, monkeypatch, tmp_path):
+    job_id, _ = _canonical_only_job(client, monkeypatch, tmp_path)
+
+    for url in (
+        f"/downloadPreview?pid={job_id}&format=srt",
+        f"/preview?pid={job_id}",
+        f"/download?pid={job_id}",
+    ):
+        r = client.get(url)
+        assert r.status_code == 200
+        assert "immutable" in r.headers["cache-control"]
+        etag, modified = r.headers["etag"], r.headers["last-modified"]
+
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+        assert client.get(url, headers={"If-Modified-Since": modified}).status_code == 304
+        # If-None-Match takes precedence over a matching date.
+        r = client.get(url, headers={"If-None-Match": '"stale"', "If-Modified-Since": modified})
+        assert r.status_code == 200
+
+
+def test_text_exports_are_served_precompressed(client, monkeypatch, tmp_path):
+    job_id, job_dir = _canonical_only_job(client, monkeypatch, tmp_path)
+    url = f"/downloadPreview?pid={job_id}&format=vtt"
+    plain = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+    for encoding in ("br", "gzip"):
+        r = client.get(url, headers={"Accept-Encoding": encoding})
+        assert r.headers["content-encoding"] == encoding
+        assert r.headers["vary"] == "Accept-Encoding"
+        assert r.headers["etag"] != plain.headers["etag"]
+        assert r.text == plain.text  # decoded by the client
+    assert (job_dir / "final_transcription.vtt.gz").exists()
+
+    r = client.get(f"/preview?pid={job_id}", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.json()["vtt"] == plain.text
+
+    # The zip holds the exports once, not their compressed copies.
+    with zipfile.ZipFile(io.BytesIO(client.get(f"/download?pid={job_id}").content)) as zf:
+        assert not [name for name in zf.namelist() if name.endswith((".gz", ".br"))]
+
+
+def test_segments_pages_with_a_cursor(client, monkeypatch, tmp_path):
+    job_id, job_dir = _canonical_only_job(client, monkeypatch, tmp_path)
+    Segments.from_seconds(
+        [(i * 10, i * 10 + 5, f"line {i}") for i in range(25)]
+    ).write_srt(job_dir / "final_transcription.srt")
+
+    texts, cursor = [], 0
+    while cursor is not None:
+        page = client.get(f"/segments?pid={job_id}&cursor={cursor}&limit=10").json()
+        assert page["total"] == 25 and page["cursor"] == cursor
+        texts += [seg["text"] for seg in page["segments"]]
+        cursor = page["next_cursor"]
+    assert texts == [f"line {i}" for i in range(25)]
+    assert page["duration_ms"] == 245000
+
+    # A time window: from the segment running at 42 s up to (not incl.) 80 s.
+    page = client.get(f"/segments?pid={job_id}&start_ms=42000&end_ms=80000").json()
+    assert [seg["start"] for seg in page["segments"]] == [40000, 50000, 60000, 70000]
+    assert page["next_cursor"] is None
+    page = client.get(f"/segments?pid={job_id}&start_ms=42000&end_ms=80000&limit=3").json()
+    assert page["next_cursor"] == 7
+
+    # The index is not part of the download.
+    assert (job_dir / "final_transcription.idx").exists()
+    with zipfile.ZipFile(io.BytesIO(client.get(f"/download?pid={job_id}").content)) as zf:
+        assert "final_transcription.idx" not in zf.namelist()
+
+
+def test_segments_rejects_bad_pages_and_missing_jobs(client, monkeypatch, tmp_path):
+    job_id, _ = _canonical_only_job(client, monkeypatch, tmp_path)
+    assert client.get(f"/segments?pid={job_id}&limit=0").status_code == 400
+    assert client.get(f"/segments?pid={job_id}&cursor=-1").status_code == 400
+    assert client.get("/segments?pid=999").status_code == 404
+
+
+def test_search_finds_jobs_and_timestamps(client, monkeypatch, tmp_path):
+    job_id = _completed_job(client, monkeypatch, tmp_path)
+    main.DB.index_transcript(
+        job_id,
+        Segments.from_seconds([(0, 2, "hello there"), (2, 4, "nothing"), (4, 6, "hello again")]),
+    )
+
+    body = client.get("/search?q=hello").json()
+    assert body["next_cursor"] is None
+    [result] = body["results"]
+    assert result["job_id"] == job_id and result["source"].endswith("a.mp3")
+    assert [(m["start"], m["text"]) for m in result["matches"]] == [
+        (0, "hello there"), (4000, "hello again")
+    ]
+    page = client.get("/search?q=hello&limit=1").json()
+    assert page["next_cursor"] is not None
+    assert client.get("/search?q=hello&limit=1&cursor=" + str(page["next_cursor"])).json()[
+        "results"
+    ][0]["matches"][0]["text"] == "hello there"
+
+    assert client.get("/search?q=%20").status_code == 400
+    monkeypatch.setattr(main, "ENABLE_HISTORY", False)
+    assert client.get("/search?q=hello").status_code == 404
+
+
+def test_cleanup_removes_search_entries(tmp_path, monkeypatch):
+    import db as db_mod
+    import utils
+
+    test_db = db_mod.transcriptionsDB(str(tmp_path / "t.db"))
+    monkeypatch.setattr(utils, "DB", test_db)
+    monkeypatch.setattr(utils, "OUTPUT_DIR", tmp_path)
+    job = test_db.insert_transcription(
+        "", "f.mp3", "en", "whisper_tiny", "none", "en", "all", "Completed successfully!", "1.0"
+    )
+    test_db.update_transcription_status("Completed successfully!", "2.0", 100, job)
+    utils.job_dir(job).mkdir(parents=True)
+    Segments.from_seconds([(0, 1, "findable")]).write_srt(utils.job_dir(job) / "final_transcription.srt")
+
+    # Jobs finished before the index existed are picked up once.
+    assert utils.index_unsearchable_jobs() == 1
+    assert utils.index_unsearchable_jobs() == 0
+    assert test_db.search_transcripts("findable")
+
+    utils.purge_expired_jobs(retention_days=1)
+    assert not test_db.search_transcripts("findable")
+
+
 def test_preview_missing_files_is_404(client, monkeypatch, tmp_path):
-    monkeypatch.setattr(main, "OUTPUT_DIR", tmp_path)
+    import utils
+
+    monkeypatch.setattr(utils, "OUTPUT_DIR", tmp_path)
     r = client.get("/preview?pid=12345")
     assert r.status_code == 404
     assert "Preview not found" in r.json()["message"]
@@ -371,7 +561,7 @@ def test_cancel_completed_job_is_400_and_keeps_files(client, monkeypatch, tmp_pa
     job_id = _completed_job(client, monkeypatch, tmp_path)
     r = client.post(f"/cancel?pid={job_id}")
     assert r.status_code == 400
-    assert (tmp_path / str(job_id) / "final_transcription.txt").exists()
+    assert (main.job_dir(job_id) / "final_transcription.txt").exists()
 
 
 def test_cancel_running_job_marks_canceled(client, monkeypatch):
@@ -403,8 +593,97 @@ def test_status_marks_error_when_worker_died(client, monkeypatch):
     main.DB.update_transcription_status("Transcribing...", "", 40, job_id)
     monkeypatch.setattr(main, "is_worker_alive", lambda pid: False)
 
-    phase = client.get(f"/status?pid={job_id}").json()["phase"]
+    body = client.get(f"/status?pid={job_id}").json()
+    phase = body["phase"]
     assert phase.startswith("Error:")
     assert "stopped unexpectedly" in phase
+    assert "transcribe" in body["stages"]  # same shape as every other response
     # Now terminal: a later poll stays Error (is_locked stops re-detection).
     assert client.get(f"/status?pid={job_id}").json()["phase"].startswith("Error:")
+
+
+def test_orphan_recovery_spares_sibling_processes_jobs(client, monkeypatch):
+    import os
+
+    import utils
+
+    def job(owner=None, pid=0):
+        job_id = main.DB.insert_transcription(
+            "", "a.mp3", "en", "whisper_tiny", "none", "en", "all",
+            "Downloading media...", "1.0", owner=owner,
+        )
+        if pid:
+            main.DB.set_process_pid(pid, job_id)
+        return job_id
+
+    # Another web process (here: our parent) is downloading one job; ours died
+    # mid-download on another; one job predates owners; one worker is gone.
+    sibling = job(owner=(os.getppid(), utils.psutil.Process(os.getppid()).create_time()))
+    dead_owner = job(owner=(os.getpid(), 1.0))  # pid recycled: not the owner
+    legacy = job()
+    dead_worker = job(pid=999999)
+    monkeypatch.setattr(main, "is_worker_alive", lambda pid: False)
+
+    assert main._count_active_jobs() == 1
+    assert main._recover_orphaned_jobs() == 3
+    assert main.DB.get_transcription(sibling)["status"] == "Downloading media..."
+    for job_id in (dead_owner, legacy):
+        assert main.DB.get_transcription(job_id)["status"] == "Error"
+    assert "stopped unexpectedly" in main.DB.get_transcription(dead_worker)["status"]
+
+
+def test_only_the_leader_takes_over(client, monkeypatch):
+    took_over = []
+    monkeypatch.setattr(main, "_take_over", lambda: took_over.append(True))
+    monkeypatch.setattr(main, "_leader", False)
+    main.DB.acquire_lease(main.LEADER_LEASE, "other-host:1", 30)
+
+    assert not main._elect() and not main._leader  # a live sibling leads
+    main.DB.release_lease(main.LEADER_LEASE, "other-host:1")
+    assert main._elect() and main._leader
+    assert not main._elect()  # renewal: no second takeover
+    assert took_over == [True]
+
+
+def test_metrics_exposes_job_gauges_and_route_latency(client, monkeypatch):
+    monkeypatch.setattr(main, "handle_transcription", lambda *a, **k: True)
+    client.post(
+        "/transcribe",
+        data=_form(),
+        files={"media": ("a.mp3", io.BytesIO(b"x"), "audio/mpeg")},
+    )  # accepted, no worker pid yet -> queued
+    client.get("/status?pid=99999")
+    body = client.get("/metrics").text
+    assert "txtify_jobs_queued 1.0" in body
+    assert "txtify_jobs_active 0.0" in body
+    assert 'route="/status"' in body and 'status="404"' in body
+    assert "pid=99999" not in body  # route templates only, never raw URLs
+
+
+def test_profile_flag_reaches_the_worker_env(client, monkeypatch, tmp_path):
+    import utils
+
+    seen = {}
+    monkeypatch.setattr(main, "handle_transcription", lambda *a, **k: seen.update(k) or True)
+    client.post(
+        "/transcribe",
+        data={**_form(), "profile": "true"},
+        files={"media": ("a.mp3", io.BytesIO(b"x"), "audio/mpeg")},
+    )
+    assert seen["profile"] is True
+
+    class FakeProc:
+        pid = 4242
+
+        def __init__(self, args, **kwargs):
+            seen["env"] = kwargs.get("env")
+
+    class FakeUpload:
+        filename = "clip.mp3"
+        file = io.BytesIO(b"x")
+
+    monkeypatch.setattr(utils.subprocess, "Popen", FakeProc)
+    monkeypatch.setattr(utils, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(utils.DB, "set_process_pid", lambda *a: None)
+    utils.handle_transcription(7, None, FakeUpload(), "en", "whisper_tiny", "none", "EL", "all", profile=True)
+    assert seen["env"]["PROFILE_JOBS"] == "True"
@@ -0,0 +1,79 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from bench_client import (  # noqa: E402
+    compare,
+    curves,
+    curves_markdown,
+    markdown,
+    parse_baseline,
+    summarize,
+    wer,
+)
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def run(label, wall, cache="warm", **extra):
+    return {
+        "label": label, "ok": True, "wall_s": wall, "audio_s": 6.0, "rtf": round(wall / 6, 3),
+        "cache": cache, "peak_rss_mb": 300.0, "wer": 6.7, "text_ok": True,
+        "stages": {"load": wall / 4, "transcribe": wall / 2}, "first_line": "Hello.", **extra,
+    }
+
+
+def test_wer_ignores_srt_indices_and_timestamps():
+    srt = "1\n00:00:00,000 --> 00:00:02,000\nThe quick brown fox.\n\n2\n00:00:02,000 --> 00:00:03,000\nJumps!\n"
+    assert wer("the quick brown fox jumps", srt) == 0.0
+    assert wer("the quick brown fox jumps over", srt) == round(100 / 6, 1)
+
+
+def test_summary_splits_cold_and_warm_runs():
+    summary = summarize([
+        run("whisper_tiny", 30.0, cache="cold"),
+        run("whisper_tiny", 5.0),
+        run("whisper_tiny", 7.0),
+        {"label": "whisper_large", "ok": False, "error": "Error"},
+    ])
+
+    tiny = summary["whisper_tiny"]
+    assert (tiny["cold_s"], tiny["warm_s"]) == (30.0, 6.0)
+    assert (tiny["load_cold_s"], tiny["load_warm_s"]) == (7.5, 1.5)
+    assert summary["whisper_large"]["error"] == "Error"
+    table = markdown(summary)
+    assert "| whisper_tiny | 30s | 6s | 6s |" in table
+    assert "| whisper_large | FAILED |" in table
+
+
+def test_committed_baseline_parses_by_column_name():
+    baseline = parse_baseline((ROOT / "BENCHMARK.md").read_text())
+
+    assert baseline["whisper_tiny"] == {"cold": 30.0, "warm": 5.0, "wer": 7.0}
+    assert baseline["whisper_large"] == {}  # OOM row: nothing to compare
+
+
+def test_regressions_need_both_relative_and_absolute_change():
+    baseline = {"whisper_tiny": {"warm": 5.0, "wer": 7.0}, "whisper_base": {"warm": 20.0}}
+    summary = summarize([run("whisper_tiny", 5.9), run("whisper_base", 30.0)])
+
+    # tiny: +18% and +0.9s is noise; base: +50% and +10s is a regression
+    assert compare(summary, baseline, threshold=0.25) == [("whisper_base", "warm_s", 20.0, 30.0)]
+
+
+def test_long_fixture_runs_become_throughput_curves():
+    records = [
+        run("whisper_tiny @ 10 min", 60.0, series="whisper_tiny", audio_s=600.0, rtf=0.1),
+        run("whisper_tiny @ 1 min", 12.0, series="whisper_tiny", audio_s=60.0, rtf=0.2),
+        {"label": "whisper_base @ 1 min", "series": "whisper_base", "ok": False,
+         "audio_s": 60.0, "error": "Error"},
+    ]
+
+    series = curves(records)
+
+    assert [p["audio_s"] for p in series["whisper_tiny"]] == [60.0, 600.0]
+    table = curves_markdown(series)
+    assert "| model | 1 min | 10 min |" in table
+    assert "| whisper_tiny | 0.2 (5.0x) | 0.1 (10.0x) |" in table
+    assert "| whisper_base | FAILED | - |" in table
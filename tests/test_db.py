@@ -90,3 +90,212 @@ def test_delete(tmp_path):
     a = insert(db)
     db.delete_transcription(a)
     assert db.get_transcription(a) is None
+
+
+def test_status_writes_are_logged_as_events(tmp_path):
+    db = make_db(tmp_path)
+    a = insert(db)
+    db.update_transcription_status("Processing request...", "", 10, a)  # repeat
+    db.update_transcription_status("Transcribing...", "", 40, a)
+    db.update_transcription_status("Canceled", "1.0", 0, a)
+    db.update_transcription_status("Exporting transcription...", "", 90, a)  # rejected
+    phases = [e["phase"] for e in db.get_job_events(a)]
+    assert phases == ["Processing request...", "Transcribing...", "Canceled"]
+    mono = [e["mono"] for e in db.get_job_events(a)]
+    assert mono == sorted(mono)
+
+    db.delete_transcription(a)
+    assert db.get_job_events(a) == []
+
+
+def test_stage_durations(tmp_path, monkeypatch):
+    import db as db_mod
+
+    clock = iter([100.0, 100.5, 103.0, 110.0, 111.0])
+    monkeypatch.setattr(db_mod.time, "monotonic", lambda: next(clock))
+    db = make_db(tmp_path)
+    a = insert(db)  # prepare @100.0
+    db.update_transcription_status("Loading transcription model...", "", 30, a)  # @100.5
+    db.update_transcription_status("Transcribing...", "", 40, a)  # @103.0
+    db.update_transcription_status("Completed successfully!", "2.0", 100, a)  # @110.0
+    b = insert(db)  # still preparing @111.0; counts up to "now"
+
+    monkeypatch.setattr(db_mod.time, "monotonic", lambda: 115.0)
+    durations = db.get_stage_durations([a, b, 999])
+    assert durations[a] == {"prepare": 0.5, "load": 2.5, "transcribe": 7.0}
+    assert list(durations[a]) == ["prepare", "load", "transcribe"]
+    assert durations[b] == {"prepare": 4.0}
+    assert 999 not in durations
+
+
+def test_translation_memory_round_trip_and_purge(tmp_path):
+    import time
+
+    db = make_db(tmp_path)
+    db.put_translations({"hello": "γεια"}, "EN", "EL")
+    assert db.get_translations(["hello", "other"], "EN", "EL") == {"hello": "γεια"}
+    assert db.get_translations(["hello"], "auto", "EL") == {}
+    assert db.purge_translation_memory(time.time() - 60) == 0  # used just now
+    assert db.purge_translation_memory(time.time() + 60) == 1
+    assert db.get_translations(["hello"], "EN", "EL") == {}
+
+
+def test_job_storage_tracks_finished_jobs_by_last_access(tmp_path):
+    db = make_db(tmp_path)
+    old, recent, running = insert(db), insert(db), insert(db)
+    db.update_transcription_status("Completed successfully!", "100.0", 100, old)
+    db.update_transcription_status("Completed successfully!", "200.0", 100, recent)
+
+    # Finished jobs are picked up at their completion time; a running one never.
+    assert db.jobs_to_measure(10) == [old, recent]
+    db.record_job_size(old, 1000, 300.0)
+    db.record_job_size(recent, 500, 300.0)
+    assert db.jobs_to_measure(10) == []
+    assert db.storage_usage() == 1500
+    assert db.eviction_candidates(1, 10) == [old, recent]
+
+    # Reading a job makes it most recently used, and due for a re-measure.
+    db.touch_job(old, now=400.0)
+    assert db.eviction_candidates(1, 10) == [recent, old]
+    assert db.jobs_to_measure(10) == [old]
+    db.touch_job(old, now=420.0)  # within the granularity: not written
+    assert db.eviction_candidates(1, 10) == [recent, old]
+
+    db.record_eviction(recent, 1, 400)
+    assert db.eviction_candidates(1, 10) == [old]
+    assert db.eviction_candidates(2, 10) == [recent, old]
+    assert db.storage_usage() == 1100
+    db.touch_job(running, now=500.0)
+    assert running not in db.eviction_candidates(3, 10)
+
+    db.delete_transcription(old)
+    assert db.eviction_candidates(3, 10) == [recent]
+
+
+def test_rate_token_bucket_is_shared_between_connections(tmp_path, monkeypatch):
+    import db as db_mod
+
+    now = [1000.0]
+    monkeypatch.setattr(db_mod.time, "time", lambda: now[0])
+    web, worker = make_db(tmp_path), make_db(tmp_path)  # same file, like two processes
+
+    assert web.take_rate_token("deepl", 2, 2) == 0
+    assert worker.take_rate_token("deepl", 2, 2) == 0
+    assert web.take_rate_token("deepl", 2, 2) == 0.5  # empty: one token in 0.5s
+    now[0] += 0.5
+    assert worker.take_rate_token("deepl", 2, 2) == 0
+    now[0] += 60  # refills, but never beyond the burst
+    assert [web.take_rate_token("deepl", 2, 2) for _ in range(3)] == [0, 0, 0.5]
+    assert web.take_rate_token("other", 2, 2) == 0
+
+
+def test_job_queue_leases(tmp_path):
+    node_a, node_b = make_db(tmp_path), make_db(tmp_path)  # same file, two workers
+    first, second, canceled = insert(node_a), insert(node_a), insert(node_a)
+    for job_id, at in ((first, 1.0), (second, 2.0), (canceled, 3.0)):
+        node_a.enqueue_job(job_id, {"file": f"{job_id}.mp3"}, now=at)
+    node_a.update_transcription_status("Canceled", "1.0", 0, canceled)
+
+    assert node_a.claim_job("a", 60, 2, now=100) == (first, {"file": f"{first}.mp3"}, 1)
+    assert node_b.claim_job("b", 60, 2, now=100)[0] == second
+    assert node_b.claim_job("b", 60, 2, now=100) is None  # the canceled one is dropped
+    assert [tuple(row) for row in node_a.get_queue(now=100)] == [(first, "a", 1), (second, "b", 1)]
+
+    # a keeps its lease alive; b vanishes and its job goes to a.
+    assert node_a.renew_lease(first, "a", 60, now=150)
+    assert node_a.claim_job("a", 60, 2, now=170) == (second, {"file": f"{second}.mp3"}, 2)
+    assert not node_b.renew_lease(second, "b", 60, now=171)
+    node_b.release_job(second, "b")  # not b's any more: kept
+    assert len(node_a.get_queue()) == 2
+
+    # At 300 both leases lapsed: the job on its last attempt is failed, not
+    # retried; the other one goes to b.
+    assert node_b.claim_job("b", 60, 2, now=300) == (first, {"file": f"{first}.mp3"}, 2)
+    assert "stopped unexpectedly" in node_a.get_transcription(second)["status"]
+    assert not node_a.renew_lease(first, "a", 60, now=301)
+    node_a.update_transcription_status("Completed successfully!", "2.0", 100, first)
+    assert not node_b.renew_lease(first, "b", 60, now=302)  # done: stop renewing
+    node_b.release_job(first, "b")
+    assert node_a.get_queue() == []
+
+
+def test_queued_jobs_are_not_orphans(tmp_path):
+    db = make_db(tmp_path)
+    queued, spawned = insert(db), insert(db)
+    db.enqueue_job(queued, {})
+    assert db.mark_orphans_as_error() == 1
+    assert db.get_transcription(queued)["status"] == "Processing request..."
+    db.delete_transcription(queued)
+    assert db.get_queue() == []
+
+
+def test_mark_orphans_as_error_only_touches_the_given_jobs(tmp_path):
+    db = make_db(tmp_path)
+    mine, sibling = insert(db), insert(db)
+    assert db.mark_orphans_as_error([]) == 0
+    assert db.mark_orphans_as_error([mine], "Error: gone") == 1
+    assert db.get_transcription(mine)["status"] == "Error: gone"
+    assert db.get_transcription(sibling)["status"] == "Processing request..."
+
+
+def test_job_owners(tmp_path):
+    db = make_db(tmp_path)
+    owned = db.insert_transcription(
+        "", "file.mp3", "en", "whisper_tiny", "none", "en", "all",
+        "Processing request...", "123.0", owner=(4321, 1700000000.25),
+    )
+    legacy = insert(db)
+    assert db.get_job_owners([owned, legacy]) == {owned: (4321, 1700000000.25)}
+    db.delete_transcription(owned)
+    assert db.get_job_owners([owned]) == {}
+
+
+def test_leader_lease(tmp_path):
+    web_a, web_b = make_db(tmp_path), make_db(tmp_path)  # two processes
+    assert web_a.acquire_lease("web-leader", "a", 30, now=0)
+    assert not web_b.acquire_lease("web-leader", "b", 30, now=10)
+    assert web_a.acquire_lease("web-leader", "a", 30, now=20)  # renewed to 50
+    assert not web_b.acquire_lease("web-leader", "b", 30, now=40)
+    assert web_b.acquire_lease("web-leader", "b", 30, now=51)  # a stopped renewing
+    assert not web_a.acquire_lease("web-leader", "a", 30, now=52)
+    web_a.release_lease("web-leader", "a")  # not a's any more: no effect
+    assert not web_a.acquire_lease("web-leader", "a", 30, now=53)
+    web_b.release_lease("web-leader", "b")
+    assert web_a.acquire_lease("web-leader", "a", 30, now=54)
+
+
+def test_transcript_search(tmp_path):
+    from segments import Segments
+
+    db = make_db(tmp_path)
+    a, b, canceled = insert(db), insert(db), insert(db)
+    for job in (a, b):
+        db.update_transcription_status("Completed successfully!", "2.0", 100, job)
+    db.update_transcription_status("Canceled", "1.0", 0, canceled)
+    # Indexed, then canceled (or failed) before completing: never a result.
+    db.index_transcript(canceled, Segments.from_seconds([(0, 1, "quick fox")]))
+    db.index_transcript(a, Segments.from_seconds([(0, 1, "Καλημέρα, déjà vu"), (1, 2, "the quick fox")]))
+    db.index_transcript(b, Segments.from_seconds([(5, 6, "a quick brown fox"), (6, 7, 'say "fox" OR')]))
+
+    rows = db.search_transcripts("QUICK fox")
+    assert [(r["job_id"], r["position"], r["start_ms"]) for r in rows] == [(b, 0, 5000), (a, 1, 1000)]
+    # Case (any script) and Latin diacritics are folded; FTS syntax is literal.
+    assert [r["text"] for r in db.search_transcripts("ΚΑΛΗΜΈΡΑ deja")] == ["Καλημέρα, déjà vu"]
+    assert [r["job_id"] for r in db.search_transcripts('"fox" OR')] == [b]
+    assert db.search_transcripts("  ") == []
+
+    # Pages continue below the previous page's cursor.
+    first = db.search_transcripts("fox", limit=2)
+    assert [r["job_id"] for r in db.search_transcripts("fox", before=first[-1]["cursor"])] == [a]
+
+    # Re-indexing replaces a job's entries; deleting removes only that job.
+    db.index_transcript(b, Segments.from_seconds([(0, 1, "nothing here")]))
+    assert [r["job_id"] for r in db.search_transcripts("fox")] == [a]
+    db.delete_transcript_index(a)
+    assert not db.is_transcript_indexed(a) and db.is_transcript_indexed(b)
+    assert db.search_transcripts("fox") == []
+
+    # The backfill's one query: finished jobs never indexed, even empty ones.
+    assert db.unindexed_job_ids() == [a]
+    db.index_transcript(a, Segments.from_seconds([]))
+    assert db.unindexed_job_ids() == [] and db.is_transcript_indexed(a)
@@ -0,0 +1,69 @@
+import deepl
+import pytest
+
+import deepl_client
+from db import transcriptionsDB
+
+
+class FlakyTranslator:
+    """Raises the queued errors first, then echoes texts back upper-cased."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def translate_text(self, texts, source_lang=None, target_lang=None):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return [type("R", (), {"text": t.upper()})() for t in texts]
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(deepl_client, "BACKOFF_BASE", 0.001)
+    return transcriptionsDB(str(tmp_path / "t.db"))
+
+
+def test_retries_rate_limits_and_server_errors(db):
+    translator = FlakyTranslator(
+        deepl.TooManyRequestsException("429", http_status_code=429),
+        deepl.DeepLException("503", http_status_code=503),
+    )
+    assert deepl_client.translate_texts(translator, ["a", "b"], None, "DE", db) == ["A", "B"]
+    assert translator.calls == 3
+
+
+def test_non_retryable_errors_raise_at_once(db):
+    translator = FlakyTranslator(deepl.QuotaExceededException("456", http_status_code=456))
+    with pytest.raises(deepl.QuotaExceededException):
+        deepl_client.translate_texts(translator, ["a"], None, "DE", db)
+    assert translator.calls == 1
+
+
+def test_gives_up_after_max_retries(db, monkeypatch):
+    monkeypatch.setattr(deepl_client, "DEEPL_MAX_RETRIES", 2)
+    translator = FlakyTranslator(
+        *[deepl.TooManyRequestsException("429", http_status_code=429)] * 5
+    )
+    with pytest.raises(deepl.TooManyRequestsException):
+        deepl_client.translate_texts(translator, ["a"], None, "DE", db)
+    assert translator.calls == 3
+
+
+def test_requests_wait_on_the_shared_bucket(db, monkeypatch):
+    monkeypatch.setattr(deepl_client, "DEEPL_REQUESTS_PER_SECOND", 1)
+    taken = iter([0.0, 0.25, 0.0])
+    monkeypatch.setattr(db, "take_rate_token", lambda *args: next(taken))
+    slept = []
+    monkeypatch.setattr(deepl_client.time, "sleep", slept.append)
+
+    deepl_client.translate_texts(FlakyTranslator(), ["a"], None, "DE", db)
+    deepl_client.translate_texts(FlakyTranslator(), ["b"], None, "DE", db)
+    assert slept == [0.25]
+
+
+def test_translator_is_reused_per_key_and_endpoint():
+    a = deepl_client.get_translator("key", "http://127.0.0.1:1")
+    assert deepl_client.get_translator("key", "http://127.0.0.1:1") is a
+    assert deepl_client.get_translator("key", "http://127.0.0.1:2") is not a
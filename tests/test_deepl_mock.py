@@ -0,0 +1,94 @@
+import sys
+import threading
+from pathlib import Path
+
+import deepl
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from deepl_mock import DeepLMock  # noqa: E402
+
+
+@pytest.fixture
+def mock_server():
+    """Start a DeepLMock on a free port; yields a factory taking its options."""
+    servers = []
+
+    def start(**options):
+        server = DeepLMock(**options)
+        threading.Thread(
+            target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        ).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def no_retries(monkeypatch):
+    """Retries back off for seconds (deepl_client); tests want the error."""
+    monkeypatch.setattr(deepl.http_client, "max_network_retries", 0)
+    monkeypatch.setattr("deepl_client.DEEPL_MAX_RETRIES", 0)
+
+
+def test_translator_gets_deterministic_output(mock_server):
+    server = mock_server()
+    translator = deepl.Translator("any-key", server_url=server.url)
+    results = translator.translate_text(["Hello", "world"], target_lang="EL")
+    assert [r.text for r in results] == ["[EL] Hello", "[EL] world"]
+    assert server.stats["texts"] == 2
+    assert server.stats["characters"] == 10
+
+
+def test_deepl_translate_runs_offline_against_mock(mock_server, tmp_path, monkeypatch):
+    import db as db_mod
+    import models
+
+    server = mock_server()
+    monkeypatch.setattr(models, "DB", db_mod.transcriptionsDB(str(tmp_path / "tm.db")))
+    monkeypatch.setattr(models, "DEEPL_API_KEY", "mock")
+    monkeypatch.setattr(models, "DEEPL_SERVER_URL", server.url)
+    monkeypatch.setattr(models, "DEEPL_BATCH_TEXTS", 2)
+
+    texts = ["one", "two", "", "three", "one"]
+    translated, failed = models.deepl_translate(texts, "EN", "DE", 1)
+
+    assert not failed
+    assert translated == ["[DE] one", "[DE] two", "", "[DE] three", "[DE] one"]
+    assert server.stats["requests"] == 2  # 3 unique texts in batches of 2
+
+
+def test_rate_limit_answers_429(mock_server, no_retries):
+    server = mock_server(rate_limit=1)
+    translator = deepl.Translator("any-key", server_url=server.url)
+    translator.translate_text("a", target_lang="DE")
+    with pytest.raises(deepl.TooManyRequestsException):
+        translator.translate_text("b", target_lang="DE")
+    assert server.stats["status_429"] == 1
+
+
+def test_injected_errors_fail_the_translation(mock_server, tmp_path, monkeypatch, no_retries):
+    import db as db_mod
+    import models
+
+    server = mock_server(error_rate=1.0)
+    monkeypatch.setattr(models, "DB", db_mod.transcriptionsDB(str(tmp_path / "tm.db")))
+    monkeypatch.setattr(models, "DEEPL_API_KEY", "mock")
+    monkeypatch.setattr(models, "DEEPL_SERVER_URL", server.url)
+
+    assert models.deepl_translate(["hi"], None, "DE", 1) == (["hi"], True)
+    assert server.stats["status_503"] == 1
+
+
+def test_quota_exceeded(mock_server, no_retries):
+    server = mock_server(quota=5)
+    translator = deepl.Translator("any-key", server_url=server.url)
+    translator.translate_text("abc", target_lang="DE")
+    with pytest.raises(deepl.QuotaExceededException):
+        translator.translate_text("abc", target_lang="DE")
+    assert translator.get_usage().character.count == 3
@@ -0,0 +1,38 @@
+import sys
+from argparse import Namespace
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from load_test import Stats, build_report, percentiles  # noqa: E402
+
+
+def test_percentiles_in_milliseconds():
+    result = percentiles([i / 1000 for i in range(1, 101)])
+    assert result == {"p50_ms": 50.5, "p95_ms": 95.05, "p99_ms": 99.01, "max_ms": 100.0}
+    assert percentiles([0.002])["p99_ms"] == 2.0
+    assert percentiles([])["p50_ms"] is None
+
+
+def test_report_counts_busy_as_backpressure_not_errors():
+    stats = Stats()
+    stats.request("/transcribe", 200, 0.1)
+    stats.request("/transcribe", 429, 0.01)
+    stats.request("/status", 200, 0.01)
+    stats.request("/status", 500, 0.01)
+    stats.request("/status", "error", 0.01)
+    stats.request("/download", 304, 0.01)
+    stats.jobs.append(4.0)
+    args = Namespace(
+        clients=1, jobs=1, poll_interval=3.0, media_bytes=10, spawn=False, rtf=0.05, audio_seconds=60
+    )
+
+    report = build_report(args, stats, None, elapsed=30.0)
+
+    assert report["routes"]["/transcribe"]["errors"] == 0
+    assert report["routes"]["/status"]["errors"] == 2
+    assert report["routes"]["/status"]["error_rate"] == round(2 / 3, 4)
+    assert report["routes"]["/download"]["errors"] == 0
+    assert report["routes"]["/preview"]["requests"] == 0
+    assert report["jobs"]["throughput_per_min"] == 2.0
+    assert "server_rss_mb" not in report
@@ -0,0 +1,31 @@
+import sys
+import wave
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from make_fixtures import GAPS, assemble  # noqa: E402
+
+
+def test_assemble_loops_speech_with_gaps_to_exact_length(tmp_path):
+    speech = tmp_path / "speech.wav"
+    with wave.open(str(speech), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(100)
+        f.writeframes(b"\x01\x00" * 600)  # 6 s of non-silence
+    out = tmp_path / "long.wav"
+
+    repetitions = assemble(speech, out, 60)
+
+    with wave.open(str(out), "rb") as f:
+        assert f.getnframes() == 60 * 100
+        samples = f.readframes(f.getnframes())
+    # 6 s speech + the first gaps, until the next 6 s no longer fits in 60 s
+    expected, used = 0, 0.0
+    while used + 6 <= 60:
+        used += 6 + GAPS[expected % len(GAPS)]
+        expected += 1
+    assert repetitions == expected
+    assert samples.count(b"\x01\x00") == repetitions * 600
+    assert samples[:1200] == b"\x01\x00" * 600
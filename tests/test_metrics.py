@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+
+import metrics
+
+
+def test_worker_samples_are_aggregated(tmp_path, monkeypatch):
+    # A separate process (like a worker) observes into the shared dir and
+    # exits; its samples must still show up in the web process's render.
+    monkeypatch.setattr(metrics, "MULTIPROC_DIR", tmp_path)
+    env = {"PROMETHEUS_MULTIPROC_DIR": str(tmp_path), "PYTHONPATH": str(metrics.BASE_DIR)}
+    subprocess.run(
+        [sys.executable, "-c",
+         "import metrics; metrics.MODEL_LOAD_SECONDS.labels('tiny').observe(2.5)"],
+        env=env, check=True,
+    )
+    body, content_type = metrics.render()
+    assert content_type.startswith("text/plain")
+    assert 'txtify_model_load_seconds_sum{model="tiny"} 2.5' in body.decode()
+
+    metrics.reset()
+    assert "txtify_model_load_seconds_sum" not in metrics.render()[0].decode()
+
+    live = tmp_path / f"histogram_{os.getpid()}.db"  # a sibling that still writes
+    live.touch()
+    metrics.reset()
+    assert live.exists()
+
+
+def test_worker_serves_its_own_samples(tmp_path, monkeypatch):
+    import socket
+    import urllib.request
+
+    monkeypatch.setattr(metrics, "MULTIPROC_DIR", tmp_path)
+    env = {"PROMETHEUS_MULTIPROC_DIR": str(tmp_path), "PYTHONPATH": str(metrics.BASE_DIR)}
+    subprocess.run(
+        [sys.executable, "-c",
+         "import metrics; metrics.REALTIME_FACTOR.labels('tiny').observe(0.25)"],
+        env=env, check=True,
+    )
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    metrics.serve(port)
+
+    body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5).read()
+    assert 'txtify_realtime_factor_sum{model="tiny"} 0.25' in body.decode()
@@ -1,60 +1,48 @@
+import sqlite3
+
+import pytest
+
+import utils
 from models import save_final_transcription
+from segments import Segments
 
-SRT = (
-    "1\n"
-    "00:00:00,000 --> 00:00:02,000\n"
-    "hello there\n"
-    "\n"
-    "2\n"
-    "00:00:02,000 --> 00:00:04,000\n"
-    "second line\n"
-    "\n"
-    "3\n"
-    "00:00:04,000 --> 00:00:06,000\n"
-    "third line\n"
-)
+SEGMENTS = [(0, 2, "hello there"), (2, 4, "second line"), (4, 6, "third line")]
 
 
 def run(tmp_path, translated):
-    srt_path = tmp_path / "in.srt"
-    srt_path.write_text(SRT, encoding="utf-8")
     return save_final_transcription(
-        str(srt_path), translated, str(tmp_path / "out.txt")
+        Segments.from_seconds(SEGMENTS), translated, str(tmp_path / "out.txt")
     )
 
 
 def test_exact_match(tmp_path):
-    blocks = run(tmp_path, "a\nb\nc")
-    assert len(blocks) == 3
-    assert "00:00:04,000 --> 00:00:06,000\nc" in blocks[2]
+    final = run(tmp_path, ["a", "b", "c"])
+    assert list(final) == [(0, 2000, "a"), (2000, 4000, "b"), (4000, 6000, "c")]
+    assert "00:00:04,000 --> 00:00:06,000\nc" in (tmp_path / "out.txt").read_text()
 
 
-def test_deepl_merged_lines_pads(tmp_path):
+def test_missing_lines_are_padded(tmp_path):
     """Fewer translated lines than timestamps must not raise."""
-    blocks = run(tmp_path, "a\nb")
-    assert len(blocks) == 3
+    final = run(tmp_path, ["a", "b"])
+    assert final.texts == ["a", "b", "..."]
 
 
-def test_padded_blocks_keep_srt_converter_aligned(tmp_path):
-    """Padding must survive the srt/vtt/sbv converters: an empty pad line
-    would be dropped by their filters and mispair every following block."""
+def test_padded_segments_keep_srt_export_aligned(tmp_path):
+    """A padded segment is a visible placeholder, never an empty cue."""
     from utils import convert_to_srt
 
-    blocks = run(tmp_path, "a\nb")  # one line short -> last block padded
     out = tmp_path / "padded.srt"
-    convert_to_srt("\n".join(blocks), out)
+    convert_to_srt(run(tmp_path, ["a", "b"]), out)
     content = out.read_text(encoding="utf-8")
-    assert "Invalid timestamp" not in content
     assert "00:00:00,000 --> 00:00:02,000\na" in content
     assert "00:00:02,000 --> 00:00:04,000\nb" in content
     assert "00:00:04,000 --> 00:00:06,000\n..." in content
 
 
-def test_deepl_split_lines_merges_extras(tmp_path):
-    """Extra translated lines fold into the last block instead of raising."""
-    blocks = run(tmp_path, "a\nb\nc\nd\ne")
-    assert len(blocks) == 3
-    assert "c d e" in blocks[2]
+def test_extra_lines_merge_into_last_segment(tmp_path):
+    """Extra translated lines fold into the last segment instead of raising."""
+    final = run(tmp_path, ["a", "b", "c", "d", "e"])
+    assert final.texts == ["a", "b", "c d e"]
 
 
 def test_terminal_write_never_overwrites_canceled(tmp_path, monkeypatch):
@@ -78,3 +66,255 @@ def test_terminal_write_never_overwrites_canceled(tmp_path, monkeypatch):
     )
     test_db.update_transcription_status("Completed successfully!", "3.0", 100, other)
     assert test_db.get_transcription(other)["status"] == "Completed successfully!"
+
+
+@pytest.fixture
+def deepl_env(tmp_path, monkeypatch):
+    """deepl_translate against FakeTranslator with a throwaway DB."""
+    import db as db_mod
+    import models
+
+    FakeTranslator.calls = []
+    monkeypatch.setattr(models, "DB", db_mod.transcriptionsDB(str(tmp_path / "tm.db")))
+    monkeypatch.setattr(models, "DEEPL_API_KEY", "key")
+    monkeypatch.setattr(models, "get_translator", lambda *args: FakeTranslator())
+    monkeypatch.setattr("deepl_client.DEEPL_REQUESTS_PER_SECOND", 0)
+    return models
+
+
+class FakeTranslator:
+    """Stands in for deepl.Translator: upper-cases texts, records each call."""
+
+    calls = []
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def translate_text(self, texts, source_lang=None, target_lang=None):
+        FakeTranslator.calls.append(list(texts))
+        if any("boom" in t for t in texts):
+            raise RuntimeError("429 Too Many Requests")
+        return [type("R", (), {"text": t.upper()})() for t in texts]
+
+
+def test_deepl_translate_batches_segments_one_to_one(deepl_env, monkeypatch):
+    models = deepl_env
+    monkeypatch.setattr(models, "DEEPL_BATCH_TEXTS", 3)
+
+    texts = [f"segment {i}" for i in range(10)]
+    texts[4] = "  "  # blank segments are never sent
+    translated, failed = models.deepl_translate(texts, "EN", "EL", 1)
+
+    assert not failed
+    assert translated == [t.upper() if t.strip() else t for t in texts]
+    assert sorted(len(c) for c in FakeTranslator.calls) == [3, 3, 3]
+
+
+def test_deepl_translate_batches_are_byte_bounded(monkeypatch):
+    import models
+
+    monkeypatch.setattr(models, "DEEPL_BATCH_BYTES", 10)
+    assert models._batches(["aaaa", "bbbb", "cccc", "x" * 50, "d"]) == [
+        [0, 1], [2], [3], [4]
+    ]
+
+
+def test_deepl_translate_failed_batch_keeps_original(deepl_env):
+    texts = ["fine", "boom"]
+    assert deepl_env.deepl_translate(texts, None, "EL", 1) == (texts, True)
+    # nothing from a failed translation is remembered
+    assert deepl_env.DB.get_translations(["fine"], "auto", "EL") == {}
+
+
+def test_translation_memory_skips_deepl_on_hits(deepl_env, monkeypatch):
+    models = deepl_env
+    first, _ = models.deepl_translate(["Hello  world", "hello world"], "EN", "EL", 1)
+    assert first == ["HELLO WORLD", "HELLO WORLD"]
+    assert FakeTranslator.calls == [["Hello world", "hello world"]]  # normalized
+
+    FakeTranslator.calls = []
+    again, failed = models.deepl_translate([" Hello world ", "new"], "EN", "EL", 2)
+    assert (again, failed) == (["HELLO WORLD", "NEW"], False)
+    assert FakeTranslator.calls == [["new"]]  # only the miss hits the network
+
+    # Fully cached jobs translate even without an API key.
+    monkeypatch.setattr(models, "DEEPL_API_KEY", None)
+    assert models.deepl_translate(["new"], "EN", "EL", 3) == (["NEW"], False)
+    # ...but the language pair is part of the key.
+    assert models.deepl_translate(["new"], "EN", "DE", 3) == (["new"], True)
+
+
+def test_translation_memory_errors_are_cache_misses(deepl_env, monkeypatch):
+    models = deepl_env
+
+    def broken(*args):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(models.DB, "get_translations", broken)
+    monkeypatch.setattr(models.DB, "put_translations", broken)
+    assert models.deepl_translate(["hi"], "EN", "EL", 1) == (["HI"], False)
+    assert FakeTranslator.calls == [["hi"]]
+
+
+def test_blank_segment_gets_placeholder(tmp_path):
+    final = run(tmp_path, ["α", "", "γ"])
+    assert final.texts == ["α", "...", "γ"]
+
+
+class FakeClipModel:
+    """Whisper stand-in: a clip of (start, length) yields one segment per 10 s."""
+
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, clip, **options):
+        start, length = clip
+        self.calls.append((start, dict(options)))
+        segs = [
+            type("S", (), {"start": t, "end": min(t + 10, length), "text": f" w{start + t:g} "})()
+            for t in range(0, int(length), 10)
+        ]
+        return type("R", (), {"segments": segs, "language": "en"})()
+
+
+def test_transcribe_in_clips_streams_segments(deepl_env, monkeypatch):
+    monkeypatch.setattr(deepl_env, "load_clip", lambda path, start, length: (start, length))
+    monkeypatch.setattr(deepl_env, "PIPELINE_CLIP_SECONDS", 30)
+    model, chunks = FakeClipModel(), []
+
+    segments = deepl_env.transcribe_in_clips(
+        model, "media.mp3", 70.0, {"language": None}, chunks.append
+    )
+
+    # Each non-final clip drops its (possibly cut) last segment and the next
+    # clip resumes there, so no time is lost or transcribed twice.
+    assert [start for start, _ in model.calls] == [0, 20, 40]
+    assert [s for s, _, _ in segments] == [0, 10, 20, 30, 40, 50, 60]
+    assert [t for c in chunks for t in c] == [text for _, _, text in segments]
+    assert segments[0] == (0, 10, "w0")
+    # Detected language and preceding text carry over to later clips.
+    assert model.calls[1][1]["language"] == "en"
+    assert model.calls[1][1]["initial_prompt"] == "w0 w10"
+
+
+def test_translation_pipeline_keeps_submission_order(deepl_env):
+    pipeline = deepl_env.TranslationPipeline(None, "DE", 1)
+    pipeline.submit(["a", "b"])
+    pipeline.submit(["c"])
+    assert pipeline.finish() == (["A", "B", "C"], False)
+
+
+def test_translation_pipeline_failure_returns_originals(deepl_env):
+    pipeline = deepl_env.TranslationPipeline(None, "DE", 1)
+    pipeline.submit(["a"])
+    pipeline.submit(["boom"])
+    pipeline.submit(["c"])
+    assert pipeline.finish() == (["a", "boom", "c"], True)
+
+
+def test_pipelined_job_falls_back_when_translation_raises(deepl_env, tmp_path, monkeypatch):
+    models = deepl_env
+    monkeypatch.setattr(utils, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(models, "PIPELINE_TRANSLATION", True)
+    monkeypatch.setattr(models, "PIPELINE_CLIP_SECONDS", 30)
+    monkeypatch.setattr(models, "load_model", lambda *args, **kwargs: FakeClipModel())
+    monkeypatch.setattr(models, "load_clip", lambda path, start, length: (start, length))
+    monkeypatch.setattr(models, "media_duration", lambda path: 70.0)
+    real, calls = models.deepl_translate, []
+
+    def flaky(texts, *args):
+        calls.append(texts)
+        if len(calls) == 2:
+            raise sqlite3.DatabaseError("database disk image is malformed")
+        return real(texts, *args)
+
+    monkeypatch.setattr(models, "deepl_translate", flaky)
+    job = models.DB.insert_transcription(
+        "", "f.mp3", "en", "whisper_tiny", "deepl", "DE", "all", "Processing request...", "1.0"
+    )
+
+    models.transcribe_audio("f.mp3", "en", "whisper_tiny", "deepl", "DE", job)
+
+    assert len(calls) == 2  # chunks after the failure are drained, not sent
+    assert models.DB.get_transcription(job)["status"] == "Completed (translation failed)"
+    lines = (utils.job_dir(job) / "final_transcription.srt").read_text()
+    assert "w0" in lines and "W0" not in lines
+
+
+class FakeWhisper:
+    """load_model stand-in: two fixed segments for any input."""
+
+    def transcribe(self, audio, **options):
+        segs = [
+            type("S", (), {"start": 0.0, "end": 1.5, "text": " Hello"})(),
+            type("S", (), {"start": 1.5, "end": 3.0, "text": " world"})(),
+        ]
+        return type("R", (), {"segments": segs, "language": "en"})()
+
+
+def test_transcribe_audio_saves_translated_canonical_srt(deepl_env, tmp_path, monkeypatch):
+    models = deepl_env
+    monkeypatch.setattr(utils, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(models, "load_model", lambda *args, **kwargs: FakeWhisper())
+    monkeypatch.setattr(models, "media_duration", lambda path: 3.0)
+    job = models.DB.insert_transcription(
+        "", "f.mp3", "en", "whisper_tiny", "deepl", "DE", "all", "Processing request...", "1.0"
+    )
+
+    models.transcribe_audio("f.mp3", "en", "whisper_tiny", "deepl", "DE", job)
+
+    assert models.DB.get_transcription(job)["status"] == "Completed successfully!"
+    out = utils.job_dir(job)
+    assert (out / "transcription.txt").read_text() == "Hello\nworld\n"
+    # Only the canonical export (and its compressed copies); the rest are
+    # rendered on demand.
+    assert sorted(f.name for f in out.glob("final_transcription.*")) == [
+        "final_transcription.srt",
+        "final_transcription.srt.br",
+        "final_transcription.srt.gz",
+    ]
+    assert "00:00:01,500 --> 00:00:03,000\nWORLD" in (out / "final_transcription.srt").read_text()
+    [match] = models.DB.search_transcripts("world")
+    assert (match["job_id"], match["start_ms"], match["text"]) == (job, 1500, "WORLD")
+
+
+def test_fake_whisper_is_deterministic_and_paced(monkeypatch):
+    import fake_whisper
+
+    monkeypatch.setattr(fake_whisper, "FAKE_WHISPER_RTF", 0.01)
+    monkeypatch.setattr(fake_whisper, "FAKE_WHISPER_MEMORY_MB", 1)
+    monkeypatch.setattr(fake_whisper, "media_duration", lambda path: 10.0)
+    slept = []
+    monkeypatch.setattr(fake_whisper.time, "sleep", slept.append)
+
+    model = fake_whisper.load_model("base", device="cpu")
+    assert len(model._weights) == 1024 * 1024
+    result = model.transcribe("media.mp3", language=None)
+    assert slept[-1] == pytest.approx(0.1)
+    assert [(s.start, s.end) for s in result.segments] == [(0, 3), (3, 6), (6, 9), (9, 10)]
+    assert result.language == "en"
+    assert [s.text for s in result.segments] == [
+        s.text for s in model.transcribe("other.mp3").segments
+    ]
+    # A load_clip() clip: duration from its 16 kHz samples.
+    assert len(model.transcribe([0.0] * 16000 * 4, language="de").segments) == 2
+
+
+def test_transcribe_audio_with_fake_backend(deepl_env, tmp_path, monkeypatch):
+    import fake_whisper
+
+    models = deepl_env
+    monkeypatch.setattr(fake_whisper, "FAKE_WHISPER_RTF", 0)
+    monkeypatch.setattr(fake_whisper, "media_duration", lambda path: 7.0)
+    monkeypatch.setattr(utils, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(models, "load_model", fake_whisper.load_model)
+    monkeypatch.setattr(models, "media_duration", lambda path: 7.0)
+    job = models.DB.insert_transcription(
+        "", "f.mp3", "en", "whisper_tiny", "none", "en", "all", "Processing request...", "1.0"
+    )
+
+    models.transcribe_audio("f.mp3", "en", "whisper_tiny", "none", "en", job)
+
+    assert models.DB.get_transcription(job)["status"] == "Completed successfully!"
+    lines = (utils.job_dir(job) / "transcription.txt").read_text().splitlines()
+    assert lines == [fake_whisper.segment_text(i) for i in range(3)]
@@ -0,0 +1,24 @@
+import pstats
+
+import profiling
+
+
+def test_profiler_writes_profile_and_memory_trace(tmp_path):
+    profiler = profiling.JobProfiler(tmp_path / "job")
+    profiler.start()
+    sum(i * i for i in range(100000))
+    profiler.stop()
+
+    stats = pstats.Stats(str(tmp_path / "job" / "profile.prof"))
+    assert stats.total_calls > 0
+    assert (tmp_path / "job" / "profile.txt").read_text().startswith("Peak RSS:")
+    lines = (tmp_path / "job" / "memory.csv").read_text().splitlines()
+    assert lines[0] == "unix_time,rss_bytes"
+    assert len(lines) >= 2 and int(lines[1].split(",")[1]) > 0
+
+
+def test_enabled_by_env(monkeypatch):
+    monkeypatch.delenv("PROFILE_JOBS", raising=False)
+    assert not profiling.enabled_by_env()
+    monkeypatch.setenv("PROFILE_JOBS", "True")
+    assert profiling.enabled_by_env()
@@ -0,0 +1,86 @@
+from segments import SegmentIndex, Segments, timecode, write_index
+
+
+def test_timecode():
+    assert timecode(0, ",") == "00:00:00,000"
+    assert timecode(3661250, ".") == "01:01:01.250"
+
+
+def test_from_seconds_rounds_to_ms_and_flattens_text():
+    segments = Segments.from_seconds([(0.0004, 1.2345, " two\nlines ")])
+    assert list(segments) == [(0, 1234, "two lines")]
+    assert segments.starts.typecode == "q"
+
+
+def test_from_result_reads_stable_ts_segments():
+    seg = type("S", (), {"start": 1.5, "end": 2.0, "text": " hi"})
+    result = type("R", (), {"segments": [seg]})
+    assert list(Segments.from_result(result)) == [(1500, 2000, "hi")]
+
+
+def test_srt_round_trip(tmp_path):
+    segments = Segments.from_seconds([(0, 1.5, "one"), (3661.25, 3662, "two")])
+    srt = tmp_path / "t.srt"
+    segments.write_srt(srt)
+    assert srt.read_text(encoding="utf-8").startswith("1\n00:00:00,000 --> 00:00:01,500\none\n\n2\n")
+    assert list(Segments.from_srt(srt)) == list(segments)
+
+
+def test_from_srt_joins_multiline_cues(tmp_path):
+    srt = tmp_path / "in.srt"
+    srt.write_text(
+        "1\n00:00:00,000 --> 00:00:01,000\nfirst\nsecond\n\n"
+        "2\n00:00:01,000 --> 00:00:02,000\n42\n",
+        encoding="utf-8",
+    )
+    assert Segments.from_srt(srt).texts == ["first second", "42"]
+
+
+def test_with_texts_keeps_timings_and_leaves_original_alone():
+    segments = Segments.from_seconds([(0, 1, "a"), (1, 2, "b")])
+    translated = segments.with_texts(["α", "β"])
+    assert list(translated) == [(0, 1000, "α"), (1000, 2000, "β")]
+    assert segments.texts == ["a", "b"]
+
+
+def test_vtt_sbv_and_text_exports(tmp_path):
+    segments = Segments.from_seconds([(0, 2, "Hello"), (2, 4.5, "world")])
+    segments.write_vtt(tmp_path / "t.vtt")
+    segments.write_sbv(tmp_path / "t.sbv")
+    segments.write_text(tmp_path / "t.txt")
+    assert (tmp_path / "t.vtt").read_text() == (
+        "WEBVTT\n\n00:00:00.000 --> 00:00:02.000\nHello\n\n"
+        "00:00:02.000 --> 00:00:04.500\nworld\n\n"
+    )
+    assert (tmp_path / "t.sbv").read_text().startswith("00:00:00.000,00:00:02.000\nHello\n\n")
+    assert (tmp_path / "t.txt").read_text() == "Hello\nworld\n"
+
+
+def test_segment_index_reads_ranges_like_from_srt(tmp_path):
+    srt = tmp_path / "in.srt"
+    srt.write_text(
+        "1\n00:00:00,000 --> 00:00:01,000\nκαλημέρα\n\n"
+        "2\n00:00:01,000 --> 00:00:02,500\ntwo\nlines\n\n"
+        "3\n00:00:04,000 --> 00:00:05,000\nlast",  # no trailing blank line
+        encoding="utf-8",
+    )
+    write_index(srt, tmp_path / "in.idx")
+
+    with SegmentIndex(tmp_path / "in.idx", srt) as index:
+        assert len(index) == 3
+        assert index.duration_ms == 5000
+        assert list(index.read(0, 3)) == list(Segments.from_srt(srt))
+        assert list(index.read(1, 99)) == [(1000, 2500, "two lines"), (4000, 5000, "last")]
+        assert list(index.read(3, 5)) == []
+        # find(): first segment still running; find_start(): first starting at/after.
+        assert [index.find(ms) for ms in (0, 999, 1000, 3000, 5000)] == [0, 0, 1, 2, 3]
+        assert [index.find_start(ms) for ms in (0, 1, 4000, 4001)] == [0, 1, 2, 3]
+
+
+def test_segment_index_of_empty_transcript(tmp_path):
+    srt = tmp_path / "empty.srt"
+    srt.write_text("", encoding="utf-8")
+    write_index(srt, tmp_path / "empty.idx")
+    with SegmentIndex(tmp_path / "empty.idx", srt) as index:
+        assert (len(index), index.duration_ms, index.find(0)) == (0, 0, 0)
+        assert list(index.read(0, 10)) == []
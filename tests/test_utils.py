@@ -2,15 +2,9 @@ import pytest
 
 import utils
 
-SAMPLE = (
-    "1\n"
-    "00:00:00,000 --> 00:00:02,000\n"
-    "Hello there\n"
-    "\n"
-    "2\n"
-    "00:00:02,000 --> 00:00:04,500\n"
-    "Γειά σου κόσμε\n"
-)
+from segments import Segments
+
+SAMPLE = Segments.from_seconds([(0, 2, "Hello there"), (2, 4.5, "Γειά σου κόσμε")])
 
 
 def test_clean_filename():
@@ -63,7 +57,7 @@ def test_convert_to_vtt(tmp_path):
     utils.convert_to_vtt(SAMPLE, out)
     content = out.read_text(encoding="utf-8")
     assert content.startswith("WEBVTT\n")
-    assert "00:00:00,000 --> 00:00:02,000\nHello there" in content
+    assert "00:00:00.000 --> 00:00:02.000\nHello there" in content
 
 
 def test_convert_to_sbv(tmp_path):
@@ -76,23 +70,36 @@ def test_convert_to_sbv(tmp_path):
 
 def test_cleanup_files_only_touches_own_job(tmp_path, monkeypatch):
     monkeypatch.setattr(utils, "OUTPUT_DIR", tmp_path)
-    (tmp_path / "1").mkdir()
-    (tmp_path / "1_audio.mp3").touch()
-    (tmp_path / "1_logs.txt").touch()
-    (tmp_path / "1.zip").touch()
-    (tmp_path / "2_other.mp3").touch()  # concurrent job's input
-    (tmp_path / "2.zip").touch()
-    (tmp_path / "12_other.mp3").touch()  # id prefix must not glob-collide
+    for job_id in (1, 2, 257):  # 257 shares job 1's shard
+        (utils.job_dir(job_id) / "media").mkdir(parents=True)
+        (utils.job_dir(job_id) / "media" / "audio.mp3").touch()
+    (utils.job_dir(1) / "logs.txt").touch()
 
     utils.cleanup_files(1)
 
-    assert not (tmp_path / "1").exists()
-    assert not (tmp_path / "1_audio.mp3").exists()
-    assert not (tmp_path / "1_logs.txt").exists()
-    assert not (tmp_path / "1.zip").exists()
-    assert (tmp_path / "2_other.mp3").exists()
-    assert (tmp_path / "2.zip").exists()
-    assert (tmp_path / "12_other.mp3").exists()
+    assert not utils.job_dir(1).exists()
+    assert utils.job_dir(1).parent == utils.job_dir(257).parent
+    assert (utils.job_dir(257) / "media" / "audio.mp3").exists()
+    assert (utils.job_dir(2) / "media" / "audio.mp3").exists()
+
+
+def test_migrate_flat_layout_moves_legacy_files_into_job_dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "OUTPUT_DIR", tmp_path)
+    (tmp_path / "3").mkdir()
+    (tmp_path / "3" / "final_transcription.srt").write_text("srt")
+    (tmp_path / "3_clip.mp3").write_text("media")
+    (tmp_path / "3_logs.txt").write_text("log")
+    (tmp_path / "3.zip").write_text("stale")
+    (tmp_path / "transcriptions.db").write_text("db")  # not a job's file
+
+    assert utils.migrate_flat_layout() == 4
+
+    job = utils.job_dir(3)
+    assert (job / "final_transcription.srt").read_text() == "srt"
+    assert (job / "media" / "clip.mp3").read_text() == "media"
+    assert (job / "logs.txt").read_text() == "log"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["jobs", "transcriptions.db"]
+    assert utils.migrate_flat_layout() == 0  # idempotent
 
 
 def test_purge_expired_jobs_removes_old_keeps_recent(tmp_path, monkeypatch):
@@ -112,8 +119,8 @@ def test_purge_expired_jobs_removes_old_keeps_recent(tmp_path, monkeypatch):
             str(created_at),
         )
         db.update_transcription_status(status, "", progress, job_id)
-        (tmp_path / str(job_id)).mkdir()
-        (tmp_path / f"{job_id}_audio.mp3").touch()
+        (utils.job_dir(job_id) / "media").mkdir(parents=True)
+        (utils.job_dir(job_id) / "media" / "audio.mp3").touch()
         return job_id
 
     old_done = make_job(now - 10 * 86400, "Completed successfully!", 100)  # swept
@@ -124,18 +131,90 @@ def test_purge_expired_jobs_removes_old_keeps_recent(tmp_path, monkeypatch):
 
     assert removed == 1
     assert db.get_transcription(old_done) is None
-    assert not (tmp_path / str(old_done)).exists()
-    assert not (tmp_path / f"{old_done}_audio.mp3").exists()
+    assert not utils.job_dir(old_done).exists()
     # An in-flight job is never swept, no matter how old — protects a live worker.
     assert db.get_transcription(old_active) is not None
-    assert (tmp_path / str(old_active)).exists()
+    assert utils.job_dir(old_active).exists()
     assert db.get_transcription(fresh) is not None
-    assert (tmp_path / str(fresh)).exists()
+    assert utils.job_dir(fresh).exists()
 
     # retention_days <= 0 disables the sweep entirely.
     assert utils.purge_expired_jobs(retention_days=0) == 0
 
 
+def test_purge_keeps_old_jobs_that_were_read_recently(tmp_path, monkeypatch):
+    import time
+
+    from db import transcriptionsDB
+
+    db = transcriptionsDB(str(tmp_path / "t.db"))
+    monkeypatch.setattr(utils, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(utils, "DB", db)
+    old = time.time() - 10 * 86400
+    read, unread = (
+        db.insert_transcription("", "", "en", "whisper_tiny", "none", "en", "all", "Completed successfully!", str(old))
+        for _ in range(2)
+    )
+    for job_id in (read, unread):
+        db.update_transcription_status("Completed successfully!", str(old), 100, job_id)
+    db.touch_job(read)
+
+    assert utils.purge_expired_jobs(retention_days=7) == 1
+    assert db.get_transcription(read) is not None
+    assert db.get_transcription(unread) is None
+
+
+def test_output_quota_evicts_lru_media_then_exports_then_jobs(tmp_path, monkeypatch):
+    from db import transcriptionsDB
+
+    db = transcriptionsDB(str(tmp_path / "t.db"))
+    monkeypatch.setattr(utils, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(utils, "DB", db)
+    mb = 1024 * 1024
+
+    def make_job(completed_at):
+        job_id = db.insert_transcription(
+            "", "", "en", "whisper_tiny", "none", "en", "all", "Processing", "1.0"
+        )
+        db.update_transcription_status("Completed successfully!", str(completed_at), 100, job_id)
+        job_dir = utils.job_dir(job_id)
+        (job_dir / "media").mkdir(parents=True)
+        (job_dir / utils.CANONICAL_EXPORT).write_bytes(b"s" * mb)
+        (job_dir / "final_transcription.pdf").write_bytes(b"p" * mb)
+        (job_dir / "media" / "clip.mp3").write_bytes(b"m" * 2 * mb)
+        return job_id
+
+    lru, mru = make_job(100.0), make_job(200.0)
+    running = db.insert_transcription("", "", "en", "whisper_tiny", "none", "en", "all", "Processing", "1.0")
+    db.update_transcription_status("Transcribing...", "", 40, running)
+    (utils.job_dir(running) / "media").mkdir(parents=True)
+    (utils.job_dir(running) / "media" / "clip.mp3").write_bytes(b"m" * mb)
+
+    assert utils.enforce_output_quota(0) == 0  # disabled
+    # 8 MB of finished jobs + 1 MB in flight, 7 MB budget: the LRU job's media
+    assert utils.enforce_output_quota(7) == 2 * mb
+    assert not (utils.job_dir(lru) / "media" / "clip.mp3").exists()
+    assert (utils.job_dir(mru) / "media" / "clip.mp3").exists()
+    assert (utils.job_dir(lru) / "final_transcription.pdf").exists()
+
+    # 5 MB budget: all media before any export
+    assert utils.enforce_output_quota(5) == 2 * mb
+    assert not (utils.job_dir(mru) / "media" / "clip.mp3").exists()
+    assert (utils.job_dir(running) / "media" / "clip.mp3").exists()  # never evicted
+
+    # 4 MB: the LRU job's re-renderable export; its transcript stays
+    assert utils.enforce_output_quota(4) == mb
+    assert not (utils.job_dir(lru) / "final_transcription.pdf").exists()
+    assert (utils.job_dir(lru) / utils.CANONICAL_EXPORT).exists()
+
+    # 1 MB: both exports, then whole jobs, least recently used first
+    utils.enforce_output_quota(1)
+    assert db.get_transcription(lru) is None
+    assert not utils.job_dir(lru).exists()
+    assert db.get_transcription(mru) is None
+    assert db.get_transcription(running) is not None
+
+
 def test_friendly_error_maps_common_cases():
     yt = utils.friendly_error(Exception("ERROR: unable to download video data: HTTP Error 403: Forbidden"))
     assert "YouTube" in yt and "try again" in yt.lower()
@@ -196,13 +275,27 @@ def test_convert_to_mp3_streams_via_ffmpeg(tmp_path):
 def test_convert_to_pdf_preserves_unicode(tmp_path):
     pypdf = pytest.importorskip("pypdf")
     out = tmp_path / "t.pdf"
-    utils.convert_to_pdf("Γειά σου κόσμε\nПривет мир\nHello world", out)
+    segments = Segments.from_seconds(
+        [(0, 1, "Γειά σου κόσμε"), (1, 2, "Привет мир"), (2, 3, "Hello world")]
+    )
+    utils.convert_to_pdf(segments, out)
     text = pypdf.PdfReader(out).pages[0].extract_text()
     assert "Γειά σου κόσμε" in text
     assert "Привет мир" in text
     assert "?" not in text
 
 
+def test_convert_to_pdf_replaces_glyphs_the_font_lacks(tmp_path):
+    # CJK and control characters have no glyph in DejaVuSans; fpdf would raise.
+    widths, _ = utils._pdf_char_widths()
+    assert utils._pdf_safe("hello 中文\x07\tκόσμε", widths) == "hello ??? κόσμε"
+
+    segments = Segments.from_seconds([(0, 1, "hello 中文"), (1, 2, "bell\x07 ring")])
+    segments.write_srt(tmp_path / utils.CANONICAL_EXPORT)
+    pdf = utils.render_export(tmp_path, "pdf")
+    assert pdf.read_bytes().startswith(b"%PDF")
+
+
 def test_is_valid_youtube_url_rejects_playlists_and_channels():
     assert not utils.is_valid_youtube_url(
         "https://www.youtube.com/playlist?list=PL123"
@@ -245,3 +338,56 @@ def test_limits_overridable_via_env(monkeypatch):
     importlib.reload(utils)
     assert utils.MAX_UPLOAD_SIZE_MB == 0  # 0 = unlimited by default
     assert utils.MAX_VIDEO_DURATION == 0
+
+
+def test_pdf_wrap_fits_the_page_width():
+    from fpdf import FPDF
+
+    widths, missing = utils._pdf_char_widths()
+    pdf = FPDF()
+    pdf.add_font("DejaVu", fname=str(utils.PDF_FONT))
+    pdf.set_font("DejaVu", size=utils.PDF_FONT_SIZE)
+    max_width = (pdf.w - 2 * utils.PDF_MARGIN) * pdf.k * 1000 / utils.PDF_FONT_SIZE
+
+    text = "Γειά σου κόσμε, hello world. " * 20 + "x" * 400
+    lines = utils._wrap(text, max_width, widths, missing)
+    assert " ".join(lines).replace(" ", "") == text.replace(" ", "")
+    assert all(pdf.get_string_width(line) <= pdf.w - 2 * utils.PDF_MARGIN for line in lines)
+    assert len(lines) > 5
+    assert utils._wrap("", max_width, widths, missing) == [""]
+
+
+def test_convert_to_pdf_paginates_long_transcripts(tmp_path):
+    pypdf = pytest.importorskip("pypdf")
+    segments = Segments.from_seconds((i, i + 1, f"line {i}") for i in range(200))
+    out = tmp_path / "t.pdf"
+    utils.convert_to_pdf(segments, out)
+    reader = pypdf.PdfReader(out)
+    assert len(reader.pages) == -(-200 * 4 // 27)  # 4 lines per segment, 27 per page
+    assert "00:03:19,000 --> 00:03:20,000\nline 199" in reader.pages[-1].extract_text()
+
+
+def test_stream_zip_length_matches_and_compression_per_member(tmp_path):
+    import io
+    import zipfile
+
+    job = tmp_path / "7"
+    (job / "sub").mkdir(parents=True)
+    (job / "final_transcription.srt").write_text("1\n00:00:00,000 --> 00:00:01,000\nΓειά\n\n" * 500)
+    (job / "final_transcription.pdf").write_bytes(bytes(range(256)) * 4000)
+    (job / "sub" / "memory.csv").write_text("unix_time,rss_bytes\n" * 100)
+    (job / "ünïcode.txt").write_text("x")
+
+    length, chunks = utils.stream_zip(job)
+    chunks = list(chunks)
+    body = b"".join(chunks)
+    assert length == len(body)
+    assert len(chunks) > 2  # streamed as it is built, not in one piece
+
+    with zipfile.ZipFile(io.BytesIO(body)) as zf:
+        assert zf.testzip() is None
+        info = {i.filename: i for i in zf.infolist()}
+        assert info["final_transcription.pdf"].compress_type == zipfile.ZIP_STORED
+        assert info["final_transcription.srt"].compress_type == zipfile.ZIP_DEFLATED
+        assert zf.read("sub/memory.csv").startswith(b"unix_time")
+        assert zf.read("ünïcode.txt") == b"x"
@@ -0,0 +1,198 @@
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+
+import pytest
+
+import status
+import utils
+import worker
+from db import transcriptionsDB
+from queue_client import QueueClient
+
+
+@pytest.fixture
+def queue_db(tmp_path, monkeypatch):
+    """A temp DB and OUTPUT_DIR for worker.py, with fast leases."""
+    db = transcriptionsDB(str(tmp_path / "t.db"))
+    monkeypatch.setattr(worker, "DB", db)
+    monkeypatch.setattr(utils, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(worker, "WORKER_LEASE_SECONDS", 0.3)
+    monkeypatch.setattr(worker, "WORKER_POLL_SECONDS", 0.05)
+    return db
+
+
+def queue_job(db):
+    job_id = db.insert_transcription(
+        "", "a.mp3", "en", "whisper_tiny", "none", "en", "all", status.PROCESSING, "1.0"
+    )
+    db.update_transcription_status(status.QUEUED, "", 20, job_id)
+    db.enqueue_job(job_id, {"file": "a.mp3"})
+    return job_id
+
+
+def fake_spawn(code):
+    """spawn_worker stand-in: a Python process running ``code``."""
+    return lambda job_id, args: subprocess.Popen([sys.executable, "-c", code])
+
+
+def test_worker_fails_a_job_whose_process_died(queue_db, monkeypatch):
+    monkeypatch.setattr(worker, "spawn_worker", fake_spawn("import time; time.sleep(0.4)"))
+    job_id = queue_job(queue_db)
+    job_id, args, _ = queue_db.claim_job("w", 0.3, 3)
+
+    worker.run_job(job_id, args, "w")
+
+    row = queue_db.get_transcription(job_id)
+    assert "stopped unexpectedly" in row["status"]
+    assert queue_db.get_queue() == []
+
+
+def test_worker_stops_a_canceled_job(queue_db, monkeypatch):
+    monkeypatch.setattr(worker, "spawn_worker", fake_spawn("import time; time.sleep(30)"))
+    job_id = queue_job(queue_db)
+    job_id, args, _ = queue_db.claim_job("w", 0.3, 3)
+    threading.Timer(0.2, queue_db.update_transcription_status, (status.CANCELED, "1", 0, job_id)).start()
+
+    worker.run_job(job_id, args, "w")  # returns once the next renewal fails
+
+    assert queue_db.get_transcription(job_id)["status"] == status.CANCELED
+    assert queue_db.get_queue() == []
+
+
+def test_worker_stops_its_process_when_the_lease_cannot_be_renewed(queue_db, monkeypatch):
+    spawned = []
+
+    def spawn(job_id, args):
+        spawned.append(fake_spawn("import time; time.sleep(30)")(job_id, args))
+        return spawned[-1]
+
+    def locked(*args):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(worker, "spawn_worker", spawn)
+    job_id = queue_job(queue_db)
+    job_id, args, _ = queue_db.claim_job("w", 0.3, 3)
+    monkeypatch.setattr(queue_db, "renew_lease", locked)
+
+    worker.run_job(job_id, args, "w")  # retries until the lease would lapse
+
+    assert spawned[0].poll() is not None  # killed: it can't overwrite the job later
+    assert queue_db.get_transcription(job_id)["status"] == status.STARTING
+    # Left in the queue for another claim once the lease lapses.
+    assert [row[0] for row in queue_db.get_queue()] == [job_id]
+
+
+def test_serve_claims_queued_jobs_until_stopped(queue_db, monkeypatch):
+    ran = []
+    stop = threading.Event()
+
+    def run_job(job_id, args, name):
+        ran.append((job_id, name))
+        queue_db.update_transcription_status(status.COMPLETED, "2", 100, job_id)
+        queue_db.release_job(job_id, name)
+        if len(ran) == 2:
+            stop.set()
+
+    monkeypatch.setattr(worker, "run_job", run_job)
+    jobs = [queue_job(queue_db), queue_job(queue_db)]
+
+    serve = threading.Thread(target=worker.serve, args=("w", 2, stop))
+    serve.start()
+    serve.join(timeout=5)
+
+    assert not serve.is_alive()
+    assert sorted(ran) == [(jobs[0], "w"), (jobs[1], "w")]
+
+
+def test_queue_mode_enqueues_instead_of_spawning(queue_db, monkeypatch):
+    import io
+
+    monkeypatch.setattr(utils, "DB", queue_db)
+    monkeypatch.setattr(utils, "WORKER_MODE", "queue")
+    monkeypatch.setattr(utils, "spawn_worker", lambda *a: pytest.fail("spawned a worker"))
+    job_id = queue_db.insert_transcription(
+        "", "clip.mp3", "en", "whisper_tiny", "none", "en", "all", status.PROCESSING, "1.0"
+    )
+    upload = type("Upload", (), {"filename": "clip.mp3", "file": io.BytesIO(b"x")})()
+
+    assert utils.handle_transcription(job_id, None, upload, "en", "whisper_tiny", "none", "en", "all")
+
+    assert queue_db.get_transcription(job_id)["status"] == status.QUEUED
+    claimed_id, args, attempt = queue_db.claim_job("w", 60, 3)
+    assert (claimed_id, attempt) == (job_id, 1)
+    assert args["file"] == str(utils.job_dir(job_id) / "media" / "clip.mp3")
+    assert args["model"] == "whisper_tiny" and args["profile"] is False
+
+
+@pytest.fixture
+def queue_api(queue_db, monkeypatch):
+    """The web tier serving queue_db's /queue API on a real port; yields its URL."""
+    import uvicorn
+
+    import main
+
+    monkeypatch.setattr(main, "DB", queue_db)
+    monkeypatch.setattr(main, "WORKER_TOKEN", "secret")
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(
+        uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning", lifespan="off")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    yield f"http://127.0.0.1:{port}"
+    server.should_exit = True
+    thread.join()
+
+
+def test_off_host_worker_runs_a_job_through_the_queue_api(queue_db, queue_api, monkeypatch):
+    # The job's subprocess reports through the API too (it inherits QUEUE_URL).
+    report = (
+        f"import sys; sys.path.insert(0, {str(utils.BASE_DIR)!r}); "
+        "from queue_client import QueueClient; "
+        f"QueueClient({queue_api!r}, 'secret').update_transcription_status("
+        "'Completed successfully!', '2', 100, int(sys.argv[1]))"
+    )
+
+    def spawn(job_id, args):
+        utils.job_dir(job_id).mkdir(parents=True)
+        return subprocess.Popen([sys.executable, "-c", report, str(job_id)])
+
+    monkeypatch.setattr(worker, "spawn_worker", spawn)
+    monkeypatch.setattr(worker, "QUEUE_URL", queue_api)
+    remote = QueueClient(queue_api, "secret")
+    monkeypatch.setattr(worker, "DB", remote)
+    job_id = queue_job(queue_db)
+
+    job_id, args, attempt = remote.claim_job("far", 0.3, 3)
+    assert (args, attempt) == ({"file": "a.mp3"}, 1)
+    assert remote.claim_job("far", 0.3, 3) is None
+    worker.run_job(job_id, args, "far")
+
+    assert queue_db.get_transcription(job_id)["status"] == status.COMPLETED
+    assert queue_db.get_queue() == []
+    assert not utils.job_dir(job_id).exists()  # the working copy is gone
+    assert remote.get_stage_durations([job_id])[job_id].keys() >= {"queue", "startup"}
+
+
+def test_queue_api_needs_the_worker_token(queue_db, queue_api, monkeypatch):
+    import main
+
+    with pytest.raises(urllib.error.HTTPError) as denied:
+        QueueClient(queue_api, "wrong").claim_job("far", 60, 3)
+    assert denied.value.code == 403
+    with pytest.raises(urllib.error.HTTPError) as unknown:
+        QueueClient(queue_api, "secret")._call("delete_transcription", job_id=1)
+    assert unknown.value.code == 404
+    monkeypatch.setattr(main, "WORKER_TOKEN", "")  # unset: the API is off
+    with pytest.raises(urllib.error.HTTPError) as off:
+        QueueClient(queue_api, "").claim_job("far", 60, 3)
+    assert off.value.code == 403